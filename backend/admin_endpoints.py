@@ -1,6 +1,11 @@
 import psycopg2
-from flask import jsonify, g
+from flask import jsonify, g, request
 from datetime import datetime
+from pagination import (parse_page, keyset_query, order_by, trim_page, next_cursor, set_next_cursor,
+                        PaginationError, ADMIN_EXAMS_KEYSET)
+import exam_filters
+from change_feed import DELETE_EXAM_QUERY, PRUNE_TOMBSTONES_QUERY, TOMBSTONE_RETENTION_DAYS
+from exam_transitions import EXAM_CHANGES_CHANNEL
 
 # Flag to indicate if the database is available
 DB_AVAILABLE = False
@@ -21,24 +26,47 @@ def get_all_exams():
     if not user_id:
         return jsonify({"error": "User not found in token"}), 401
 
-    # Check if user is admin
+    try:
+        conditions, filter_params = exam_filters.parse_filters(request.args)
+        keyset = exam_filters.parse_sort(request.args, 'admin_exams', ADMIN_EXAMS_KEYSET)
+        page = parse_page(request.args, keyset)
+    except (exam_filters.FilterError, PaginationError) as e:
+        return jsonify({"error": str(e)}), 400
+
+    # Check if user is admin; token_required loads the role from users.role
+    if g.current_user.get('role') != 'ADMIN':
+        return jsonify({"error": "Unauthorized access"}), 403
+
     conn = None
     try:
         conn = get_db_connection()
         cursor = conn.cursor()
         
-        # Verify user is admin
-        cursor.execute("SELECT role_name FROM users WHERE id = %s", (user_id,))
-        user_role = cursor.fetchone()
-        if not user_role or user_role[0] != 'ADM':
-            return jsonify({"error": "Unauthorized access"}), 403
-        
+        # A page is a set of exams, so pick their ids first; the joins below
+        # return one row per exam and teacher
+        page_filter, params = "", []
+        if page:
+            exam_ids_query, params = keyset_query(
+                """
+                SELECT e.id FROM exams e
+                JOIN disciplines d ON e.discipline_id = d.id
+                LEFT JOIN rooms r ON e.room_id = r.id
+                """,
+                keyset, page, conditions, filter_params
+            )
+            page_filter = f"WHERE e.id IN ({exam_ids_query})"
+        elif conditions:
+            page_filter, params = "WHERE " + " AND ".join(conditions), filter_params
+
         # Fetch all exams with related information
-        query = """
+        query = f"""
             SELECT 
                 e.id as exam_id,
                 e.exam_date,
+                e.start_hour,
                 e.status,
+                e.exam_type,
+                e.student_group,
                 e.duration,
                 e.room_id,
                 d.id as discipline_id,
@@ -50,8 +78,7 @@ def get_all_exams():
                 u.id as teacher_id,
                 u.full_name as teacher_name,
                 u.email as teacher_email,
-                g.id as group_id,
-                g.name as group_name
+                e.student_group as group_name
             FROM 
                 exams e
             JOIN 
@@ -62,13 +89,12 @@ def get_all_exams():
                 discipline_teachers dt ON d.id = dt.discipline_id
             LEFT JOIN 
                 users u ON dt.teacher_id = u.id
-            LEFT JOIN 
-                groups g ON d.group_id = g.id
+            {page_filter}
             ORDER BY 
-                e.exam_date DESC
+                {order_by(keyset)}
         """
         
-        cursor.execute(query)
+        cursor.execute(query, params)
         exams = cursor.fetchall()
         columns = [desc[0] for desc in cursor.description]
         
@@ -95,7 +121,10 @@ def get_all_exams():
                 current_exam = {
                     'exam_id': exam_dict['exam_id'],
                     'exam_date': exam_dict['exam_date'],
+                    'start_hour': exam_dict['start_hour'],
                     'status': exam_dict['status'],
+                    'exam_type': exam_dict['exam_type'],
+                    'student_group': exam_dict['student_group'],
                     'duration': exam_dict['duration'],
                     'discipline_id': exam_dict['discipline_id'],
                     'discipline_name': exam_dict['discipline_name'],
@@ -104,7 +133,6 @@ def get_all_exams():
                     'room_id': exam_dict['room_id'],
                     'room_name': exam_dict['room_name'],
                     'room_capacity': exam_dict['room_capacity'],
-                    'group_id': exam_dict['group_id'],
                     'group_name': exam_dict['group_name'],
                     'teachers': []
                 }
@@ -130,8 +158,16 @@ def get_all_exams():
         # Add the last exam if there is one
         if current_exam:
             result.append(current_exam)
-            
-        return jsonify(result), 200
+
+        if not page:
+            return jsonify(result), 200
+        result, has_more = trim_page(result, page)
+        response = jsonify(result)
+        if has_more:
+            # ?sort= keysets name the exam id 'id'; this listing calls it exam_id
+            last = dict(result[-1], id=result[-1]['exam_id'])
+            set_next_cursor(response, next_cursor(keyset, last))
+        return response, 200
         
     except Exception as e:
         print(f"Error fetching admin exams: {e}")
@@ -154,25 +190,23 @@ def delete_exam(exam_id):
     if not user_id:
         return jsonify({"error": "User not found in token"}), 401
 
-    # Check if user is admin
+    # Check if user is admin; token_required loads the role from users.role
+    if g.current_user.get('role') != 'ADMIN':
+        return jsonify({"error": "Unauthorized access"}), 403
+
     conn = None
     try:
         conn = get_db_connection()
         cursor = conn.cursor()
         
-        # Verify user is admin
-        cursor.execute("SELECT role_name FROM users WHERE id = %s", (user_id,))
-        user_role = cursor.fetchone()
-        if not user_role or user_role[0] != 'ADM':
-            return jsonify({"error": "Unauthorized access"}), 403
-        
         # Check if exam exists
         cursor.execute("SELECT id FROM exams WHERE id = %s", (exam_id,))
         if not cursor.fetchone():
             return jsonify({"error": "Exam not found"}), 404
         
-        # Delete the exam
-        cursor.execute("DELETE FROM exams WHERE id = %s", (exam_id,))
+        # Delete the exam, leaving a tombstone for the change feed
+        cursor.execute(DELETE_EXAM_QUERY, (exam_id, EXAM_CHANGES_CHANNEL))
+        cursor.execute(PRUNE_TOMBSTONES_QUERY, (TOMBSTONE_RETENTION_DAYS,))
         conn.commit()
         
         return jsonify({"message": "Exam deleted successfully"}), 200
@@ -1,18 +1,34 @@
 import os
 import datetime
+import json
 import jwt
-from flask import Flask, jsonify, request, g
+from flask import Flask, Response, jsonify, request, g, stream_with_context
 from flask_cors import CORS
 from dotenv import load_dotenv
 from werkzeug.security import check_password_hash
 from database import get_db_connection
 from mock_data import MOCK_EXAMS, MOCK_USERS
 from auth import token_required, admin_required, sec_required
+from exam_transitions import notify_changes
+import bulk_import
+from serialization import OrjsonProvider, rows_response
+import pagination
+import exam_filters
+import fieldsets
+import conditional
+import compression
+import reference_cache
 
 load_dotenv()
 
 app = Flask(__name__)
-CORS(app, resources={r"/api/*": {"origins": "http://localhost:3000", "supports_credentials": True}})
+app.json_provider_class = OrjsonProvider
+app.json = OrjsonProvider(app)
+# Browsers reuse a preflight result for max_age seconds (Chromium caps it at 2 hours)
+CORS(app, resources={r"/api/*": {"origins": "http://localhost:3000", "supports_credentials": True,
+                                 "expose_headers": [pagination.NEXT_CURSOR_HEADER, "Link"],
+                                 "max_age": 7200}})
+compression.init_app(app)
 app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'your_default_secret_key')
 
 # --- Database Check ---
@@ -83,6 +99,17 @@ def sync_user():
         cursor.execute("SELECT id, role, full_name, email, student_group, year_of_study FROM users WHERE id = %s", (user_id,))
         user_record = cursor.fetchone()
 
+        if not user_record:
+            # Adopt an account pre-created by a bulk import; ON UPDATE CASCADE carries the new id to exams
+            cursor.execute(
+                "UPDATE users SET id = %s WHERE email = %s AND id LIKE %s RETURNING id, role, full_name, email, student_group, year_of_study",
+                (user_id, email, bulk_import.IMPORTED_ID_PREFIX + '%')
+            )
+            user_record = cursor.fetchone()
+            if user_record:
+                conn.commit()
+                reference_cache.invalidate('users')
+
         if user_record:
             columns = [desc[0] for desc in cursor.description]
             user_data = dict(zip(columns, user_record))
@@ -110,6 +137,7 @@ def sync_user():
             )
             new_user_record = cursor.fetchone()
             conn.commit()
+            reference_cache.invalidate('users')
             
             columns = [desc[0] for desc in cursor.description]
             user_data = dict(zip(columns, new_user_record))
@@ -185,6 +213,7 @@ def update_user_details():
         cursor.execute(query, tuple(params))
         updated_user = cursor.fetchone()
         conn.commit()
+        reference_cache.invalidate('users')
 
         if not updated_user:
             return jsonify({'message': 'User not found or update failed'}), 404
@@ -279,6 +308,7 @@ def admin_update_user(user_id):
         
         cursor.execute(query, tuple(params))
         conn.commit()
+        reference_cache.invalidate('users')
 
         return jsonify({'message': f'User {user_id} updated successfully'}), 200
 
@@ -308,16 +338,25 @@ def get_exams():
     if not DB_AVAILABLE:
         return jsonify(MOCK_EXAMS)
 
+    try:
+        scope = exam_filters.scope_condition(g.current_user)
+        conditions, params = exam_filters.parse_filters(request.args)
+        keyset = exam_filters.parse_sort(request.args, 'exams', pagination.EXAM_LISTING_KEYSET)
+        page = pagination.parse_page(request.args, keyset)
+    except (exam_filters.FilterError, pagination.PaginationError) as e:
+        return jsonify({"error": str(e)}), 400
+
     conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute('SELECT * FROM exams')
-    exams = cursor.fetchall()
-    # Convert list of tuples to list of dicts for JSON serialization
-    columns = [desc[0] for desc in cursor.description]
-    exams_dict = [dict(zip(columns, row)) for row in exams]
-    cursor.close()
-    conn.close()
-    return jsonify(exams_dict)
+    # Joins only serve the filters; rows are limited to the caller's role scope
+    query = """
+        SELECT e.*
+        FROM exams e
+        LEFT JOIN disciplines d ON e.discipline_id = d.id
+        LEFT JOIN rooms r ON e.room_id = r.id
+    """
+    return pagination.listing_response(
+        conn, query, keyset, page, [scope[0]] + conditions, scope[1] + params, name='all_exams'
+    )
 
 # --- SG Role Endpoints ---
 
@@ -347,6 +386,11 @@ def route_get_available_rooms():
 def route_propose_exam_schedule(exam_id):
     return propose_exam_schedule(exam_id)
 
+@app.route('/api/sg/exams/propose-batch', methods=['POST'])
+@token_required
+def route_propose_exam_schedule_batch():
+    return sg_endpoints.propose_exam_schedule_batch()
+
 @app.route('/api/sg/exams/<int:exam_id>/reschedule', methods=['PUT'])
 @token_required
 def route_reschedule_exam(exam_id):
@@ -381,12 +425,7 @@ def get_sg_disciplines():
         """
         cursor.execute(query, (user_id,))
         disciplines = cursor.fetchall()
-        columns = [desc[0] for desc in cursor.description]
-        disciplines_dict = [dict(zip(columns, row)) for row in disciplines]
-        for d in disciplines_dict:
-            if d.get('exam_date'):
-                d['exam_date'] = d['exam_date'].isoformat()
-        return jsonify(disciplines_dict), 200
+        return rows_response(cursor, disciplines)
     except Exception as e:
         print(f"Error fetching SG disciplines: {e}")
         return jsonify({"error": "An internal error occurred"}), 500
@@ -432,6 +471,7 @@ def propose_exam_date():
             (discipline_id, exam_date)
         )
         new_exam_proposal = cursor.fetchone()
+        notify_changes(cursor, [new_exam_proposal[0]])
         conn.commit()
 
         columns = [desc[0] for desc in cursor.description]
@@ -476,6 +516,10 @@ def route_review_exam_proposal(exam_id):
 def route_confirm_exam(exam_id):
     return confirm_exam(exam_id)
 
+@app.route('/api/cd/exams/bulk-review', methods=['POST'])
+def route_bulk_review_exams():
+    return cd_endpoints.bulk_review_exams()
+
 
 # --- STUDENT Role Endpoints ---
 
@@ -519,6 +563,74 @@ def route_get_student_exams():
     return student_endpoints.get_student_exams()
 
 
+# --- Calendar Feed Endpoints ---
+
+# Import the iCalendar feed endpoints from the separate file
+import calendar_feeds
+
+# Set DB_AVAILABLE in the calendar_feeds module
+calendar_feeds.DB_AVAILABLE = DB_AVAILABLE
+
+@app.route('/api/calendar/feed-url', methods=['GET'])
+@token_required
+def route_get_calendar_feed_url():
+    return calendar_feeds.get_feed_url()
+
+# No JWT here: calendar clients authenticate with the signed token in the URL
+@app.route('/api/calendar/<string:token>.ics', methods=['GET'])
+def route_get_calendar_feed(token):
+    return calendar_feeds.get_calendar_feed(token)
+
+
+# --- Exam Change Feed ---
+
+# Import the exam change feed from the separate file
+import change_feed
+
+# Set DB_AVAILABLE in the change_feed module
+change_feed.DB_AVAILABLE = DB_AVAILABLE
+
+@app.route('/api/exams/changes', methods=['GET'])
+@token_required
+def route_get_exam_changes():
+    return change_feed.get_exam_changes()
+
+# Import the exam event stream from the separate file
+import exam_events
+
+# Set DB_AVAILABLE in the exam_events module
+exam_events.DB_AVAILABLE = DB_AVAILABLE
+
+@app.route('/api/exams/events', methods=['GET'])
+@token_required
+def route_stream_exam_events():
+    return exam_events.stream_exam_events()
+
+
+# --- Room Hold Endpoints ---
+
+# Import the room-slot hold endpoints from the separate file
+import room_holds
+
+# Set DB_AVAILABLE in the room_holds module
+room_holds.DB_AVAILABLE = DB_AVAILABLE
+
+@app.route('/api/sg/room-holds', methods=['GET'])
+@token_required
+def route_get_room_holds():
+    return room_holds.get_my_holds()
+
+@app.route('/api/sg/room-holds', methods=['POST'])
+@token_required
+def route_place_room_hold():
+    return room_holds.place_hold()
+
+@app.route('/api/sg/room-holds', methods=['DELETE'])
+@token_required
+def route_release_room_hold():
+    return room_holds.release_hold()
+
+
 # --- ADMIN Role Endpoints ---
 
 @app.route('/api/admin/exams', methods=['GET'])
@@ -549,8 +661,18 @@ from sec_endpoints import create_exam, get_all_exams, export_exams_excel, manage
 import pdf_export
 from pdf_export import export_exams_pdf
 
+# Import streaming CSV export functionality
+import csv_export
+
+# Import Parquet snapshot export functionality
+import parquet_export
+
 # Set DB_AVAILABLE in the pdf_export module
 pdf_export.DB_AVAILABLE = DB_AVAILABLE
+# Set DB_AVAILABLE in the csv_export module
+csv_export.DB_AVAILABLE = DB_AVAILABLE
+# Set DB_AVAILABLE in the parquet_export module
+parquet_export.DB_AVAILABLE = DB_AVAILABLE
 # Set DB_AVAILABLE in the sec_endpoints module
 sec_endpoints.DB_AVAILABLE = DB_AVAILABLE
 
@@ -559,6 +681,11 @@ sec_endpoints.DB_AVAILABLE = DB_AVAILABLE
 def route_create_exam_post():
     return create_exam()
 
+@app.route('/api/sec/exams/bulk', methods=['POST'])
+@sec_required
+def route_create_exams_bulk():
+    return sec_endpoints.create_exams_bulk()
+
 @app.route('/api/sec/exams', methods=['GET'])
 @token_required
 def route_get_all_exams():
@@ -574,6 +701,16 @@ def route_export_exams_excel():
 def route_export_exams_pdf():
     return export_exams_pdf()
 
+@app.route('/api/sec/exams/export-csv', methods=['GET'])
+@sec_required
+def route_export_exams_csv():
+    return csv_export.export_exams_csv()
+
+@app.route('/api/sec/exams/export-parquet', methods=['GET'])
+@sec_required
+def route_export_exams_parquet():
+    return parquet_export.export_exams_parquet()
+
 @app.route('/api/sec/exam-periods', methods=['POST'])
 @token_required
 def route_manage_exam_periods():
@@ -584,6 +721,11 @@ def route_manage_exam_periods():
 def route_get_exam_periods():
     return sec_get_exam_periods()
 
+@app.route('/api/sec/exam-periods/<int:period_id>/confirm-accepted', methods=['POST'])
+@sec_required
+def route_confirm_accepted_in_period(period_id):
+    return sec_endpoints.confirm_accepted_in_period(period_id)
+
 @app.route('/api/sec/approved-exams', methods=['GET'])
 @token_required
 def get_approved_exams():
@@ -610,12 +752,7 @@ def get_approved_exams():
         """
         cursor.execute(query)
         approved_exams = cursor.fetchall()
-        columns = [desc[0] for desc in cursor.description]
-        exams_dict = [dict(zip(columns, row)) for row in approved_exams]
-        for exam in exams_dict:
-            if exam.get('exam_date'):
-                exam['exam_date'] = exam['exam_date'].isoformat()
-        return jsonify(exams_dict), 200
+        return rows_response(cursor, approved_exams)
     except Exception as e:
         print(f"Error fetching approved exams for SEC: {e}")
         return jsonify({"error": "An internal error occurred"}), 500
@@ -661,41 +798,21 @@ def assign_discipline():
         conn = get_db_connection()
         cursor = conn.cursor()
         
-        # Verify discipline exists
-        cursor.execute("SELECT id FROM disciplines WHERE id = %s", (discipline_id,))
-        if not cursor.fetchone():
-            return jsonify({"error": "Discipline not found"}), 404
-            
-        # Verify teachers exist and have CADRU_DIDACTIC role
-        cursor.execute("SELECT id FROM users WHERE id = %s AND role = 'CADRU_DIDACTIC'", (main_teacher_id,))
-        if not cursor.fetchone():
-            return jsonify({"error": "Main teacher not found or not a teacher"}), 404
-            
-        cursor.execute("SELECT id FROM users WHERE id = %s AND role = 'CADRU_DIDACTIC'", (second_teacher_id,))
-        if not cursor.fetchone():
-            return jsonify({"error": "Second teacher not found or not a teacher"}), 404
-            
-        # Verify student group has a group leader
-        cursor.execute("SELECT id FROM users WHERE student_group = %s AND role = 'SEF_GRUPA'", (student_group,))
-        if not cursor.fetchone():
-            return jsonify({"error": "No group leader found for this student group"}), 404
-            
-        # Check if an exam already exists for this discipline and group
-        cursor.execute(
-            "SELECT id FROM exams WHERE discipline_id = %s AND student_group = %s",
-            (discipline_id, student_group)
+        exam_id, error = sec_endpoints.insert_validated_exam(
+            cursor,
+            {
+                'discipline_id': discipline_id,
+                'student_group': student_group,
+                'exam_type': exam_type,
+                'main_teacher_id': main_teacher_id,
+                'second_teacher_id': second_teacher_id,
+            },
+            g.current_user.get('id'),
+            require_group_leader=True
         )
-        if cursor.fetchone():
-            return jsonify({"error": "An exam already exists for this discipline and group"}), 409
-            
-        # Create the exam
-        cursor.execute(
-            """INSERT INTO exams 
-            (discipline_id, exam_type, student_group, main_teacher_id, second_teacher_id, status, created_by) 
-            VALUES (%s, %s, %s, %s, %s, 'DRAFT', %s) RETURNING id""",
-            (discipline_id, exam_type, student_group, main_teacher_id, second_teacher_id, g.current_user.get('id'))
-        )
-        exam_id = cursor.fetchone()[0]
+        if error:
+            code, message, status = error
+            return jsonify({"error": message, "code": code}), status
         conn.commit()
         
         return jsonify({
@@ -776,14 +893,7 @@ def export_schedule():
         """
         cursor.execute(query)
         exams = cursor.fetchall()
-        columns = [desc[0] for desc in cursor.description]
-        exams_dict = [dict(zip(columns, row)) for row in exams]
-        
-        for exam in exams_dict:
-            if exam.get('exam_date'):
-                exam['exam_date'] = exam['exam_date'].isoformat()
-        
-        return jsonify(exams_dict), 200
+        return rows_response(cursor, exams)
     except Exception as e:
         print(f"Error exporting schedule: {e}")
         return jsonify({"error": "An internal error occurred"}), 500
@@ -795,11 +905,13 @@ def export_schedule():
 
 @app.route('/api/sec/disciplines', methods=['GET'])
 @token_required
+@reference_cache.cached('disciplines')
 def route_sec_disciplines():
     return get_sec_disciplines()
 
 @app.route('/api/sec/teachers', methods=['GET'])
 @token_required
+@reference_cache.cached('users')
 def route_sec_teachers():
     return get_sec_teachers()
 
@@ -808,41 +920,39 @@ def route_sec_teachers():
 @token_required
 def get_all_users():
     # In a real app, you'd add a check here to ensure g.current_user.role == 'ADM'
-    conn = None
+    try:
+        page = pagination.parse_page(request.args, pagination.USERS_KEYSET)
+    except pagination.PaginationError as e:
+        return jsonify({"error": str(e)}), 400
     try:
         conn = get_db_connection()
-        cursor = conn.cursor()
         query = """
             SELECT u.id, u.full_name, u.email, r.name as role_name
             FROM users u
             JOIN roles r ON u.role_id = r.id
-            ORDER BY u.full_name;
         """
-        cursor.execute(query)
-        users = cursor.fetchall()
-        columns = [desc[0] for desc in cursor.description]
-        users_dict = [dict(zip(columns, row)) for row in users]
-        return jsonify(users_dict), 200
+        return pagination.listing_response(conn, query, pagination.USERS_KEYSET, page, name='admin_users')
     except Exception as e:
         print(f"Error fetching all users: {e}")
         return jsonify({"error": "An internal error occurred"}), 500
-    finally:
-        if conn:
-            cursor.close()
-            conn.close()
 
 @app.route('/api/admin/roles', methods=['GET'])
 @token_required
+@reference_cache.cached('roles')
 def get_all_roles():
     conn = None
     try:
         conn = get_db_connection()
         cursor = conn.cursor()
+        validator = conditional.table_validator(cursor, "FROM roles r")
+        unchanged = conditional.not_modified(validator)
+        if unchanged:
+            return unchanged
         cursor.execute("SELECT id, name FROM roles ORDER BY name")
         roles = cursor.fetchall()
         columns = [desc[0] for desc in cursor.description]
         roles_dict = [dict(zip(columns, row)) for row in roles]
-        return jsonify(roles_dict), 200
+        return conditional.add_validators(jsonify(roles_dict), validator)
     except Exception as e:
         print(f"Error fetching roles: {e}")
         return jsonify({"error": "An internal error occurred"}), 500
@@ -855,7 +965,7 @@ def get_all_roles():
 
 
 @app.route('/api/disciplines/upload', methods=['POST'])
-@token_required
+@admin_required
 def upload_disciplines_endpoint():
     if not DB_AVAILABLE:
         return jsonify({"error": "Database not available"}), 500
@@ -863,59 +973,40 @@ def upload_disciplines_endpoint():
     data = request.get_json()
     if not data:
         return jsonify({"error": "No data provided"}), 400
+    if not isinstance(data, list):
+        return jsonify({"error": "Expected a list of rows"}), 400
+
+    # Validate every row up front; only valid rows are staged
+    valid_rows = []
+    report = []
+    for row_number, item in enumerate(data, start=1):
+        row, errors = bulk_import.validate_discipline_row(row_number, item)
+        if errors:
+            report.append({'row': row_number, 'status': 'invalid', 'errors': errors})
+        else:
+            valid_rows.append(row)
 
     conn = None
     try:
         conn = get_db_connection()
         cursor = conn.cursor()
 
-        # Get role_id for 'SG' (Group Leader)
-        cursor.execute("SELECT id FROM roles WHERE name = 'SG'")
-        sg_role_row = cursor.fetchone()
-        if not sg_role_row:
-            return jsonify({"error": "Default role 'SG' not found."}), 500
-        sg_role_id = sg_role_row[0]
-
-        disciplines_added = 0
-        users_added = 0
-
-        for item in data:
-            discipline_name = item.get('Discipline Name')
-            teacher_name = item.get('Teacher Name')
-            teacher_email = item.get('Teacher Email')
+        result = bulk_import.import_discipline_rows(cursor, valid_rows)
+        conn.commit()
+        reference_cache.invalidate('disciplines', 'users')
 
-            if not all([discipline_name, teacher_name, teacher_email]):
-                continue
+        report.extend(result['report'])
+        report.sort(key=lambda entry: entry['row'])
+        imported = sum(1 for entry in report if entry['status'] == 'imported')
 
-            # Find or create the teacher (user)
-            cursor.execute("SELECT id FROM users WHERE email = %s", (teacher_email,))
-            user_row = cursor.fetchone()
-            
-            if user_row:
-                teacher_id = user_row[0]
-            else:
-                cursor.execute(
-                    "INSERT INTO users (full_name, email, role_id) VALUES (%s, %s, %s) RETURNING id",
-                    (teacher_name, teacher_email, sg_role_id)
-                )
-                teacher_id = cursor.fetchone()[0]
-                users_added += 1
-
-            # Check if discipline already exists
-            cursor.execute("SELECT id FROM disciplines WHERE name = %s", (discipline_name,))
-            if not cursor.fetchone():
-                cursor.execute(
-                    "INSERT INTO disciplines (name, teacher_id) VALUES (%s, %s)",
-                    (discipline_name, teacher_id)
-                )
-                disciplines_added += 1
-        
-        conn.commit()
-        
         return jsonify({
             "message": "Upload successful.",
-            "disciplines_added": disciplines_added,
-            "users_added": users_added
+            "disciplines_added": result['disciplines_added'],
+            "users_added": result['users_added'],
+            "links_added": result['links_added'],
+            "rows_imported": imported,
+            "rows_failed": len(report) - imported,
+            "report": report
         }), 201
 
     except Exception as e:
@@ -929,6 +1020,120 @@ def upload_disciplines_endpoint():
             conn.close()
 
 
+# Rows staged per set-based import batch for spreadsheet uploads
+UPLOAD_BATCH_SIZE = 2000
+
+@app.route('/api/disciplines/upload-file', methods=['POST'])
+@admin_required
+def upload_disciplines_file():
+    """
+    Multipart upload (field 'file') of a .csv/.xlsx discipline list.
+    The file is parsed as a stream and imported in batches inside one transaction;
+    the response is NDJSON: one 'progress' line per batch, one line per failed row
+    and a final 'done' (committed) or 'failed' (rolled back) line.
+    """
+    if not DB_AVAILABLE:
+        return jsonify({"error": "Database not available"}), 500
+
+    upload = request.files.get('file')
+    if not upload or not upload.filename:
+        return jsonify({"error": "No file provided"}), 400
+    if not upload.filename.lower().endswith(bulk_import.UPLOAD_EXTENSIONS):
+        return jsonify({"error": f"Unsupported file type. Allowed: {', '.join(bulk_import.UPLOAD_EXTENSIONS)}"}), 400
+
+    def line(payload):
+        return json.dumps(payload) + '\n'
+
+    def generate():
+        totals = {'rows_processed': 0, 'rows_imported': 0, 'rows_failed': 0,
+                  'disciplines_added': 0, 'users_added': 0, 'links_added': 0}
+        conn = None
+        try:
+            conn = get_db_connection()
+            cursor = conn.cursor()
+
+            def flush(batch):
+                result = bulk_import.import_discipline_rows(cursor, batch)
+                for key in ('disciplines_added', 'users_added', 'links_added'):
+                    totals[key] += result[key]
+                for entry in result['report']:
+                    if entry['status'] == 'imported':
+                        totals['rows_imported'] += 1
+                    else:
+                        totals['rows_failed'] += 1
+                        yield line(entry)
+
+            batch = []
+            for row_number, item in bulk_import.iter_upload_rows(upload, bulk_import.DISCIPLINE_FIELDS):
+                totals['rows_processed'] += 1
+                row, errors = bulk_import.validate_discipline_row(row_number, item)
+                if errors:
+                    totals['rows_failed'] += 1
+                    yield line({'row': row_number, 'status': 'invalid', 'errors': errors})
+                    continue
+                batch.append(row)
+                if len(batch) >= UPLOAD_BATCH_SIZE:
+                    yield from flush(batch)
+                    batch = []
+                    yield line({'event': 'progress', **totals})
+            if batch:
+                yield from flush(batch)
+
+            conn.commit()
+            reference_cache.invalidate('disciplines', 'users')
+            yield line({'event': 'done', **totals})
+        except Exception as e:
+            if conn:
+                conn.rollback()
+            print(f"Error during discipline file upload: {e}")
+            yield line({'event': 'failed', 'error': 'Import aborted, no rows were saved', **totals})
+        finally:
+            if conn:
+                cursor.close()
+                conn.close()
+
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+
+@app.route('/api/admin/students/import', methods=['POST'])
+@sec_required
+def import_student_roster():
+    """
+    Multipart upload (field 'file') of a .csv/.xlsx student roster with
+    Email, Name, Group and Year columns. The file is streamed into a staging
+    table with COPY and merged into users in one statement; the whole import
+    is one transaction.
+    """
+    if not DB_AVAILABLE:
+        return jsonify({"error": "Database not available"}), 500
+
+    upload = request.files.get('file')
+    if not upload or not upload.filename:
+        return jsonify({"error": "No file provided"}), 400
+    if not upload.filename.lower().endswith(bulk_import.UPLOAD_EXTENSIONS):
+        return jsonify({"error": f"Unsupported file type. Allowed: {', '.join(bulk_import.UPLOAD_EXTENSIONS)}"}), 400
+
+    conn = None
+    try:
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        result = bulk_import.import_student_roster(
+            cursor, bulk_import.iter_upload_rows(upload, bulk_import.STUDENT_FIELDS)
+        )
+        conn.commit()
+        reference_cache.invalidate('users')
+        return jsonify(result), 201
+    except Exception as e:
+        if conn:
+            conn.rollback()
+        print(f"Error importing student roster: {e}")
+        return jsonify({"error": "Import aborted, no rows were saved"}), 500
+    finally:
+        if conn:
+            cursor.close()
+            conn.close()
+
+
 @app.route('/api/exam-periods', methods=['GET'])
 @token_required
 def get_exam_periods():
@@ -941,13 +1146,7 @@ def get_exam_periods():
         cursor = conn.cursor()
         cursor.execute("SELECT id, start_date, end_date, is_active FROM exam_periods ORDER BY start_date DESC")
         periods = cursor.fetchall()
-        columns = [desc[0] for desc in cursor.description]
-        periods_dict = [dict(zip(columns, row)) for row in periods]
-        # Convert date objects to strings for JSON serialization
-        for p in periods_dict:
-            p['start_date'] = p['start_date'].isoformat()
-            p['end_date'] = p['end_date'].isoformat()
-        return jsonify(periods_dict), 200
+        return rows_response(cursor, periods)
     except Exception as e:
         print(f"Error fetching exam periods: {e}")
         return jsonify({"error": "An internal error occurred"}), 500
@@ -1034,19 +1233,24 @@ def update_exam_period(period_id):
 # Room Management Endpoints
 @app.route('/api/rooms', methods=['GET'])
 @sec_required
+@reference_cache.cached('rooms')
 def get_rooms():
     conn = get_db_connection()
     cursor = conn.cursor()
     try:
+        validator = conditional.table_validator(cursor, "FROM rooms r")
+        unchanged = conditional.not_modified(validator)
+        if unchanged:
+            return unchanged
         cursor.execute("SELECT id, name, short_name, building_name, capacity FROM rooms ORDER BY building_name, name")
         rooms = cursor.fetchall()
-        return jsonify([{
+        return conditional.add_validators(jsonify([{
             'id': r[0],
             'name': r[1],
             'short_name': r[2],
             'building_name': r[3],
             'capacity': r[4]
-        } for r in rooms])
+        } for r in rooms]), validator)
     except Exception as e:
         print(f"Error fetching rooms: {e}")
         return jsonify({'error': 'An internal error occurred'}), 500
@@ -1073,6 +1277,7 @@ def add_room():
         )
         new_id = cursor.fetchone()[0]
         conn.commit()
+        reference_cache.invalidate('rooms')
         return jsonify({'message': 'Room added successfully', 'id': new_id}), 201
     except Exception as e:
         conn.rollback()
@@ -1100,6 +1305,7 @@ def update_room(room_id):
             (name, data.get('short_name'), data.get('building_name'), capacity, room_id)
         )
         conn.commit()
+        reference_cache.invalidate('rooms')
         if cursor.rowcount == 0:
             return jsonify({'error': 'Room not found'}), 404
         return jsonify({'message': 'Room updated successfully'})
@@ -1119,6 +1325,7 @@ def delete_room(room_id):
     try:
         cursor.execute("DELETE FROM rooms WHERE id = %s", (room_id,))
         conn.commit()
+        reference_cache.invalidate('rooms')
         if cursor.rowcount == 0:
             return jsonify({'error': 'Room not found'}), 404
         return jsonify({'message': 'Room deleted successfully'})
@@ -1131,46 +1338,66 @@ def delete_room(room_id):
 
 # ----------------- DISCIPLINE MANAGEMENT (Admin) -----------------
 
+# Columns of GET /api/users; ?fields= selects a subset
+USERS_LISTING = fieldsets.Listing('users', "FROM users u", {}, {
+    name: fieldsets.Field(f"u.{name}")
+    for name in ('id', 'full_name', 'email', 'role', 'student_group', 'year_of_study')
+})
+
 @app.route('/api/users', methods=['GET'])
 @admin_required
 def get_users():
+    try:
+        page = pagination.parse_page(request.args, pagination.USERS_KEYSET)
+        required = pagination.key_columns(pagination.USERS_KEYSET) if page else ()
+        fields = USERS_LISTING.parse_fields(request.args, required)
+    except (pagination.PaginationError, fieldsets.FieldsError) as e:
+        return jsonify({"error": str(e)}), 400
     conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute("SELECT id, full_name, email, role, student_group, year_of_study FROM users ORDER BY full_name")
-    users = cursor.fetchall()
-    columns = [desc[0] for desc in cursor.description]
-    users_dict = [dict(zip(columns, row)) for row in users]
-    cursor.close()
-    conn.close()
-    return jsonify(users_dict)
+    return pagination.listing_response(
+        conn, USERS_LISTING.shape(fields).select_sql, pagination.USERS_KEYSET, page, name='users'
+    )
 
 @app.route('/api/admin/roles', methods=['GET'])
 @admin_required
+@reference_cache.cached('roles')
 def get_roles():
     # This can be hardcoded or fetched from an enum/table if they become dynamic
     roles = ['STUDENT', 'SEF_GRUPA', 'CADRU_DIDACTIC', 'ADMIN']
-    return jsonify(roles)
+    validator = conditional.static_validator(roles)
+    return conditional.not_modified(validator) or conditional.add_validators(jsonify(roles), validator)
+
+@app.route('/api/admin/cache-stats', methods=['GET'])
+@admin_required
+def route_get_cache_stats():
+    return reference_cache.get_cache_stats()
 
 @app.route('/api/teachers', methods=['GET'])
 @token_required
+@reference_cache.cached('users')
 def get_teachers():
-    conn = get_db_connection()
-    cursor = conn.cursor()
     try:
-        cursor.execute("SELECT id, full_name FROM users WHERE role = 'CADRU_DIDACTIC' ORDER BY full_name")
-        teachers_raw = cursor.fetchall()
-        columns = [desc[0] for desc in cursor.description]
-        teachers_list = [dict(zip(columns, row)) for row in teachers_raw]
-        return jsonify(teachers_list)
+        page = pagination.parse_page(request.args, pagination.USERS_KEYSET)
+    except pagination.PaginationError as e:
+        return jsonify({'error': str(e)}), 400
+    try:
+        conn = get_db_connection()
+        validator = conditional.table_validator(conn.cursor(), "FROM users u", ["u.role = 'CADRU_DIDACTIC'"])
+        unchanged = conditional.not_modified(validator)
+        if unchanged:
+            conn.close()
+            return unchanged
+        return conditional.add_validators(pagination.listing_response(
+            conn, "SELECT u.id, u.full_name FROM users u", pagination.USERS_KEYSET, page,
+            conditions=["u.role = 'CADRU_DIDACTIC'"], name='teachers'
+        ), validator)
     except Exception as e:
         print(f"Error fetching teachers: {e}")
         return jsonify({'error': 'An internal error occurred'}), 500
-    finally:
-        cursor.close()
-        conn.close()
 
 @app.route('/api/student-groups', methods=['GET'])
 @token_required
+@reference_cache.cached('users')
 def get_student_groups():
     """Get all unique student groups from the users table"""
     # Check if user has SEC or ADM role
@@ -1180,6 +1407,12 @@ def get_student_groups():
     conn = get_db_connection()
     cursor = conn.cursor()
     try:
+        validator = conditional.table_validator(
+            cursor, "FROM users u", ["u.student_group IS NOT NULL", "u.student_group != ''"]
+        )
+        unchanged = conditional.not_modified(validator)
+        if unchanged:
+            return unchanged
         # Get all unique student groups that are not null or empty
         cursor.execute("""
             SELECT DISTINCT student_group 
@@ -1190,7 +1423,7 @@ def get_student_groups():
         groups_raw = cursor.fetchall()
         # Convert to list of strings
         groups_list = [group[0] for group in groups_raw]
-        return jsonify(groups_list)
+        return conditional.add_validators(jsonify(groups_list), validator)
     except Exception as e:
         print(f"Error fetching student groups: {e}")
         return jsonify({'error': 'An internal error occurred'}), 500
@@ -1200,10 +1433,14 @@ def get_student_groups():
 
 @app.route('/api/disciplines', methods=['GET'])
 @admin_required
+@reference_cache.cached('disciplines', 'users')
 def get_disciplines():
-    conn = get_db_connection()
-    cursor = conn.cursor()
     try:
+        page = pagination.parse_page(request.args, pagination.DISCIPLINES_KEYSET)
+    except pagination.PaginationError as e:
+        return jsonify({'error': str(e)}), 400
+    try:
+        conn = get_db_connection()
         # Use a subquery with JSON_AGG to get all teachers for each discipline
         query = """
             SELECT
@@ -1217,27 +1454,12 @@ def get_disciplines():
                     '[]'::json
                 ) as teachers
             FROM disciplines d
-            ORDER BY d.name;
         """
-        cursor.execute(query)
-        disciplines_raw = cursor.fetchall()
-
-        columns = [desc[0] for desc in cursor.description]
-        disciplines_list = []
-        for row in disciplines_raw:
-            d = dict(zip(columns, row))
-            # pg8000 returns json as a string, so we parse it
-            if isinstance(d.get('teachers'), str):
-                d['teachers'] = json.loads(d['teachers'])
-            disciplines_list.append(d)
-
-        return jsonify(disciplines_list)
+        # pg8000 decodes the json column, so rows go straight to the encoder
+        return pagination.listing_response(conn, query, pagination.DISCIPLINES_KEYSET, page, name='disciplines')
     except Exception as e:
         print(f"Error fetching disciplines: {e}")
         return jsonify({'error': 'An internal error occurred'}), 500
-    finally:
-        cursor.close()
-        conn.close()
 
 @app.route('/api/disciplines', methods=['POST'])
 @admin_required
@@ -1268,6 +1490,7 @@ def add_discipline():
                 )
         
         conn.commit()
+        reference_cache.invalidate('disciplines')
         return jsonify({'message': 'Discipline added successfully', 'id': discipline_id}), 201
     except Exception as e:
         conn.rollback()
@@ -1312,6 +1535,7 @@ def update_discipline(discipline_id):
                 )
 
         conn.commit()
+        reference_cache.invalidate('disciplines')
         return jsonify({'message': 'Discipline updated successfully'})
     except Exception as e:
         conn.rollback()
@@ -1329,6 +1553,7 @@ def delete_discipline(discipline_id):
     try:
         cursor.execute("DELETE FROM disciplines WHERE id = %s", (discipline_id,))
         conn.commit()
+        reference_cache.invalidate('disciplines')
     except Exception as e:
         conn.rollback()
         return jsonify({'message': f'Database error: {e}'}), 500
@@ -78,10 +78,9 @@ def token_required(f):
             cursor.execute("SELECT role, full_name, email, student_group, year_of_study FROM users WHERE id = %s", (user_id,))
             db_user = cursor.fetchone()
             logging.debug(f"token_required: Fetched db_user for user_id {user_id}: {db_user}")
+            # Determine if this is a sync request where we want to create the user if missing
+            is_sync_request = request.path == '/api/auth/sync' and request.method == 'POST'
             if db_user:
-                # Determine if this is a sync request where we want to create the user if missing
-                is_sync_request = request.path == '/api/auth/sync' and request.method == 'POST'
-                
                 if db_user:
                     # Use the role from the database, which is the most up-to-date
                     db_role, full_name, db_email, student_group, year_of_study = db_user
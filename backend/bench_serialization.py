@@ -0,0 +1,102 @@
+"""
+Micro-benchmark for listing serialization.
+Compares the old path (dict per row, isoformat() loop, Flask's default
+json-based provider) with serialization.rows_response's encoder on rows
+shaped like GET /api/sec/exams. No database is needed.
+
+Usage:
+    python bench_serialization.py              # 10k rows
+    python bench_serialization.py --rows 50000 --repeat 10
+"""
+
+import argparse
+import datetime
+import decimal
+import statistics
+import time
+
+import orjson
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+
+from serialization import encoder_for, NUMERIC_OID
+
+# (name, type OID) as pg8000 reports them in cursor.description
+INT4, TEXT, TIMESTAMP, TIMESTAMPTZ = 23, 25, 1114, 1184
+EXAM_COLUMNS = (
+    ('id', INT4), ('discipline_name', TEXT), ('exam_type', TEXT), ('student_group', TEXT),
+    ('status', TEXT), ('exam_date', TIMESTAMP), ('start_hour', INT4), ('duration', INT4),
+    ('room_name', TEXT), ('main_teacher_name', TEXT), ('second_teacher_name', TEXT),
+    ('created_at', TIMESTAMPTZ), ('updated_at', TIMESTAMPTZ), ('grade_weight', NUMERIC_OID),
+)
+DESCRIPTION = [(name, oid, None, None, None, None, None) for name, oid in EXAM_COLUMNS]
+
+
+def make_rows(count):
+    base = datetime.datetime(2025, 6, 2, 8, 0)
+    stamp = datetime.datetime(2025, 5, 1, 12, 30, 15, 123456, tzinfo=datetime.timezone.utc)
+    statuses = ('DRAFT', 'PROPOSED', 'ACCEPTED', 'CONFIRMED')
+    return [
+        [
+            i, f'Discipline {i % 120}', 'EXAM', f'32{i % 40:02d}A', statuses[i % 4],
+            base + datetime.timedelta(days=i % 30), 8 + 2 * (i % 6), 120,
+            f'C{i % 50}', f'Teacher {i % 80}', f'Teacher {(i + 7) % 80}',
+            stamp, stamp, decimal.Decimal('0.50'),
+        ]
+        for i in range(count)
+    ]
+
+
+def legacy_encode(provider, rows):
+    columns = [desc[0] for desc in DESCRIPTION]
+    exams_dict = [dict(zip(columns, row)) for row in rows]
+    for exam in exams_dict:
+        if exam.get('exam_date'):
+            exam['exam_date'] = exam['exam_date'].isoformat()
+        if exam.get('created_at'):
+            exam['created_at'] = exam['created_at'].isoformat()
+        if exam.get('updated_at') and exam['updated_at'] is not None:
+            exam['updated_at'] = exam['updated_at'].isoformat()
+    return provider.dumps(exams_dict).encode('utf-8')
+
+
+def orjson_encode(rows):
+    return encoder_for(DESCRIPTION).dumps(rows)
+
+
+def timed(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark listing serialization.")
+    parser.add_argument('--rows', type=int, default=10000, help="Rows per listing (default 10000)")
+    parser.add_argument('--repeat', type=int, default=20, help="Runs per encoder; the median is reported (default 20)")
+    args = parser.parse_args()
+
+    rows = make_rows(args.rows)
+    # The provider only keeps a weak reference to its app
+    flask_app = Flask(__name__)
+    provider = DefaultJSONProvider(flask_app)
+
+    # Both must describe the same data; only key order may differ
+    legacy, fast = orjson.loads(legacy_encode(provider, rows)), orjson.loads(orjson_encode(rows))
+    assert [sorted(row.items()) for row in legacy] == [sorted(row.items()) for row in fast], \
+        "encoders disagree"
+
+    legacy_time = timed(lambda: legacy_encode(provider, rows), args.repeat)
+    fast_time = timed(lambda: orjson_encode(rows), args.repeat)
+
+    print(f"Rows:        {args.rows}")
+    print(f"Legacy:      {legacy_time * 1000:.1f} ms ({args.rows / legacy_time:,.0f} rows/s)")
+    print(f"orjson:      {fast_time * 1000:.1f} ms ({args.rows / fast_time:,.0f} rows/s)")
+    print(f"Speed-up:    {legacy_time / fast_time:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,350 @@
+"""
+Set-based bulk import of disciplines, their teachers and student rosters.
+Validated rows are loaded into a temporary staging table with a single
+statement (or COPY FROM STDIN for rosters) and merged with INSERT ... ON
+CONFLICT, so an upload costs the same handful of round trips whether it has
+ten rows or ten thousand. Spreadsheet uploads (.csv/.xlsx) are parsed as a
+stream and fed in batches.
+"""
+
+import csv
+import io
+import os
+import re
+
+import openpyxl
+
+EMAIL_PATTERN = re.compile(r'^[^@\s]+@[^@\s]+\.[^@\s]+$')
+
+# Column headers accepted for discipline uploads
+DISCIPLINE_FIELDS = ('Discipline Name', 'Teacher Name', 'Teacher Email')
+
+# Column headers accepted for student roster uploads
+STUDENT_FIELDS = ('Email', 'Name', 'Group', 'Year')
+
+# Spreadsheet formats accepted by the file upload endpoints
+UPLOAD_EXTENSIONS = ('.csv', '.xlsx')
+
+# Accounts created by an import get a placeholder id with this prefix; the
+# first /api/auth/sync for the same email swaps it for the Supabase user id.
+IMPORTED_ID_PREFIX = 'import:'
+
+# Roster COPY payload is sent in chunks of roughly this many bytes
+COPY_CHUNK_SIZE = 64 * 1024
+# Per-row validation errors returned to the client; the rest are only counted
+MAX_REPORTED_ERRORS = 200
+
+
+def _header_key(value):
+    return re.sub(r'[\s_]+', ' ', str(value or '')).strip().lower()
+
+
+def iter_upload_rows(file_storage, fields):
+    """
+    Stream rows of an uploaded .csv or .xlsx file as (row_number, dict) pairs.
+    Headers are matched to `fields` ignoring case, spaces and underscores;
+    unknown columns are ignored. Files are read incrementally (csv reader or
+    openpyxl read-only mode), never loaded whole.
+    """
+    wanted = {_header_key(field): field for field in fields}
+    extension = os.path.splitext(file_storage.filename or '')[1].lower()
+
+    if extension == '.csv':
+        text = io.TextIOWrapper(file_storage.stream, encoding='utf-8-sig', newline='')
+        reader = csv.reader(text)
+        header = next(reader, [])
+        columns = [wanted.get(_header_key(h)) for h in header]
+        for row_number, values in enumerate(reader, start=2):
+            if not any(values):
+                continue
+            yield row_number, {col: value for col, value in zip(columns, values) if col}
+        text.detach()
+
+    elif extension == '.xlsx':
+        workbook = openpyxl.load_workbook(file_storage.stream, read_only=True, data_only=True)
+        try:
+            rows = workbook.active.iter_rows(values_only=True)
+            header = next(rows, ())
+            columns = [wanted.get(_header_key(h)) for h in header]
+            for row_number, values in enumerate(rows, start=2):
+                if not any(v not in (None, '') for v in values):
+                    continue
+                yield row_number, {col: value for col, value in zip(columns, values) if col}
+        finally:
+            workbook.close()
+
+    else:
+        raise ValueError(f"Unsupported file type. Allowed: {', '.join(UPLOAD_EXTENSIONS)}")
+
+
+def validate_discipline_row(row_number, item):
+    """
+    Normalize one uploaded discipline row.
+    Returns (row, errors) where row is (row_number, discipline_name, teacher_name, teacher_email).
+    """
+    if not isinstance(item, dict):
+        return None, ["Row must be an object"]
+
+    discipline_name = str(item.get('Discipline Name') or '').strip()
+    teacher_name = str(item.get('Teacher Name') or '').strip()
+    teacher_email = str(item.get('Teacher Email') or '').strip().lower()
+
+    errors = []
+    if not discipline_name:
+        errors.append("Missing 'Discipline Name'")
+    elif len(discipline_name) > 255:
+        errors.append("'Discipline Name' is longer than 255 characters")
+    if not teacher_name:
+        errors.append("Missing 'Teacher Name'")
+    elif len(teacher_name) > 255:
+        errors.append("'Teacher Name' is longer than 255 characters")
+    if not teacher_email:
+        errors.append("Missing 'Teacher Email'")
+    elif not EMAIL_PATTERN.match(teacher_email) or len(teacher_email) > 255:
+        errors.append(f"Invalid teacher email: {teacher_email}")
+
+    if errors:
+        return None, errors
+    return (row_number, discipline_name, teacher_name, teacher_email), []
+
+
+# Links staged upload rows to existing accounts; users_email_lower_idx in init_db.py serves it
+MATCH_UPLOAD_TEACHERS_QUERY = """
+    UPDATE discipline_upload s SET teacher_id = u.id
+    FROM users u
+    WHERE s.teacher_id IS NULL AND lower(u.email) = s.teacher_email
+"""
+
+
+def import_discipline_rows(cursor, rows):
+    """
+    Merge validated discipline rows into users, disciplines and discipline_teachers.
+    Runs inside the caller's transaction; the caller commits.
+    Returns counts plus one report entry per staged row.
+    """
+    result = {
+        'disciplines_added': 0,
+        'users_added': 0,
+        'links_added': 0,
+        'report': [],
+    }
+    if not rows:
+        return result
+
+    cursor.execute("""
+        CREATE TEMP TABLE IF NOT EXISTS discipline_upload (
+            row_number INTEGER,
+            discipline_name TEXT,
+            teacher_name TEXT,
+            teacher_email TEXT,
+            teacher_id TEXT
+        ) ON COMMIT DROP
+    """)
+    row_numbers, discipline_names, teacher_names, teacher_emails = (list(col) for col in zip(*rows))
+    cursor.execute(
+        """
+        INSERT INTO discipline_upload (row_number, discipline_name, teacher_name, teacher_email)
+        SELECT * FROM unnest(%s::int[], %s::text[], %s::text[], %s::text[])
+        """,
+        (row_numbers, discipline_names, teacher_names, teacher_emails)
+    )
+
+    # Uploaded emails are lowercased but users.email keeps the case it was
+    # stored with, so existing accounts are matched on lower(email)
+    cursor.execute(MATCH_UPLOAD_TEACHERS_QUERY)
+
+    # New teachers: first name seen for each email wins
+    cursor.execute("""
+        INSERT INTO users (id, full_name, email, role)
+        SELECT %s || gen_random_uuid()::text, teacher_name, teacher_email, 'CADRU_DIDACTIC'
+        FROM (
+            SELECT DISTINCT ON (teacher_email) teacher_email, teacher_name
+            FROM discipline_upload
+            WHERE teacher_id IS NULL
+            ORDER BY teacher_email, row_number
+        ) t
+        ON CONFLICT (email) DO NOTHING
+        RETURNING email
+    """, (IMPORTED_ID_PREFIX,))
+    new_teachers = {row[0] for row in cursor.fetchall()}
+    if new_teachers:
+        cursor.execute(MATCH_UPLOAD_TEACHERS_QUERY)
+
+    # Rows whose email belongs to a non-teacher account are rejected below; don't create their disciplines
+    cursor.execute("""
+        INSERT INTO disciplines (name)
+        SELECT DISTINCT s.discipline_name
+        FROM discipline_upload s
+        JOIN users u ON u.id = s.teacher_id AND u.role = 'CADRU_DIDACTIC'
+        ON CONFLICT (name) DO NOTHING
+        RETURNING name
+    """)
+    new_disciplines = {row[0] for row in cursor.fetchall()}
+
+    cursor.execute("""
+        INSERT INTO discipline_teachers (discipline_id, teacher_id)
+        SELECT DISTINCT d.id, u.id
+        FROM discipline_upload s
+        JOIN disciplines d ON d.name = s.discipline_name
+        JOIN users u ON u.id = s.teacher_id AND u.role = 'CADRU_DIDACTIC'
+        ON CONFLICT DO NOTHING
+    """)
+    result['links_added'] = max(cursor.rowcount, 0)
+
+    cursor.execute("""
+        SELECT s.row_number, s.discipline_name, s.teacher_email, u.role
+        FROM discipline_upload s
+        LEFT JOIN users u ON u.id = s.teacher_id
+        ORDER BY s.row_number
+    """)
+    for row_number, discipline_name, teacher_email, role in cursor.fetchall():
+        if role != 'CADRU_DIDACTIC':
+            result['report'].append({
+                'row': row_number,
+                'status': 'rejected',
+                'errors': [f"{teacher_email} belongs to a {role} account, not a teacher"]
+            })
+            continue
+        entry = {'row': row_number, 'status': 'imported'}
+        if discipline_name in new_disciplines:
+            entry['discipline_created'] = True
+        if teacher_email in new_teachers:
+            entry['teacher_created'] = True
+        result['report'].append(entry)
+
+    cursor.execute("TRUNCATE discipline_upload")
+
+    result['disciplines_added'] = len(new_disciplines)
+    result['users_added'] = len(new_teachers)
+    return result
+
+
+def validate_student_row(row_number, item):
+    """
+    Normalize one uploaded roster row.
+    Returns (row, errors) where row is (row_number, email, full_name, student_group, year_of_study).
+    A missing name is derived from the email address.
+    """
+    email = str(item.get('Email') or '').strip().lower()
+    full_name = str(item.get('Name') or '').strip()
+    student_group = str(item.get('Group') or '').strip()
+    year = item.get('Year')
+
+    errors = []
+    if not email:
+        errors.append("Missing 'Email'")
+    elif not EMAIL_PATTERN.match(email) or len(email) > 255:
+        errors.append(f"Invalid email: {email}")
+    if not full_name and email:
+        full_name = email.split('@')[0].replace('.', ' ').replace('_', ' ').title()
+    if len(full_name) > 255:
+        errors.append("'Name' is longer than 255 characters")
+    if not student_group:
+        errors.append("Missing 'Group'")
+    elif len(student_group) > 50:
+        errors.append("'Group' is longer than 50 characters")
+    try:
+        # xlsx cells may come back as 2.0
+        year_of_study = int(float(str(year).strip()))
+        if not 1 <= year_of_study <= 6:
+            raise ValueError
+    except (TypeError, ValueError):
+        errors.append(f"Invalid 'Year': {year}")
+
+    if errors:
+        return None, errors
+    return (row_number, email, full_name, student_group, year_of_study), []
+
+
+def _roster_copy_chunks(rows, stats):
+    """
+    Validate roster rows lazily and encode the good ones as CSV chunks for COPY.
+    Invalid rows are counted in `stats` instead of being sent.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator='\n')
+    for row_number, item in rows:
+        stats['rows_processed'] += 1
+        row, errors = validate_student_row(row_number, item)
+        if errors:
+            stats['rows_invalid'] += 1
+            if len(stats['errors']) < MAX_REPORTED_ERRORS:
+                stats['errors'].append({'row': row_number, 'errors': errors})
+            continue
+        writer.writerow(row)
+        if buffer.tell() >= COPY_CHUNK_SIZE:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def import_student_roster(cursor, rows):
+    """
+    Bulk load a student roster and merge it into users in one statement.
+    `rows` is an iterable of (row_number, dict) pairs as yielded by iter_upload_rows;
+    rows are validated while COPY consumes them, so the file is never held in memory.
+    New students get an IMPORTED_ID_PREFIX id; existing students and group leaders
+    have their group and year updated; emails owned by other roles are skipped.
+    The last row wins when an email appears more than once.
+    Runs inside the caller's transaction; the caller commits.
+    """
+    stats = {
+        'rows_processed': 0,
+        'rows_invalid': 0,
+        'students_created': 0,
+        'students_updated': 0,
+        'rows_skipped': 0,
+        'errors': [],
+    }
+
+    cursor.execute("""
+        CREATE TEMP TABLE IF NOT EXISTS roster_upload (
+            row_number INTEGER,
+            email TEXT,
+            full_name TEXT,
+            student_group TEXT,
+            year_of_study INTEGER
+        ) ON COMMIT DROP
+    """)
+    cursor.execute(
+        "COPY roster_upload FROM STDIN WITH (FORMAT csv)",
+        stream=_roster_copy_chunks(rows, stats)
+    )
+
+    cursor.execute("SELECT COUNT(DISTINCT email) FROM roster_upload")
+    distinct_emails = cursor.fetchone()[0]
+
+    # Roster emails are lowercased but users.email keeps the case it was
+    # stored with, so existing accounts are matched on lower(email)
+    cursor.execute("""
+        WITH roster AS (
+            SELECT DISTINCT ON (email) *
+            FROM roster_upload
+            ORDER BY email, row_number DESC
+        ), updated AS (
+            UPDATE users u
+            SET student_group = r.student_group,
+                year_of_study = r.year_of_study
+            FROM roster r
+            WHERE lower(u.email) = r.email AND u.role IN ('STUDENT', 'SEF_GRUPA')
+            RETURNING r.email
+        ), created AS (
+            INSERT INTO users (id, full_name, email, role, student_group, year_of_study)
+            SELECT %s || gen_random_uuid()::text, r.full_name, r.email, 'STUDENT', r.student_group, r.year_of_study
+            FROM roster r
+            WHERE NOT EXISTS (SELECT 1 FROM users u WHERE lower(u.email) = r.email)
+            ON CONFLICT (email) DO NOTHING
+            RETURNING email
+        )
+        SELECT (SELECT COUNT(*) FROM created), (SELECT COUNT(DISTINCT email) FROM updated)
+    """, (IMPORTED_ID_PREFIX,))
+    created, updated = cursor.fetchone()
+
+    cursor.execute("TRUNCATE roster_upload")
+
+    stats['students_created'] = created
+    stats['students_updated'] = updated
+    stats['rows_skipped'] = distinct_emails - created - updated
+    return stats
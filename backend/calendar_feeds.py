@@ -0,0 +1,240 @@
+"""
+iCalendar (.ics) feeds for the exam scheduling system.
+Students and group leaders subscribe to their group's feed, teachers to their own.
+Feeds are reached through signed URLs so calendar clients can poll them without a JWT.
+These endpoints will be imported into the main app.py file.
+"""
+
+import datetime
+import hashlib
+import threading
+from collections import OrderedDict
+
+import pytz
+from flask import jsonify, request, g, current_app, url_for
+from itsdangerous import URLSafeSerializer, BadSignature
+from database import get_db_connection
+from student_endpoints import STUDENT_EXAMS_QUERY, STUDENT_EXAMS_LISTING
+from cd_endpoints import TEACHER_EXAMS_QUERY, TEACHER_EXAMS_LISTING, TEACHER_SCOPE_CONDITION
+from compression import Precompressed
+from conditional import GROUP_LAST_DELETE_SQL
+
+# Import DB_AVAILABLE from app.py when this module is imported
+DB_AVAILABLE = None
+
+FEED_TOKEN_SALT = 'exam-calendar-feed'
+FEED_TIMEZONE = pytz.timezone('Europe/Bucharest')
+FEED_REFRESH_INTERVAL = 'PT1H'
+
+GROUP_ROLES = ['STUDENT', 'SEF_GRUPA', 'SG']
+TEACHER_ROLES = ['CADRU_DIDACTIC', 'CD']
+
+# Exam status -> VEVENT STATUS
+EVENT_STATUS = {
+    'CONFIRMED': 'CONFIRMED',
+    'REJECTED': 'CANCELLED',
+    'CANCELLED': 'CANCELLED',
+}
+
+# Cheap per-scope schedule version: changes whenever an exam in scope is
+# inserted, updated or deleted, and, through the xmin checksum of the joined
+# rows, when its discipline, room or teachers are renamed.
+GROUP_VERSION_QUERY = STUDENT_EXAMS_LISTING.version_sql(
+    STUDENT_EXAMS_LISTING.shape(), f"GREATEST(max(e.updated_at), {GROUP_LAST_DELETE_SQL})"
+) + "WHERE e.student_group = %s"
+TEACHER_VERSION_QUERY = TEACHER_EXAMS_LISTING.version_sql(
+    TEACHER_EXAMS_LISTING.shape(), "max(e.updated_at)"
+) + f"WHERE {TEACHER_SCOPE_CONDITION}"
+
+# Feeds kept in memory; the least recently served is evicted past this
+MAX_CACHED_FEEDS = 512
+
+# (scope, owner) -> (etag, Precompressed ics body), least recently used first
+_feed_cache = OrderedDict()
+_feed_cache_lock = threading.Lock()
+
+
+def _serializer():
+    return URLSafeSerializer(current_app.config['SECRET_KEY'], salt=FEED_TOKEN_SALT)
+
+
+def make_feed_token(scope, owner):
+    """Sign a feed scope ('group' or 'teacher') and its owner into a URL-safe token"""
+    return _serializer().dumps([scope, owner])
+
+
+def _load_feed_token(token):
+    try:
+        scope, owner = _serializer().loads(token)
+    except (BadSignature, ValueError, TypeError):
+        return None
+    if scope not in ('group', 'teacher') or not owner:
+        return None
+    return scope, owner
+
+
+def _schedule_etag(cursor, scope, owner):
+    if scope == 'group':
+        cursor.execute(GROUP_VERSION_QUERY, (owner, owner))
+    else:
+        cursor.execute(TEACHER_VERSION_QUERY, (owner, owner))
+    count, last_update, checksum = cursor.fetchone()
+    version = f"{scope}:{owner}:{count}:{last_update.isoformat() if last_update else ''}:{checksum}"
+    return hashlib.sha1(version.encode('utf-8')).hexdigest()
+
+
+def _escape(text):
+    return (str(text).replace('\\', '\\\\').replace(';', '\\;')
+            .replace(',', '\\,').replace('\n', '\\n'))
+
+
+def _fold(line):
+    """Fold a content line to 75 octets as required by RFC 5545"""
+    encoded = line.encode('utf-8')
+    if len(encoded) <= 75:
+        return line
+    parts = []
+    limit = 75
+    while encoded:
+        cut = min(limit, len(encoded))
+        # Never split a multi-byte UTF-8 sequence
+        while cut < len(encoded) and (encoded[cut] & 0xC0) == 0x80:
+            cut -= 1
+        parts.append(encoded[:cut].decode('utf-8'))
+        encoded = encoded[cut:]
+        limit = 74  # continuation lines start with a space
+    return '\r\n '.join(parts)
+
+
+def _format_utc(dt):
+    return dt.astimezone(pytz.utc).strftime('%Y%m%dT%H%M%SZ')
+
+
+def _build_calendar(calendar_name, columns, rows):
+    stamp = _format_utc(datetime.datetime.now(pytz.utc))
+    lines = [
+        'BEGIN:VCALENDAR',
+        'VERSION:2.0',
+        'PRODID:-//FIESC//Exam Scheduler//RO',
+        'CALSCALE:GREGORIAN',
+        'METHOD:PUBLISH',
+        f'X-WR-CALNAME:{_escape(calendar_name)}',
+        'X-WR-TIMEZONE:Europe/Bucharest',
+        f'REFRESH-INTERVAL;VALUE=DURATION:{FEED_REFRESH_INTERVAL}',
+        f'X-PUBLISHED-TTL:{FEED_REFRESH_INTERVAL}',
+    ]
+    for row in rows:
+        exam = dict(zip(columns, row))
+        if not exam.get('exam_date') or exam['status'] == 'DRAFT':
+            continue
+
+        start_day = exam['exam_date']
+        if isinstance(start_day, datetime.datetime):
+            start_day = start_day.date()
+        start = FEED_TIMEZONE.localize(
+            datetime.datetime.combine(start_day, datetime.time(exam.get('start_hour') or 8))
+        )
+        end = start + datetime.timedelta(minutes=exam.get('duration') or 120)
+
+        teachers = [t for t in (exam.get('main_teacher'), exam.get('second_teacher')) if t]
+        description = f"Tip: {exam['exam_type']}\nStatus: {exam['status']}"
+        if exam.get('student_group'):
+            description += f"\nGrupă: {exam['student_group']}"
+        if teachers:
+            description += f"\nProfesori: {', '.join(teachers)}"
+
+        lines.extend([
+            'BEGIN:VEVENT',
+            f"UID:exam-{exam['id']}@fiesc-exam-scheduler",
+            f'DTSTAMP:{stamp}',
+            f'DTSTART:{_format_utc(start)}',
+            f'DTEND:{_format_utc(end)}',
+            f"SUMMARY:{_escape(exam['discipline_name'])} ({exam['exam_type']})",
+            f"STATUS:{EVENT_STATUS.get(exam['status'], 'TENTATIVE')}",
+            f'DESCRIPTION:{_escape(description)}',
+        ])
+        if exam.get('room_name'):
+            lines.append(f"LOCATION:{_escape(exam['room_name'])}")
+        lines.append('END:VEVENT')
+    lines.append('END:VCALENDAR')
+    return ('\r\n'.join(_fold(line) for line in lines) + '\r\n').encode('utf-8')
+
+
+def _feed_response(feed, etag):
+    return feed.response('text/calendar', {
+        'ETag': f'W/"{etag}"',
+        'Cache-Control': 'private, max-age=300',
+    })
+
+
+def get_feed_url():
+    """Return the subscribable .ics URL for the current user's group or teacher schedule"""
+    role = g.current_user.get('role')
+    if role in GROUP_ROLES:
+        owner = g.current_user.get('student_group')
+        if not owner:
+            return jsonify({"error": "Student group not set for this user"}), 400
+        scope = 'group'
+    elif role in TEACHER_ROLES:
+        owner = g.current_user.get('id')
+        scope = 'teacher'
+    else:
+        return jsonify({"error": "Calendar feeds are available to students and teachers only"}), 403
+
+    token = make_feed_token(scope, owner)
+    return jsonify({
+        "scope": scope,
+        "url": url_for('route_get_calendar_feed', token=token, _external=True)
+    }), 200
+
+
+def get_calendar_feed(token):
+    """Serve a cached .ics feed, answering 304 while the schedule version is unchanged"""
+    if not DB_AVAILABLE:
+        return jsonify({"error": "Database not available"}), 500
+
+    feed = _load_feed_token(token)
+    if not feed:
+        return jsonify({"error": "Invalid calendar feed link"}), 404
+    scope, owner = feed
+
+    conn = None
+    try:
+        conn = get_db_connection()
+        cursor = conn.cursor()
+
+        etag = _schedule_etag(cursor, scope, owner)
+        # The gzip, br and identity bodies share this ETag, so it is weak
+        if request.if_none_match.contains_weak(etag):
+            return '', 304, {'ETag': f'W/"{etag}"', 'Cache-Control': 'private, max-age=300'}
+
+        with _feed_cache_lock:
+            cached = _feed_cache.get((scope, owner))
+            if cached:
+                _feed_cache.move_to_end((scope, owner))
+        if cached and cached[0] == etag:
+            return _feed_response(cached[1], etag)
+
+        if scope == 'group':
+            cursor.execute(STUDENT_EXAMS_QUERY, (owner,))
+            calendar_name = f"Examene {owner}"
+        else:
+            cursor.execute(TEACHER_EXAMS_QUERY, (owner, owner, owner, owner))
+            calendar_name = "Examene - cadru didactic"
+        columns = [desc[0] for desc in cursor.description]
+        feed = Precompressed(_build_calendar(calendar_name, columns, cursor.fetchall()))
+
+        with _feed_cache_lock:
+            _feed_cache[(scope, owner)] = (etag, feed)
+            _feed_cache.move_to_end((scope, owner))
+            while len(_feed_cache) > MAX_CACHED_FEEDS:
+                _feed_cache.popitem(last=False)
+
+        return _feed_response(feed, etag)
+    except Exception as e:
+        print(f"Error building calendar feed: {e}")
+        return jsonify({"error": "An internal error occurred"}), 500
+    finally:
+        if conn:
+            cursor.close()
+            conn.close()
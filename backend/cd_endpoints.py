@@ -6,9 +6,41 @@ These endpoints will be imported into the main app.py file.
 from flask import jsonify, request, g
 from database import get_db_connection
 from auth import token_required, cd_required
+from exam_transitions import apply_transition, apply_transition_bulk
+from pagination import parse_page, listing_response, key_columns, PaginationError, EXAM_LISTING_KEYSET
+from fieldsets import Listing, Field, FieldsError, EXAM_JOINS
+import exam_filters
 # Import DB_AVAILABLE from app.py when this module is imported
 DB_AVAILABLE = None
 
+# Columns of a teacher's exam listing; ?fields= selects a subset and skips unused joins
+TEACHER_EXAMS_LISTING = Listing('teacher_exams', "FROM exams e", EXAM_JOINS, {
+    'id': Field("e.id"),
+    'discipline_name': Field("d.name as discipline_name", ('d',)),
+    'exam_type': Field("e.exam_type"),
+    'student_group': Field("e.student_group"),
+    'status': Field("e.status"),
+    'exam_date': Field("e.exam_date"),
+    'start_hour': Field("e.start_hour"),
+    'duration': Field("e.duration"),
+    'room_name': Field("r.name as room_name", ('r',)),
+    'main_teacher': Field("u1.full_name as main_teacher", ('u1',)),
+    'second_teacher': Field("u2.full_name as second_teacher", ('u2',)),
+    'teacher_role': Field(
+        "CASE WHEN e.main_teacher_id = %s THEN 'MAIN' WHEN e.second_teacher_id = %s THEN 'SECOND' ELSE 'UNKNOWN' END as teacher_role",
+        params=('teacher_id', 'teacher_id')
+    ),
+})
+
+# Exams where the teacher is main or secondary teacher. Takes the teacher id
+# four times. Shared with the iCalendar feeds so both views always agree.
+TEACHER_EXAMS_SELECT = TEACHER_EXAMS_LISTING.shape().select_sql
+TEACHER_SCOPE_CONDITION = "(e.main_teacher_id = %s OR e.second_teacher_id = %s)"
+TEACHER_EXAMS_QUERY = TEACHER_EXAMS_SELECT + f"""
+    WHERE {TEACHER_SCOPE_CONDITION}
+    ORDER BY e.status, e.exam_date, e.start_hour
+"""
+
 # --- CD Role Endpoints ---
 
 @cd_required
@@ -22,58 +54,29 @@ def get_teacher_exams():
     teacher_id = g.current_user.get('id')
     if not teacher_id:
         return jsonify({"error": "Teacher ID not found"}), 400
-        
-    conn = None
+
+    try:
+        conditions, params = exam_filters.parse_filters(request.args)
+        keyset = exam_filters.parse_sort(request.args, 'teacher_exams', EXAM_LISTING_KEYSET)
+        page = parse_page(request.args, keyset)
+        fields = TEACHER_EXAMS_LISTING.parse_fields(request.args, key_columns(keyset) if page else ())
+    except (exam_filters.FilterError, PaginationError, FieldsError) as e:
+        return jsonify({"error": str(e)}), 400
+
     try:
         conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        query = """
-            SELECT 
-                e.id,
-                d.name as discipline_name,
-                e.exam_type,
-                e.student_group,
-                e.status,
-                e.exam_date,
-                e.start_hour,
-                e.duration,
-                r.name as room_name,
-                u1.full_name as main_teacher,
-                u2.full_name as second_teacher,
-                CASE 
-                    WHEN e.main_teacher_id = %s THEN 'MAIN'
-                    WHEN e.second_teacher_id = %s THEN 'SECOND'
-                    ELSE 'UNKNOWN'
-                END as teacher_role
-            FROM exams e
-            JOIN disciplines d ON e.discipline_id = d.id
-            LEFT JOIN rooms r ON e.room_id = r.id
-            JOIN users u1 ON e.main_teacher_id = u1.id
-            JOIN users u2 ON e.second_teacher_id = u2.id
-            WHERE e.main_teacher_id = %s OR e.second_teacher_id = %s
-            ORDER BY e.status, e.exam_date, e.start_hour
-        """
-        cursor.execute(query, (teacher_id, teacher_id, teacher_id, teacher_id))
-        exams = cursor.fetchall()
-        columns = [desc[0] for desc in cursor.description]
-        exams_dict = [dict(zip(columns, row)) for row in exams]
-        
-        for exam in exams_dict:
-            if exam.get('exam_date'):
-                try:
-                    exam['exam_date'] = exam['exam_date'].isoformat()
-                except ValueError:
-                    exam['exam_date'] = None
-        
-        return jsonify(exams_dict), 200
+        shape = TEACHER_EXAMS_LISTING.shape(fields, exam_filters.filter_joins(request.args))
+        bind = {'teacher_id': teacher_id}
+        # Select-list values first (teacher_role), then the scope and the filters
+        return listing_response(
+            conn, shape.select_sql, keyset, page,
+            [TEACHER_SCOPE_CONDITION] + list(shape.conditions) + conditions,
+            [bind[name] for name in shape.param_names] + [teacher_id, teacher_id] + params,
+            name='teacher_exams'
+        )
     except Exception as e:
         print(f"Error fetching exams for teacher: {e}")
         return jsonify({"error": "An internal error occurred"}), 500
-    finally:
-        if conn:
-            cursor.close()
-            conn.close()
 
 @cd_required
 def review_exam_proposal(exam_id):
@@ -83,7 +86,6 @@ def review_exam_proposal(exam_id):
     if not DB_AVAILABLE:
         return jsonify({"error": "Database not available"}), 500
         
-    teacher_id = g.current_user.get('id')
     data = request.get_json()
     action = data.get('action')
     
@@ -93,79 +95,44 @@ def review_exam_proposal(exam_id):
     if action not in ['ACCEPT', 'REJECT', 'ALTERNATE', 'CANCEL']:
         return jsonify({"error": "Invalid action. Must be 'ACCEPT', 'REJECT', 'ALTERNATE', or 'CANCEL'"}), 400
         
+    fields = None
+    if action == 'ALTERNATE':
+        # For alternate proposal, additional data is required
+        alt_date = data.get('alternate_date')
+        alt_hour = data.get('alternate_hour')
+
+        if not all([alt_date, alt_hour]):
+            return jsonify({"error": "Alternate date and hour are required for ALTERNATE action"}), 400
+
+        # Validate alternate hour
+        if not (8 <= int(alt_hour) <= 18):
+            return jsonify({"error": "Alternate hour must be between 8 and 18"}), 400
+        fields = {'exam_date': alt_date, 'start_hour': alt_hour}
+
     conn = None
     try:
         conn = get_db_connection()
         cursor = conn.cursor()
-        
-        # Check if exam exists and teacher is assigned to it
-        cursor.execute(
-            """SELECT status FROM exams 
-            WHERE id = %s AND (main_teacher_id = %s OR second_teacher_id = %s)""",
-            (exam_id, teacher_id, teacher_id)
-        )
-        exam = cursor.fetchone()
-        if not exam:
-            return jsonify({"error": "Exam not found or you are not assigned to this exam"}), 404
-            
-        # Check if exam is in a state that can be reviewed
-        status = exam[0]
-        if status != 'PROPOSED':
-            return jsonify({"error": f"Cannot review exam in {status} status"}), 400
-            
-        new_status = ''
-        if action == 'ACCEPT':
-            new_status = 'ACCEPTED'
-        elif action == 'REJECT':
-            new_status = 'REJECTED'
-        elif action == 'CANCEL':
-            new_status = 'CANCELLED'
-        elif action == 'ALTERNATE':
-            # For alternate proposal, additional data is required
-            alt_date = data.get('alternate_date')
-            alt_hour = data.get('alternate_hour')
-            
-            if not all([alt_date, alt_hour]):
-                return jsonify({"error": "Alternate date and hour are required for ALTERNATE action"}), 400
-                
-            # Validate alternate hour
-            if not (8 <= int(alt_hour) <= 18):
-                return jsonify({"error": "Alternate hour must be between 8 and 18"}), 400
-                
-            # Update with alternate proposal
-            cursor.execute(
-                """
-                UPDATE exams 
-                SET status = 'REJECTED', exam_date = %s, start_hour = %s, updated_at = CURRENT_TIMESTAMP 
-                WHERE id = %s
-                """,
-                (alt_date, alt_hour, exam_id)
-            )
-            conn.commit()
-            
+
+        # Status check, assignment check and update in one statement
+        exam, error = apply_transition(cursor, exam_id, action, g.current_user, fields=fields)
+        if error:
+            code, message, status = error
+            return jsonify({"error": message, "code": code}), status
+        conn.commit()
+
+        if action == 'ALTERNATE':
             return jsonify({
                 "message": "Alternate exam schedule proposed",
                 "exam_id": exam_id,
                 "alternate_date": alt_date,
                 "alternate_hour": alt_hour
             }), 200
-        
-        # For other actions, just update the status
-        if action != 'ALTERNATE':
-            cursor.execute(
-                """
-                UPDATE exams 
-                SET status = %s, updated_at = CURRENT_TIMESTAMP 
-                WHERE id = %s
-                """,
-                (new_status, exam_id)
-            )
-            conn.commit()
-        
+
         return jsonify({
             "message": f"Exam {action.lower()}ed successfully",
             "exam_id": exam_id,
-            "new_status": new_status
+            "new_status": exam['status']
         }), 200
     except Exception as e:
         if conn:
@@ -185,39 +152,17 @@ def confirm_exam(exam_id):
     if not DB_AVAILABLE:
         return jsonify({"error": "Database not available"}), 500
         
-    teacher_id = g.current_user.get('id')
-    
     conn = None
     try:
         conn = get_db_connection()
         cursor = conn.cursor()
-        
-        # Check if exam exists and teacher is assigned to it
-        cursor.execute(
-            """SELECT status FROM exams 
-            WHERE id = %s AND (main_teacher_id = %s OR second_teacher_id = %s)""",
-            (exam_id, teacher_id, teacher_id)
-        )
-        exam = cursor.fetchone()
-        if not exam:
-            return jsonify({"error": "Exam not found or you are not assigned to this exam"}), 404
-            
-        # Check if exam is in a state that can be confirmed
-        status = exam[0]
-        if status != 'ACCEPTED':
-            return jsonify({"error": f"Cannot confirm exam in {status} status"}), 400
-            
-        # Update the status to CONFIRMED
-        cursor.execute(
-            """
-            UPDATE exams 
-            SET status = 'CONFIRMED', updated_at = CURRENT_TIMESTAMP 
-            WHERE id = %s
-            """,
-            (exam_id,)
-        )
+
+        exam, error = apply_transition(cursor, exam_id, 'CONFIRM', g.current_user)
+        if error:
+            code, message, status = error
+            return jsonify({"error": message, "code": code}), status
         conn.commit()
-        
+
         return jsonify({
             "message": "Exam confirmed successfully",
             "exam_id": exam_id
@@ -231,3 +176,74 @@ def confirm_exam(exam_id):
         if conn:
             cursor.close()
             conn.close()
+
+# Actions accepted by the bulk endpoint; ALTERNATE needs per-exam data
+BULK_ACTIONS = ['ACCEPT', 'REJECT', 'CANCEL', 'CONFIRM']
+
+@cd_required
+def bulk_review_exams():
+    """
+    Teacher reviews or confirms many exams at once.
+    Body: {"items": [{"exam_id": 1, "action": "ACCEPT"}, ...]}. Each action is
+    applied with one UPDATE for all its exams, inside a single transaction;
+    the response carries an outcome per exam.
+    """
+    if not DB_AVAILABLE:
+        return jsonify({"error": "Database not available"}), 500
+
+    data = request.get_json(silent=True) or {}
+    items = data.get('items')
+    if not isinstance(items, list) or not items:
+        return jsonify({"error": "'items' must be a non-empty list"}), 400
+
+    results = []
+    ids_by_action = {}
+    seen = set()
+    for item in items:
+        if not isinstance(item, dict):
+            return jsonify({"error": "Each item must be an object with exam_id and action"}), 400
+        action = item.get('action')
+        try:
+            exam_id = int(item.get('exam_id'))
+        except (TypeError, ValueError):
+            return jsonify({"error": "Each item needs a numeric exam_id"}), 400
+        if action not in BULK_ACTIONS:
+            return jsonify({"error": f"Invalid action. Must be one of: {', '.join(BULK_ACTIONS)}"}), 400
+        if exam_id in seen:
+            results.append({"exam_id": exam_id, "action": action, "code": "DUPLICATE_IN_REQUEST",
+                            "error": "Exam appears more than once in the request"})
+            continue
+        seen.add(exam_id)
+        ids_by_action.setdefault(action, []).append(exam_id)
+
+    conn = None
+    try:
+        conn = get_db_connection()
+        cursor = conn.cursor()
+
+        for action, exam_ids in ids_by_action.items():
+            outcomes = apply_transition_bulk(cursor, exam_ids, action, g.current_user)
+            for exam_id in exam_ids:
+                new_status, error = outcomes[exam_id]
+                if error:
+                    code, message, _ = error
+                    results.append({"exam_id": exam_id, "action": action, "code": code, "error": message})
+                else:
+                    results.append({"exam_id": exam_id, "action": action, "new_status": new_status})
+        conn.commit()
+
+        succeeded = sum(1 for r in results if 'new_status' in r)
+        return jsonify({
+            "succeeded": succeeded,
+            "failed": len(results) - succeeded,
+            "results": results
+        }), 200
+    except Exception as e:
+        if conn:
+            conn.rollback()
+        print(f"Error in bulk exam review: {e}")
+        return jsonify({"error": "An internal error occurred"}), 500
+    finally:
+        if conn:
+            cursor.close()
+            conn.close()
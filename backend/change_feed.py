@@ -0,0 +1,239 @@
+"""
+Exam change feed: GET /api/exams/changes?since=<cursor>
+Dashboards poll this instead of re-fetching whole exam lists. It returns the
+exams whose updated_at moved past the cursor, the ids of exams deleted since
+then (from the exam_tombstones table written by admin_endpoints.delete_exam)
+and the cursor for the next poll. Results are scoped to the caller's role
+like the listings: a group's exams, a teacher's own exams, or everything.
+Without ?since= the feed starts from the beginning, so a client can also
+bootstrap from it page by page.
+These endpoints will be imported into the main app.py file.
+"""
+
+from collections import namedtuple
+from datetime import datetime
+
+from flask import jsonify, request, g
+from database import get_db_connection
+from fieldsets import Listing, Field, Join, EXAM_JOINS, FieldsError
+from pagination import KeyColumn, Keyset, PaginationError, encode_cursor, decode_cursor, MAX_PAGE_SIZE
+from serialization import encoder_for
+import exam_filters
+from exam_transitions import NOTIFY_TIMESTAMP_FORMAT
+
+# Import DB_AVAILABLE from app.py when this module is imported
+DB_AVAILABLE = None
+
+CHANGES_PAGE_SIZE = 500
+
+# updated_at is the writing transaction's start time, so a slow transaction
+# can commit rows older than a cursor already handed out. The cursor never
+# moves closer than this to the database clock; the last few seconds of
+# changes are sent again on the next poll, which clients apply idempotently.
+CHANGE_FEED_LAG_SECONDS = 30
+
+# Tombstones older than this are pruned; older cursors get 410 Gone and the
+# client has to reload its full list
+TOMBSTONE_RETENTION_DAYS = 30
+
+# Position in the feed: (changed_at, exam_id); indexes are in init_db.py
+CHANGES_KEYSET = Keyset('exam_changes', (
+    KeyColumn('changed_at', 'changed_at', 'timestamptz'),
+    KeyColumn('exam_id', 'exam_id', 'int'),
+))
+
+# Run by admin_endpoints.delete_exam with (exam_id, EXAM_CHANGES_CHANNEL): the
+# delete, its tombstone and the notification for exam_events.py happen in one
+# statement, so a deleted exam always leaves a tombstone with its scope columns
+DELETE_EXAM_QUERY = f"""
+    WITH deleted AS (
+        DELETE FROM exams WHERE id = %s
+        RETURNING id, student_group, main_teacher_id, second_teacher_id
+    ), tombstones AS (
+        INSERT INTO exam_tombstones (exam_id, student_group, main_teacher_id, second_teacher_id)
+        SELECT id, student_group, main_teacher_id, second_teacher_id FROM deleted
+        RETURNING *
+    )
+    SELECT pg_notify(%s, json_build_object(
+        'id', exam_id, 'deleted', TRUE, 'student_group', student_group,
+        'main_teacher_id', main_teacher_id, 'second_teacher_id', second_teacher_id,
+        'deleted_at', to_char(deleted_at AT TIME ZONE 'UTC', '{NOTIFY_TIMESTAMP_FORMAT}')
+    )::text)
+    FROM tombstones
+"""
+PRUNE_TOMBSTONES_QUERY = """
+    DELETE FROM exam_tombstones
+    WHERE deleted_at < CURRENT_TIMESTAMP - make_interval(days => %s)
+"""
+
+# Every join is LEFT: an exam missing a teacher or room must still show up as changed
+CHANGED_EXAMS_LISTING = Listing(
+    'exam_changes', "FROM exams e",
+    {alias: Join(join.sql if join.sql.startswith('LEFT') else 'LEFT ' + join.sql)
+     for alias, join in EXAM_JOINS.items()},
+    {
+        'id': Field("e.id"),
+        'discipline_id': Field("e.discipline_id"),
+        'discipline_name': Field("d.name as discipline_name", ('d',)),
+        'exam_type': Field("e.exam_type"),
+        'student_group': Field("e.student_group"),
+        'status': Field("e.status"),
+        'exam_date': Field("e.exam_date"),
+        'start_hour': Field("e.start_hour"),
+        'duration': Field("e.duration"),
+        'room_id': Field("e.room_id"),
+        'room_name': Field("r.name as room_name", ('r',)),
+        'main_teacher_id': Field("e.main_teacher_id"),
+        'main_teacher_name': Field("u1.full_name as main_teacher_name", ('u1',)),
+        'second_teacher_id': Field("e.second_teacher_id"),
+        'second_teacher_name': Field("u2.full_name as second_teacher_name", ('u2',)),
+        'created_at': Field("e.created_at"),
+        'updated_at': Field("e.updated_at"),
+    }
+)
+
+# Both sources are read in (timestamp, id) order, so the planner can merge
+# two index scans; {scope} is exam_filters.scope_condition over alias e
+CHANGES_QUERY = """
+    SELECT changed_at, exam_id, deleted FROM (
+        SELECT e.updated_at AS changed_at, e.id AS exam_id, FALSE AS deleted
+        FROM exams e
+        WHERE {scope} AND (e.updated_at, e.id) > (%s::timestamptz, %s::int)
+        UNION ALL
+        SELECT e.deleted_at, e.exam_id, TRUE
+        FROM exam_tombstones e
+        WHERE {scope} AND (e.deleted_at, e.exam_id) > (%s::timestamptz, %s::int)
+    ) changes
+    ORDER BY changed_at, exam_id
+    LIMIT %s
+"""
+
+
+def parse_since(token):
+    """(changed_at, exam_id) of a ?since= cursor, or None for the start of the feed"""
+    if not token:
+        return None
+    changed_at, exam_id = decode_cursor(CHANGES_KEYSET, token)
+    try:
+        return datetime.fromisoformat(changed_at), int(exam_id)
+    except (TypeError, ValueError):
+        raise PaginationError("Invalid cursor")
+
+
+def _parse_limit(args):
+    limit = args.get('limit')
+    if limit is None:
+        return CHANGES_PAGE_SIZE
+    try:
+        limit = int(limit)
+    except ValueError:
+        raise PaginationError("limit must be an integer")
+    if not 1 <= limit <= MAX_PAGE_SIZE:
+        raise PaginationError(f"limit must be between 1 and {MAX_PAGE_SIZE}")
+    return limit
+
+
+def _next_position(since, last, horizon, has_more):
+    """
+    Where the next poll starts: after the last change returned, but on the
+    final page no later than `horizon` (now minus the lag) and never behind
+    `since`.
+    """
+    if last is None:
+        return since or horizon
+    if has_more:
+        return last
+    position = min(last, horizon)
+    return max(position, since) if since else position
+
+
+class CursorExpired(Exception):
+    """The cursor is older than the tombstone retention; the client must reload"""
+
+
+# events: (changed_at, exam_id, deleted) in feed order; exams: id -> row dict
+# of the changed (not deleted) exams; horizon: the lag bound of this read
+Changes = namedtuple('Changes', ['events', 'exams', 'has_more', 'horizon'])
+
+
+def read_changes(cursor, user, since, limit, fields=None):
+    """
+    Changes visible to `user` after `since` ((changed_at, exam_id) or None
+    for the start of the feed), at most `limit` of them. Raises CursorExpired.
+    """
+    cursor.execute("""
+        SELECT CURRENT_TIMESTAMP - make_interval(secs => %s),
+               CURRENT_TIMESTAMP - make_interval(days => %s)
+    """, (CHANGE_FEED_LAG_SECONDS, TOMBSTONE_RETENTION_DAYS))
+    horizon, retained_from = cursor.fetchone()
+    if since and since[0] < retained_from:
+        raise CursorExpired()
+
+    scope_sql, scope_params = exam_filters.scope_condition(user)
+    after = list(since) if since else ['-infinity', 0]
+    cursor.execute(
+        CHANGES_QUERY.format(scope=scope_sql),
+        scope_params + after + scope_params + after + [limit + 1]
+    )
+    events = cursor.fetchall()
+    has_more = len(events) > limit
+    events = events[:limit]
+
+    exams = {}
+    changed_ids = [exam_id for _, exam_id, deleted in events if not deleted]
+    if changed_ids:
+        shape = CHANGED_EXAMS_LISTING.shape(fields)
+        conditions = list(shape.conditions) + ["e.id = ANY(%s::int[])"]
+        cursor.execute(shape.select_sql + " WHERE " + " AND ".join(conditions), [changed_ids])
+        exams = {exam['id']: exam for exam in encoder_for(cursor.description).rows(cursor.fetchall())}
+    return Changes(events, exams, has_more, horizon)
+
+
+def position_token(position):
+    """Feed cursor for a (changed_at, exam_id) position"""
+    return encode_cursor(CHANGES_KEYSET, [position[0].isoformat(), position[1]])
+
+
+def get_exam_changes():
+    """Exams changed and deleted since ?since=, scoped to the caller's role"""
+    if not DB_AVAILABLE:
+        return jsonify({"error": "Database not available"}), 500
+
+    try:
+        since = parse_since(request.args.get('since'))
+        limit = _parse_limit(request.args)
+        fields = CHANGED_EXAMS_LISTING.parse_fields(request.args, ('id', 'updated_at'))
+    except (PaginationError, FieldsError) as e:
+        return jsonify({"error": str(e)}), 400
+
+    conn = None
+    try:
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        try:
+            changes = read_changes(cursor, g.current_user, since, limit, fields)
+        except CursorExpired:
+            return jsonify({
+                "error": "Cursor expired; reload the full exam list",
+                "code": "CURSOR_EXPIRED"
+            }), 410
+
+        exams = [changes.exams[exam_id] for _, exam_id, deleted in changes.events
+                 if not deleted and exam_id in changes.exams]
+        deleted_ids = [exam_id for _, exam_id, deleted in changes.events if deleted]
+        last = tuple(changes.events[-1][:2]) if changes.events else None
+        position = _next_position(since, last, (changes.horizon, 0), changes.has_more)
+
+        return jsonify({
+            "exams": exams,
+            "deleted": deleted_ids,
+            "next_cursor": position_token(position),
+            "has_more": changes.has_more
+        }), 200
+
+    except Exception as e:
+        print(f"Error fetching exam changes: {e}")
+        return jsonify({"error": "An internal error occurred"}), 500
+    finally:
+        if conn:
+            conn.close()
@@ -0,0 +1,167 @@
+"""
+Negotiated response compression (brotli or gzip, per Accept-Encoding).
+init_app registers an after_request hook that compresses JSON, CSV, NDJSON
+and calendar bodies of at least MIN_SIZE bytes. Streamed responses (large
+listings, CSV exports, import progress) are compressed chunk by chunk and
+flushed after every chunk, so the client still receives each chunk as soon
+as the server produces it. Event streams are left alone: a compressor per
+open stream would outweigh the few bytes saved on small events.
+Bodies that are cached and served many times (calendar feeds) use
+Precompressed, which compresses once per encoding at the highest level.
+brotli is optional; without it responses fall back to gzip.
+"""
+
+import gzip
+import zlib
+
+from flask import current_app, request
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Smaller bodies gain less than the extra CPU and header bytes cost
+MIN_SIZE = 1024
+
+COMPRESSIBLE_TYPES = (
+    'application/json',
+    'application/x-ndjson',
+    'text/csv',
+    'text/calendar',
+    'text/plain',
+    'text/html',
+)
+
+# Levels for bodies compressed once per request, and for cached bodies
+GZIP_LEVEL = 6
+GZIP_STATIC_LEVEL = 9
+BROTLI_QUALITY = 5
+BROTLI_STATIC_QUALITY = 11
+# Brotli window for streams (2**18 bytes); the default 4 MB window would be
+# held for as long as each stream stays open
+BROTLI_STREAM_WINDOW = 18
+
+
+def _gzip(data, level):
+    # mtime=0 keeps the output identical for identical input
+    return gzip.compress(data, compresslevel=level, mtime=0)
+
+
+def _brotli(data, quality):
+    return brotli.compress(data, quality=quality)
+
+
+class _GzipStream:
+    def __init__(self):
+        self._compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, chunk):
+        return self._compressor.compress(chunk) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        return self._compressor.flush(zlib.Z_FINISH)
+
+
+class _BrotliStream:
+    def __init__(self):
+        self._compressor = brotli.Compressor(quality=BROTLI_QUALITY, lgwin=BROTLI_STREAM_WINDOW)
+
+    def compress(self, chunk):
+        return self._compressor.process(chunk) + self._compressor.flush()
+
+    def finish(self):
+        return self._compressor.finish()
+
+
+# encoding -> (one-shot compress(data, static), stream encoder class)
+ENCODINGS = {'gzip': (lambda data, static: _gzip(data, GZIP_STATIC_LEVEL if static else GZIP_LEVEL), _GzipStream)}
+if brotli is not None:
+    ENCODINGS['br'] = (lambda data, static: _brotli(data, BROTLI_STATIC_QUALITY if static else BROTLI_QUALITY), _BrotliStream)
+
+# Server preference when the client accepts several with the same quality
+PREFERRED_ENCODINGS = [encoding for encoding in ('br', 'gzip') if encoding in ENCODINGS]
+
+
+def negotiate():
+    """Best encoding the client accepts, or None for identity"""
+    return request.accept_encodings.best_match(PREFERRED_ENCODINGS)
+
+
+def _compressible(response):
+    return response.mimetype in COMPRESSIBLE_TYPES
+
+
+def _compress_stream(chunks, encoder, charset):
+    for chunk in chunks:
+        if isinstance(chunk, str):
+            chunk = chunk.encode(charset)
+        data = encoder.compress(chunk)
+        if data:
+            yield data
+    yield encoder.finish()
+
+
+def compress_response(response):
+    """after_request hook: compress `response` in place when worthwhile"""
+    if (response.status_code != 200
+            or response.direct_passthrough
+            or 'Content-Encoding' in response.headers
+            or 'Content-Range' in response.headers
+            or 'no-transform' in response.headers.get('Cache-Control', '')
+            or not _compressible(response)):
+        return response
+
+    # Caches must keep one copy per encoding even when this one is not compressed
+    response.vary.add('Accept-Encoding')
+    encoding = negotiate()
+    if encoding is None:
+        return response
+    compress, stream_encoder = ENCODINGS[encoding]
+
+    if response.is_streamed:
+        chunks = response.response
+        response.response = _compress_stream(chunks, stream_encoder(), response.charset)
+        # The wrapper may be discarded before it starts; close the original
+        # iterable (and whatever it holds open) either way
+        if hasattr(chunks, 'close'):
+            response.call_on_close(chunks.close)
+        response.headers.pop('Content-Length', None)
+    else:
+        data = response.get_data()
+        if len(data) < MIN_SIZE:
+            return response
+        response.set_data(compress(data, False))
+    response.headers['Content-Encoding'] = encoding
+    return response
+
+
+class Precompressed:
+    """A cached body, compressed once per encoding and reused for every response"""
+
+    def __init__(self, body):
+        self.body = body
+        self._encoded = {}
+
+    def encoded(self, encoding):
+        # Two requests may race to fill a slot; both compute the same bytes
+        data = self._encoded.get(encoding)
+        if data is None:
+            data = self._encoded[encoding] = ENCODINGS[encoding][0](self.body, True)
+        return data
+
+    def response(self, mimetype, headers=None):
+        """200 response with the body in the best encoding the client accepts"""
+        response = current_app.response_class(mimetype=mimetype, headers=headers)
+        response.vary.add('Accept-Encoding')
+        encoding = negotiate() if len(self.body) >= MIN_SIZE else None
+        if encoding:
+            response.set_data(self.encoded(encoding))
+            response.headers['Content-Encoding'] = encoding
+        else:
+            response.set_data(self.body)
+        return response
+
+
+def init_app(app):
+    app.after_request(compress_response)
@@ -0,0 +1,82 @@
+"""
+Conditional GET (ETag / Last-Modified) for schedule and reference endpoints.
+Before its full query an endpoint runs a cheap validator query: row count,
+latest change time and an xmin checksum of the rows it would return (see
+fieldsets.xmin_checksum). If-None-Match / If-Modified-Since matching the
+validator get 304 Not Modified with no body, so a reload of an unchanged
+schedule costs one aggregate instead of the join, the encoding and the
+transfer. The ETag also covers the query string and the caller's scope,
+which select different bodies.
+"""
+
+import hashlib
+from collections import namedtuple
+from datetime import datetime, timedelta, timezone
+
+from flask import current_app, request
+
+from fieldsets import xmin_checksum
+
+# etag: weak ETag value; last_modified: datetime or None when the rows carry no timestamp
+Validator = namedtuple('Validator', ['etag', 'last_modified'])
+
+# Latest deletion from a group's schedule, so Last-Modified moves when an exam disappears
+GROUP_LAST_DELETE_SQL = "(SELECT max(t.deleted_at) FROM exam_tombstones t WHERE t.student_group = %s)"
+
+
+def _etag(*parts):
+    payload = repr((request.full_path,) + parts).encode('utf-8')
+    return hashlib.blake2b(payload, digest_size=16).hexdigest()
+
+
+def read_validator(cursor, query, params=(), scope=()):
+    """
+    Validator from `query`, a SELECT of one (count, last_modified, checksum) row.
+    `scope` names what else selects the body, e.g. the caller's group.
+    """
+    cursor.execute(query, params)
+    count, last_modified, checksum = cursor.fetchone()
+    return Validator(_etag(tuple(scope), count, last_modified, checksum), last_modified)
+
+
+def table_validator(cursor, from_sql, conditions=(), params=(), scope=()):
+    """Validator for the rows of `from_sql` ("FROM <table> <alias>") matching `conditions`"""
+    alias = from_sql.split()[-1]
+    query = f"SELECT count(*), NULL, {xmin_checksum(alias)} {from_sql}"
+    if conditions:
+        query += " WHERE " + " AND ".join(conditions)
+    return read_validator(cursor, query, params, scope)
+
+
+def static_validator(body):
+    """Validator for a body that only changes with a deploy"""
+    return Validator(_etag(repr(body)), None)
+
+
+def add_validators(response, validator):
+    """Attach the validator and make clients revalidate before reusing the body"""
+    response.set_etag(validator.etag, weak=True)
+    # HTTP dates have whole seconds: a date from the current second could
+    # also cover a change committed later in that second, so it is not sent
+    if validator.last_modified is not None and \
+            validator.last_modified.replace(microsecond=0) + timedelta(seconds=1) <= datetime.now(timezone.utc):
+        response.last_modified = validator.last_modified
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    return response
+
+
+def not_modified(validator):
+    """
+    304 response when the client's copy matches `validator`, otherwise None.
+    If-None-Match wins over If-Modified-Since, as RFC 9110 requires.
+    """
+    if request.if_none_match:
+        fresh = request.if_none_match.contains_weak(validator.etag)
+    elif request.if_modified_since and validator.last_modified is not None:
+        fresh = validator.last_modified.replace(microsecond=0) <= request.if_modified_since
+    else:
+        fresh = False
+    if not fresh:
+        return None
+    return add_validators(current_app.response_class(status=304), validator)
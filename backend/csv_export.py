@@ -0,0 +1,207 @@
+"""
+Streaming CSV export of the exam schedule for integrations and large dumps.
+PostgreSQL renders the CSV itself through COPY (SELECT ...) TO STDOUT and the
+chunks are forwarded to the HTTP response as they arrive, so no Python objects
+are built per row.
+"""
+
+import datetime
+import queue
+import re
+import threading
+
+from flask import Response, jsonify, request
+from database import get_db_connection
+
+# Flag to indicate if the database is available
+DB_AVAILABLE = False
+
+EXAM_STATUSES = ['DRAFT', 'PROPOSED', 'ACCEPTED', 'REJECTED', 'CANCELLED', 'RESCHEDULED', 'CONFIRMED']
+
+# Bytes collected from COPY before handing a chunk to the response
+CHUNK_SIZE = 64 * 1024
+# Chunks buffered between the COPY thread and the client; bounds memory per export
+MAX_PENDING_CHUNKS = 16
+
+GROUP_PATTERN = re.compile(r'^[\w .-]{1,50}$')
+
+# Same column set as export_schedule / export_exams_excel
+SCHEDULE_COPY_QUERY = """
+    COPY (
+        SELECT
+            d.name as discipline_name,
+            e.exam_type,
+            e.student_group,
+            to_char(e.exam_date, 'YYYY-MM-DD') as exam_date,
+            e.start_hour,
+            e.duration,
+            r.name as room_name,
+            u1.full_name as main_teacher,
+            u2.full_name as second_teacher,
+            e.status
+        FROM exams e
+        JOIN disciplines d ON e.discipline_id = d.id
+        LEFT JOIN rooms r ON e.room_id = r.id
+        JOIN users u1 ON e.main_teacher_id = u1.id
+        JOIN users u2 ON e.second_teacher_id = u2.id
+        {where}
+        ORDER BY e.exam_date, e.start_hour
+    ) TO STDOUT WITH (FORMAT csv, HEADER true)
+"""
+
+_DONE = object()
+
+
+class ExportCancelled(Exception):
+    """Raised inside the COPY thread once the client has gone away"""
+
+
+class _ChunkWriter:
+    """File-like sink for COPY TO STDOUT that hands fixed-size chunks to a bounded queue"""
+
+    def __init__(self):
+        self.chunks = queue.Queue(maxsize=MAX_PENDING_CHUNKS)
+        self.cancelled = threading.Event()
+        self._buffer = bytearray()
+
+    def write(self, data):
+        self._buffer += data
+        if len(self._buffer) >= CHUNK_SIZE:
+            self.flush()
+
+    def flush(self):
+        if self._buffer:
+            self._put(bytes(self._buffer))
+            self._buffer.clear()
+
+    def finish(self, error=None):
+        """End the stream; `error` is re-raised on the response side"""
+        self._put(error if error is not None else _DONE, force=True)
+
+    def _put(self, item, force=False):
+        while True:
+            if self.cancelled.is_set() and not force:
+                raise ExportCancelled()
+            try:
+                self.chunks.put(item, timeout=1)
+                return
+            except queue.Full:
+                if self.cancelled.is_set():
+                    return
+
+
+def _quote_literal(value):
+    """COPY does not accept bind parameters, so filter values are inlined as literals"""
+    return "'" + str(value).replace("'", "''") + "'"
+
+
+def _parse_filters(args):
+    """Translate query-string filters into WHERE clauses, or return an error message"""
+    clauses = []
+
+    statuses = args.get('status', 'CONFIRMED').upper()
+    if statuses != 'ALL':
+        status_list = [s.strip() for s in statuses.split(',') if s.strip()]
+        invalid = [s for s in status_list if s not in EXAM_STATUSES]
+        if not status_list or invalid:
+            return None, f"Invalid status filter. Allowed values: {', '.join(EXAM_STATUSES)} or ALL"
+        clauses.append(f"e.status IN ({', '.join(_quote_literal(s) for s in status_list)})")
+
+    for param, operator in (('date_from', '>='), ('date_to', '<=')):
+        value = args.get(param)
+        if value:
+            try:
+                day = datetime.date.fromisoformat(value)
+            except ValueError:
+                return None, f"Invalid {param}. Expected YYYY-MM-DD"
+            clauses.append(f"e.exam_date::date {operator} {_quote_literal(day.isoformat())}::date")
+
+    group = args.get('group')
+    if group:
+        if not GROUP_PATTERN.match(group):
+            return None, "Invalid group filter"
+        clauses.append(f"e.student_group = {_quote_literal(group)}")
+
+    return ('WHERE ' + ' AND '.join(clauses)) if clauses else '', None
+
+
+def _copy_worker(conn, copy_sql, writer):
+    cursor = None
+    error = None
+    try:
+        cursor = conn.cursor()
+        cursor.execute(copy_sql, stream=writer)
+        writer.flush()
+    except ExportCancelled:
+        print("CSV export cancelled by client")
+    except Exception as e:
+        print(f"Error streaming CSV export: {e}")
+        error = e
+    finally:
+        writer.finish(error)
+        try:
+            if cursor:
+                cursor.close()
+            conn.close()
+        except Exception:
+            pass
+
+
+def export_exams_csv():
+    """
+    Stream the exam schedule as CSV. Filters: status (comma separated, default
+    CONFIRMED, ALL for every status), date_from, date_to (YYYY-MM-DD) and group.
+    """
+    if not DB_AVAILABLE:
+        return jsonify({"error": "Database not available"}), 500
+
+    where, error = _parse_filters(request.args)
+    if error:
+        return jsonify({"error": error}), 400
+
+    try:
+        conn = get_db_connection()
+    except Exception as e:
+        print(f"Error opening connection for CSV export: {e}")
+        return jsonify({"error": "An internal error occurred"}), 500
+
+    writer = _ChunkWriter()
+    worker = threading.Thread(
+        target=_copy_worker,
+        args=(conn, SCHEDULE_COPY_QUERY.format(where=where), writer),
+        daemon=True
+    )
+
+    def generate():
+        worker.start()
+        try:
+            while True:
+                chunk = writer.chunks.get()
+                if chunk is _DONE:
+                    break
+                if isinstance(chunk, Exception):
+                    # Abort the connection instead of ending a truncated CSV
+                    # as if it were complete
+                    raise chunk
+                yield chunk
+        finally:
+            # Client finished or disconnected: let the COPY thread stop early
+            writer.cancelled.set()
+
+    filename = f"exams_export_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
+    response = Response(
+        generate(),
+        mimetype='text/csv',
+        headers={
+            'Content-Disposition': f'attachment; filename={filename}',
+            'X-Accel-Buffering': 'no',
+        }
+    )
+
+    @response.call_on_close
+    def release_unstarted():
+        # The response may be discarded before streaming starts
+        if worker.ident is None:
+            conn.close()
+
+    return response
@@ -1,4 +1,7 @@
+import hashlib
 import os
+import random
+import time
 import pg8000.dbapi
 from urllib.parse import urlparse
 
@@ -24,3 +27,80 @@ def get_db_connection():
         database=database
     )
     return conn
+
+# Rows fetched per round trip when streaming from a server-side cursor
+DEFAULT_FETCH_SIZE = 2000
+
+def iter_server_cursor(conn, query, params=(), fetch_size=DEFAULT_FETCH_SIZE, name='stream_cursor'):
+    """
+    Streams a query through a named server-side cursor (DECLARE/FETCH).
+    pg8000 materializes every result set it receives, so large reads go
+    through a cursor to keep memory bounded by fetch_size rows.
+    Yields (description, rows) per chunk; must run inside a transaction,
+    which pg8000 opens implicitly on the first statement.
+    """
+    cursor = conn.cursor()
+    try:
+        cursor.execute(f"DECLARE {name} NO SCROLL CURSOR FOR {query}", params)
+        while True:
+            cursor.execute(f"FETCH FORWARD {int(fetch_size)} FROM {name}")
+            rows = cursor.fetchall()
+            if not rows:
+                break
+            yield cursor.description, rows
+        cursor.execute(f"CLOSE {name}")
+    finally:
+        cursor.close()
+
+
+# serialization_failure, deadlock_detected: safe to retry the whole transaction
+RETRYABLE_SQLSTATES = ('40001', '40P01')
+DEFAULT_RETRY_ATTEMPTS = 4
+
+def lock_key(*parts):
+    """Stable signed 64-bit key for pg_advisory_xact_lock, derived from the given parts"""
+    digest = hashlib.blake2b(':'.join(str(p) for p in parts).encode('utf-8'), digest_size=8).digest()
+    return int.from_bytes(digest, 'big', signed=True)
+
+def room_day_lock_key(room_id, day):
+    """Key serializing writes that compete for one room on one day"""
+    return lock_key('room-day', int(room_id), str(day)[:10])
+
+def advisory_xact_lock(cursor, keys):
+    """
+    Take transaction-scoped advisory locks on `keys`, released at commit/rollback.
+    Keys are deduplicated and taken in sorted order so two transactions
+    locking overlapping sets cannot deadlock.
+    """
+    keys = sorted(set(keys))
+    if keys:
+        cursor.execute(
+            "SELECT pg_advisory_xact_lock(k) FROM unnest(%s::bigint[]) AS k ORDER BY k",
+            (keys,)
+        )
+
+def is_retryable(error):
+    """True for serialization failures and deadlocks reported by pg8000"""
+    if not isinstance(error, pg8000.dbapi.DatabaseError):
+        return False
+    details = error.args[0] if error.args else None
+    return isinstance(details, dict) and details.get('C') in RETRYABLE_SQLSTATES
+
+def run_in_transaction(conn, work, attempts=DEFAULT_RETRY_ATTEMPTS):
+    """
+    Run work(cursor) and commit, retrying the whole transaction with jittered
+    backoff when it fails with a retryable SQLSTATE. Returns work's result.
+    """
+    for attempt in range(1, attempts + 1):
+        cursor = conn.cursor()
+        try:
+            result = work(cursor)
+            conn.commit()
+            return result
+        except Exception as e:
+            conn.rollback()
+            if attempt == attempts or not is_retryable(e):
+                raise
+            time.sleep(random.uniform(0, 0.02 * 2 ** attempt))
+        finally:
+            cursor.close()
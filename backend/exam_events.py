@@ -0,0 +1,277 @@
+"""
+Server-sent events for exam changes: GET /api/exams/events
+Every change to an exam is announced with Postgres NOTIFY by the transaction
+that makes it (exam_transitions.notify_changes, change_feed.DELETE_EXAM_QUERY).
+Each process holds one LISTEN connection and fans the notifications out to
+its open streams, so a group leader or teacher sees a review or proposal as
+soon as it commits instead of polling. Streams only carry exams the user's
+role may list, like /api/exams/changes.
+
+Event ids are change feed cursors. A client reconnecting with Last-Event-ID
+(or ?last_event_id=) first gets what it missed, read from the database, then
+live events; if it missed too much it gets a `resync` event and reloads.
+Clients send the Authorization header, so the stream is read with fetch()
+rather than EventSource. Each stream holds a worker thread; the app must run
+threaded (app.run's default) or on an async worker.
+These endpoints will be imported into the main app.py file.
+"""
+
+import collections
+import queue
+import select
+import threading
+import time
+from datetime import datetime, timedelta
+
+import orjson
+from flask import jsonify, request, g, current_app
+from database import get_db_connection
+from serialization import dumps
+from pagination import PaginationError
+from exam_filters import LISTING_SCOPES
+from exam_transitions import EXAM_CHANGES_CHANNEL
+import change_feed
+
+# Import DB_AVAILABLE from app.py when this module is imported
+DB_AVAILABLE = None
+
+# Comment line sent when nothing happened, so proxies keep the connection
+# open and a vanished client is noticed
+HEARTBEAT_SECONDS = 15
+# Streams end after this long and the client reconnects with Last-Event-ID;
+# nothing is lost and an abandoned connection cannot hold a thread forever
+MAX_STREAM_SECONDS = 30 * 60
+# Reconnect delay suggested to the client
+RECONNECT_MILLISECONDS = 3000
+
+# Events buffered per stream. A client that falls further behind is
+# disconnected and catches up from the database when it reconnects.
+MAX_QUEUED_EVENTS = 256
+MAX_STREAMS_PER_USER = 4
+# Missed changes replayed on reconnect; beyond this the client reloads
+MAX_REPLAY_EVENTS = change_feed.CHANGES_PAGE_SIZE
+
+# Listener: longest wait on the socket before pinging the connection
+LISTEN_POLL_SECONDS = 5
+LISTEN_RETRY_SECONDS = 2
+
+# Columns of an `exam` event, the same in replayed and live events
+EVENT_FIELDS = ('id', 'status', 'exam_date', 'start_hour', 'room_id', 'student_group',
+                'main_teacher_id', 'second_teacher_id', 'updated_at')
+
+
+def _frame(name, data, position=None):
+    """One SSE message; `position` (changed_at, exam_id) becomes its id"""
+    frame = b''
+    if position is not None:
+        frame += b'id: ' + change_feed.position_token(position).encode('ascii') + b'\n'
+    return frame + b'event: ' + name.encode('ascii') + b'\ndata: ' + dumps(data) + b'\n\n'
+
+
+def _visible(user, student_group, teacher_ids):
+    """Whether `user`'s listing scope covers an exam with these scope columns"""
+    role = user.get('role')
+    if role not in LISTING_SCOPES:
+        return False
+    scope = LISTING_SCOPES[role]
+    if scope == 'group':
+        return student_group is not None and student_group == user.get('student_group')
+    if scope == 'teacher':
+        return user.get('id') in teacher_ids
+    return True
+
+
+class Subscriber:
+    """One open stream: the user it belongs to and its bounded event queue"""
+
+    def __init__(self, user):
+        self.user = user
+        self.events = queue.Queue(MAX_QUEUED_EVENTS)
+        # Set when events for this stream were lost; the stream then ends
+        self.dropped = False
+
+    def offer(self, frame):
+        try:
+            self.events.put_nowait(frame)
+        except queue.Full:
+            self.dropped = True
+
+    def drop(self):
+        self.dropped = True
+        # Wake the stream if it is waiting for events
+        try:
+            self.events.put_nowait(None)
+        except queue.Full:
+            pass
+
+
+class ExamEventBroker:
+    """One LISTEN connection per process, fanned out to every open stream"""
+
+    def __init__(self):
+        self._subscribers = set()
+        self._lock = threading.Lock()
+        self._listener = None
+        self._listening = threading.Event()
+
+    def subscribe(self, user):
+        """New Subscriber for `user`, or None when the user has too many open streams"""
+        with self._lock:
+            open_streams = sum(1 for sub in self._subscribers if sub.user.get('id') == user.get('id'))
+            if open_streams >= MAX_STREAMS_PER_USER:
+                return None
+            subscriber = Subscriber(user)
+            self._subscribers.add(subscriber)
+            if self._listener is None or not self._listener.is_alive():
+                self._listener = threading.Thread(target=self._listen, name='exam-events-listener', daemon=True)
+                self._listener.start()
+        # Changes committed before LISTEN runs would reach neither the replay nor the stream
+        self._listening.wait(LISTEN_POLL_SECONDS)
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        with self._lock:
+            self._subscribers.discard(subscriber)
+
+    def publish(self, payload):
+        """Queue one notification payload for every stream allowed to see it"""
+        try:
+            change = orjson.loads(payload)
+        except orjson.JSONDecodeError:
+            print(f"Ignoring malformed exam notification: {payload!r}")
+            return
+        teacher_ids = (change.get('main_teacher_id'), change.get('second_teacher_id'))
+        if change.get('deleted'):
+            position = (datetime.fromisoformat(change['deleted_at']), change['id'])
+            frame = _frame('exam_deleted', {'id': change['id']}, position)
+        else:
+            position = (datetime.fromisoformat(change['updated_at']), change['id'])
+            frame = _frame('exam', {field: change.get(field) for field in EVENT_FIELDS}, position)
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscriber in subscribers:
+            if _visible(subscriber.user, change.get('student_group'), teacher_ids):
+                subscriber.offer(frame)
+
+    def _drop_all(self):
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscriber in subscribers:
+            subscriber.drop()
+
+    def _listen(self):
+        while True:
+            conn = None
+            try:
+                conn = get_db_connection()
+                conn.autocommit = True
+                # pg8000 keeps only the last 100 notifications by default
+                conn.notifications = collections.deque()
+                cursor = conn.cursor()
+                cursor.execute(f"LISTEN {EXAM_CHANGES_CHANNEL}")
+                self._listening.set()
+                while True:
+                    # pg8000 has no blocking wait for notifications: sleep on the
+                    # socket, then let a no-op query read whatever arrived
+                    select.select([conn._usock], [], [], LISTEN_POLL_SECONDS)
+                    cursor.execute("SELECT 1")
+                    while conn.notifications:
+                        _, _, payload = conn.notifications.popleft()
+                        self.publish(payload)
+            except Exception as e:
+                print(f"Error in exam events listener: {e}")
+                # Notifications sent while reconnecting are lost; ending the
+                # streams makes their clients resume from the database
+                self._listening.clear()
+                self._drop_all()
+                time.sleep(LISTEN_RETRY_SECONDS)
+            finally:
+                if conn:
+                    try:
+                        conn.close()
+                    except Exception:
+                        pass
+
+
+broker = ExamEventBroker()
+
+
+def _opening_frames(cursor, user, since):
+    """Frames sent before live events: missed changes after `since`, or a resync"""
+    cursor.execute("SELECT CURRENT_TIMESTAMP - make_interval(secs => %s)", (change_feed.CHANGE_FEED_LAG_SECONDS,))
+    horizon = (cursor.fetchone()[0], 0)
+    if since is None:
+        return [_frame('ready', {'cursor': change_feed.position_token(horizon)}, horizon)]
+
+    # Event ids are exact positions; step back so late commits are replayed too
+    resume = (since[0] - timedelta(seconds=change_feed.CHANGE_FEED_LAG_SECONDS), 0)
+    try:
+        changes = change_feed.read_changes(cursor, user, resume, MAX_REPLAY_EVENTS, EVENT_FIELDS)
+    except change_feed.CursorExpired:
+        changes = None
+    if changes is None or changes.has_more:
+        return [_frame('resync', {'cursor': change_feed.position_token(horizon)}, horizon)]
+
+    frames = []
+    for changed_at, exam_id, deleted in changes.events:
+        if deleted:
+            frames.append(_frame('exam_deleted', {'id': exam_id}, (changed_at, exam_id)))
+        elif exam_id in changes.exams:
+            frames.append(_frame('exam', changes.exams[exam_id], (changed_at, exam_id)))
+    position = max(since, horizon)
+    frames.append(_frame('ready', {'cursor': change_feed.position_token(position)}, position))
+    return frames
+
+
+def _stream(subscriber, frames):
+    started = time.monotonic()
+    try:
+        yield f'retry: {RECONNECT_MILLISECONDS}\n\n'.encode('ascii') + b''.join(frames)
+        while not subscriber.dropped and time.monotonic() - started < MAX_STREAM_SECONDS:
+            try:
+                frame = subscriber.events.get(timeout=HEARTBEAT_SECONDS)
+            except queue.Empty:
+                yield b': heartbeat\n\n'
+                continue
+            if frame is not None:
+                yield frame
+    finally:
+        broker.unsubscribe(subscriber)
+
+
+def stream_exam_events():
+    """Event stream of changes to the exams the current user may list"""
+    if not DB_AVAILABLE:
+        return jsonify({"error": "Database not available"}), 500
+
+    last_event_id = request.headers.get('Last-Event-ID') or request.args.get('last_event_id')
+    try:
+        since = change_feed.parse_since(last_event_id)
+    except PaginationError:
+        return jsonify({"error": "Invalid Last-Event-ID"}), 400
+
+    user = {key: g.current_user.get(key) for key in ('id', 'role', 'student_group')}
+    subscriber = broker.subscribe(user)
+    if subscriber is None:
+        return jsonify({"error": f"At most {MAX_STREAMS_PER_USER} event streams per user"}), 429
+
+    conn = None
+    try:
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        frames = _opening_frames(cursor, user, since)
+    except Exception as e:
+        broker.unsubscribe(subscriber)
+        print(f"Error opening exam event stream: {e}")
+        return jsonify({"error": "An internal error occurred"}), 500
+    finally:
+        if conn:
+            conn.close()
+
+    response = current_app.response_class(_stream(subscriber, frames), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    # Tell nginx-style proxies not to buffer the stream
+    response.headers['X-Accel-Buffering'] = 'no'
+    # The generator's cleanup does not run if the response is never iterated
+    response.call_on_close(lambda: broker.unsubscribe(subscriber))
+    return response
@@ -0,0 +1,166 @@
+"""
+Whitelisted filter and sort parameters for exam listings.
+Query string parameters are compiled into parameterized SQL predicates over
+the listing joins (exams e, disciplines d, rooms r), so the database does the
+filtering instead of the browser:
+
+    ?status=PROPOSED,ACCEPTED&date_from=2025-06-01&date_to=2025-06-30
+    &group=3211A&teacher=<user id>&room=4&building=C&year_of_study=3
+    &exam_type=EXAM&sort=-exam_date,-start_hour
+
+Multi-valued filters take comma-separated values or repeated parameters.
+Unknown parameters are ignored. Role scoping is applied in SQL as well.
+"""
+
+import datetime
+from collections import namedtuple
+
+from exam_transitions import ROLE_SCOPES
+from pagination import (KeyColumn, Keyset, EXAM_DATE_SENTINEL, START_HOUR_SENTINEL)
+
+EXAM_STATUSES = ('DRAFT', 'PROPOSED', 'ACCEPTED', 'REJECTED', 'CANCELLED', 'RESCHEDULED', 'CONFIRMED')
+EXAM_TYPES = ('EXAM', 'PROJECT')
+
+# Values accepted per multi-valued filter
+MAX_FILTER_VALUES = 50
+
+# Students only see their own group's exams
+LISTING_SCOPES = dict(ROLE_SCOPES, STUDENT='group')
+
+
+class FilterError(ValueError):
+    """Invalid filter or sort parameter; reported to the client as a 400"""
+
+
+def _upper_choice(choices):
+    def parse(value):
+        value = value.strip().upper()
+        if value not in choices:
+            raise FilterError(f"must be one of {', '.join(choices)}")
+        return value
+    return parse
+
+
+def _text(value):
+    value = value.strip()
+    if not value or len(value) > 255:
+        raise FilterError("must be a non-empty string of at most 255 characters")
+    return value
+
+
+def _integer(value):
+    try:
+        return int(value)
+    except ValueError:
+        raise FilterError("must be an integer")
+
+
+def _date(value):
+    try:
+        return datetime.datetime.strptime(value.strip(), '%Y-%m-%d').date()
+    except ValueError:
+        raise FilterError("must be a date (YYYY-MM-DD)")
+
+
+# sql: predicate whose placeholders all take the parsed value(s); parse: one raw value -> SQL value;
+# joins: listing join aliases the predicate needs besides exams e
+Filter = namedtuple('Filter', ['sql', 'parse', 'multiple', 'joins'], defaults=((),))
+
+FILTERS = {
+    'status': Filter("e.status = ANY(%s::text[])", _upper_choice(EXAM_STATUSES), True),
+    'exam_type': Filter("e.exam_type = ANY(%s::text[])", _upper_choice(EXAM_TYPES), True),
+    'group': Filter("e.student_group = ANY(%s::text[])", _text, True),
+    'teacher': Filter("(e.main_teacher_id = ANY(%s::text[]) OR e.second_teacher_id = ANY(%s::text[]))", _text, True),
+    'room': Filter("e.room_id = ANY(%s::int[])", _integer, True),
+    'building': Filter("r.building_name = ANY(%s::text[])", _text, True, ('r',)),
+    'year_of_study': Filter("d.year_of_study = ANY(%s::int[])", _integer, True, ('d',)),
+    'date_from': Filter("e.exam_date >= %s::date", _date, False),
+    # Inclusive: every exam on date_to itself matches
+    'date_to': Filter("e.exam_date < %s::date + 1", _date, False),
+}
+
+# Sortable fields; each must be a column of every listing that accepts ?sort=
+SORT_FIELDS = {
+    'status': KeyColumn('e.status', 'status', 'text'),
+    'exam_date': KeyColumn(f"COALESCE(e.exam_date, '{EXAM_DATE_SENTINEL}'::timestamp)", 'exam_date', 'timestamp', EXAM_DATE_SENTINEL),
+    'start_hour': KeyColumn(f"COALESCE(e.start_hour, {START_HOUR_SENTINEL})", 'start_hour', 'int', START_HOUR_SENTINEL),
+    'student_group': KeyColumn("COALESCE(e.student_group, '')", 'student_group', 'text', ''),
+    'exam_type': KeyColumn("COALESCE(e.exam_type, '')", 'exam_type', 'text', ''),
+    'id': KeyColumn('e.id', 'id', 'int'),
+}
+
+
+def _values(args, name, multiple):
+    raw = [part for value in args.getlist(name) for part in value.split(',')] if multiple else [args.get(name)]
+    raw = [value for value in raw if value is not None and value.strip()]
+    if len(raw) > MAX_FILTER_VALUES:
+        raise FilterError(f"{name}: at most {MAX_FILTER_VALUES} values")
+    return raw
+
+
+def parse_filters(args):
+    """(conditions, params) for the filters present in `args`; raises FilterError"""
+    conditions, params = [], []
+    for name, spec in FILTERS.items():
+        raw = _values(args, name, spec.multiple)
+        if not raw:
+            continue
+        try:
+            parsed = [spec.parse(value) for value in raw]
+        except FilterError as e:
+            raise FilterError(f"{name}: {e}")
+        value = parsed if spec.multiple else parsed[0]
+        conditions.append(spec.sql)
+        params += [value] * spec.sql.count('%s')
+
+    if args.get('date_from') and args.get('date_to') and _date(args['date_from']) > _date(args['date_to']):
+        raise FilterError("date_from must not be after date_to")
+    return conditions, params
+
+
+def filter_joins(args):
+    """Join aliases needed by the filters present in `args`"""
+    return {alias for name, spec in FILTERS.items()
+            if _values(args, name, spec.multiple) for alias in spec.joins}
+
+
+def scope_condition(user):
+    """(sql, params) limiting exams to what `user`'s role may list"""
+    role = user.get('role')
+    if role not in LISTING_SCOPES:
+        return "FALSE", []
+    scope = LISTING_SCOPES[role]
+    if scope == 'group':
+        return "e.student_group = %s", [user.get('student_group')]
+    if scope == 'teacher':
+        return "(e.main_teacher_id = %s OR e.second_teacher_id = %s)", [user.get('id'), user.get('id')]
+    return "TRUE", []
+
+
+def parse_sort(args, listing, default):
+    """
+    Keyset for ?sort=field,-field (a leading '-' sorts descending), or
+    `default` when no sort is given. The exam id is appended as a
+    tie-breaker so pages stay stable.
+    """
+    sort = (args.get('sort') or '').strip()
+    if not sort:
+        return default
+
+    columns, directions = [], set()
+    for field in sort.split(','):
+        field = field.strip()
+        descending = field.startswith('-')
+        name = field.lstrip('-')
+        if name not in SORT_FIELDS:
+            raise FilterError(f"sort: unknown field '{name}'; allowed: {', '.join(SORT_FIELDS)}")
+        if SORT_FIELDS[name] in columns:
+            raise FilterError(f"sort: '{name}' given twice")
+        columns.append(SORT_FIELDS[name])
+        directions.add(descending)
+    # One direction for all keys keeps the keyset a single row comparison
+    if len(directions) > 1:
+        raise FilterError("sort: all fields must use the same direction")
+    if SORT_FIELDS['id'] not in columns:
+        columns.append(SORT_FIELDS['id'])
+    return Keyset(f"{listing}:{sort}", tuple(columns), directions.pop())
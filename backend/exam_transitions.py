@@ -0,0 +1,198 @@
+"""
+Exam status state machine.
+Every status change goes through TRANSITIONS and is applied as one conditional
+UPDATE: the row only changes if it is still in an allowed source status and
+is in the actor's scope, so concurrent reviewers cannot both win. The reason
+for a failure is looked up only when the UPDATE matched no rows.
+"""
+
+from collections import namedtuple
+
+Transition = namedtuple('Transition', ['from_statuses', 'to_status', 'roles', 'verb'])
+
+GROUP_LEADER_ROLES = ('SEF_GRUPA',)
+TEACHER_ROLES = ('CADRU_DIDACTIC', 'CD', 'ADMIN')
+
+# action -> allowed source statuses, target status, roles allowed to apply it
+TRANSITIONS = {
+    'PROPOSE': Transition(('DRAFT', 'REJECTED', 'CANCELLED'), 'PROPOSED', GROUP_LEADER_ROLES, 'propose schedule for'),
+    'ACCEPT': Transition(('PROPOSED',), 'ACCEPTED', TEACHER_ROLES, 'review'),
+    'REJECT': Transition(('PROPOSED',), 'REJECTED', TEACHER_ROLES, 'review'),
+    'CANCEL': Transition(('PROPOSED',), 'CANCELLED', TEACHER_ROLES, 'review'),
+    # Teacher rejects and suggests another date/hour for the group leader
+    'ALTERNATE': Transition(('PROPOSED',), 'REJECTED', TEACHER_ROLES, 'review'),
+    'CONFIRM': Transition(('ACCEPTED',), 'CONFIRMED', TEACHER_ROLES + ('SEC',), 'confirm'),
+}
+
+# Which exams a role may act on; None means every exam
+ROLE_SCOPES = {
+    'SEF_GRUPA': 'group',
+    'SG': 'group',
+    'CADRU_DIDACTIC': 'teacher',
+    'CD': 'teacher',
+    'SEC': None,
+    'ADMIN': None,
+}
+
+NOT_FOUND_MESSAGES = {
+    'group': "Exam not found or does not belong to your group",
+    'teacher': "Exam not found or you are not assigned to this exam",
+    None: "Exam not found",
+}
+
+# Columns an UPDATE may set besides status
+UPDATABLE_FIELDS = ('exam_date', 'start_hour', 'room_id')
+
+RETURNING_COLUMNS = "id, discipline_id, exam_date, start_hour, room_id, status"
+
+# Postgres NOTIFY channel announcing committed exam changes, see exam_events.py
+EXAM_CHANGES_CHANNEL = 'exam_changes'
+
+# Timestamps in notifications, in the form change_feed cursors use
+NOTIFY_TIMESTAMP_FORMAT = 'YYYY-MM-DD"T"HH24:MI:SS.US"+00:00"'
+
+# One notification per exam. NOTIFY is transactional: listeners only hear
+# about changes that commit, and nothing if the transaction rolls back.
+NOTIFY_CHANGES_QUERY = f"""
+    SELECT pg_notify(%s, json_build_object(
+        'id', id, 'status', status, 'exam_date', exam_date, 'start_hour', start_hour,
+        'room_id', room_id, 'student_group', student_group,
+        'main_teacher_id', main_teacher_id, 'second_teacher_id', second_teacher_id,
+        'updated_at', to_char(updated_at AT TIME ZONE 'UTC', '{NOTIFY_TIMESTAMP_FORMAT}')
+    )::text)
+    FROM exams WHERE id = ANY(%s::int[])
+"""
+
+# Extra predicate for PROPOSE: the room is free at the requested slot
+ROOM_FREE_CONDITION = """
+    NOT EXISTS (
+        SELECT 1 FROM exams other
+        WHERE other.exam_date::date = %s::date
+          AND other.start_hour = %s
+          AND other.room_id = %s
+          AND other.status IN ('PROPOSED', 'ACCEPTED', 'CONFIRMED')
+          AND other.id <> exams.id
+    )
+"""
+ROOM_BOOKED_ERROR = ('ROOM_BOOKED', "Room is already booked for the selected date and time", 409)
+
+
+def _scope_predicate(user):
+    """SQL predicate and params restricting exams to the ones `user` may act on"""
+    scope = ROLE_SCOPES.get(user.get('role'))
+    if scope == 'group':
+        return "student_group = %s", [user.get('student_group')]
+    if scope == 'teacher':
+        return "(main_teacher_id = %s OR second_teacher_id = %s)", [user.get('id'), user.get('id')]
+    return "TRUE", []
+
+
+def apply_transition(cursor, exam_id, action, user, fields=None, condition=None):
+    """
+    Apply `action` to one exam in a single UPDATE.
+    `fields` sets extra columns (from UPDATABLE_FIELDS); `condition` is an
+    optional (sql, params, error) predicate that must also hold, e.g.
+    the room being free.
+    Returns (row dict, None) or (None, (code, message, http_status)).
+    The caller commits.
+    """
+    transition = TRANSITIONS[action]
+    role = user.get('role')
+    if role not in transition.roles:
+        return None, ('FORBIDDEN', f"Role {role} cannot {action.lower()} exams", 403)
+
+    fields = fields or {}
+    assignments = ["status = %s", "updated_at = CURRENT_TIMESTAMP"]
+    params = [transition.to_status]
+    for column, value in fields.items():
+        if column not in UPDATABLE_FIELDS:
+            raise ValueError(f"Column {column} cannot be set by a transition")
+        assignments.append(f"{column} = %s")
+        params.append(value)
+
+    scope_sql, scope_params = _scope_predicate(user)
+    where = ["id = %s", "status = ANY(%s::text[])", scope_sql]
+    params += [exam_id, list(transition.from_statuses)] + scope_params
+    if condition:
+        where.append(condition[0])
+        params += list(condition[1])
+
+    cursor.execute(
+        f"UPDATE exams SET {', '.join(assignments)} WHERE {' AND '.join(where)} RETURNING {RETURNING_COLUMNS}",
+        params
+    )
+    row = cursor.fetchone()
+    if row:
+        columns = [desc[0] for desc in cursor.description]
+        exam = dict(zip(columns, row))
+        notify_changes(cursor, [exam['id']])
+        return exam, None
+    return None, classify_failure(cursor, exam_id, action, user, condition)
+
+
+def apply_transition_bulk(cursor, exam_ids, action, user):
+    """
+    Apply `action` to many exams with one UPDATE ... WHERE id = ANY(...).
+    Returns {exam_id: (new_status, None) or (None, (code, message, http_status))}.
+    The caller commits.
+    """
+    transition = TRANSITIONS[action]
+    role = user.get('role')
+    if role not in transition.roles:
+        error = ('FORBIDDEN', f"Role {role} cannot {action.lower()} exams", 403)
+        return {exam_id: (None, error) for exam_id in exam_ids}
+
+    scope_sql, scope_params = _scope_predicate(user)
+    cursor.execute(
+        f"""
+        UPDATE exams SET status = %s, updated_at = CURRENT_TIMESTAMP
+        WHERE id = ANY(%s::int[]) AND status = ANY(%s::text[]) AND {scope_sql}
+        RETURNING id
+        """,
+        [transition.to_status, list(exam_ids), list(transition.from_statuses)] + scope_params
+    )
+    outcomes = {row[0]: (transition.to_status, None) for row in cursor.fetchall()}
+    notify_changes(cursor, list(outcomes))
+
+    missing = [exam_id for exam_id in exam_ids if exam_id not in outcomes]
+    if missing:
+        cursor.execute(
+            f"SELECT id, status FROM exams WHERE id = ANY(%s::int[]) AND {scope_sql}",
+            [missing] + scope_params
+        )
+        statuses = dict(cursor.fetchall())
+        scope = ROLE_SCOPES.get(role)
+        for exam_id in missing:
+            status = statuses.get(exam_id)
+            if status is None:
+                error = ('NOT_FOUND', NOT_FOUND_MESSAGES[scope], 404)
+            elif status not in transition.from_statuses:
+                error = ('INVALID_STATUS', f"Cannot {transition.verb} exam in {status} status", 400)
+            else:
+                error = ('CONFLICT', "Exam was modified concurrently, please retry", 409)
+            outcomes[exam_id] = (None, error)
+    return outcomes
+
+
+def notify_changes(cursor, exam_ids):
+    """Announce changes to `exam_ids` on EXAM_CHANGES_CHANNEL once the caller commits"""
+    if exam_ids:
+        cursor.execute(NOTIFY_CHANGES_QUERY, (EXAM_CHANGES_CHANNEL, list(exam_ids)))
+
+
+def classify_failure(cursor, exam_id, action, user, condition=None):
+    """Explain why a conditional transition matched no rows"""
+    transition = TRANSITIONS[action]
+    scope = ROLE_SCOPES.get(user.get('role'))
+    scope_sql, scope_params = _scope_predicate(user)
+    cursor.execute(f"SELECT status FROM exams WHERE id = %s AND {scope_sql}", [exam_id] + scope_params)
+    exam = cursor.fetchone()
+    if not exam:
+        return ('NOT_FOUND', NOT_FOUND_MESSAGES[scope], 404)
+    status = exam[0]
+    if status not in transition.from_statuses:
+        return ('INVALID_STATUS', f"Cannot {transition.verb} exam in {status} status", 400)
+    if condition:
+        return condition[2]
+    # The exam changed between the UPDATE and this lookup
+    return ('CONFLICT', "Exam was modified concurrently, please retry", 409)
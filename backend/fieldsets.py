@@ -0,0 +1,119 @@
+"""
+Sparse fieldsets for listing endpoints (?fields=id,status,exam_date).
+A Listing declares its columns and the joins each one needs. Only the
+requested columns are selected and only the joins they (or the active
+filters) use are performed, e.g. `users u2` is skipped unless
+second_teacher_name is asked for. The SQL for each shape is generated once
+and cached. Without ?fields= every column is returned, as before.
+"""
+
+import functools
+from collections import namedtuple
+
+# sql: the JOIN clause; pruned: predicate that keeps an INNER join's row set
+# when the join itself is skipped (None for LEFT joins)
+Join = namedtuple('Join', ['sql', 'pruned'], defaults=(None,))
+
+# sql: select expression; joins: aliases it needs; params: names of values
+# bound to its placeholders
+Field = namedtuple('Field', ['sql', 'joins', 'params'], defaults=((), ()))
+
+# SQL of one shape: select_sql takes the values named in param_names;
+# conditions stand in for skipped INNER joins; joins: aliases performed
+Shape = namedtuple('Shape', ['select_sql', 'param_names', 'conditions', 'joins'])
+
+def xmin_checksum(alias):
+    """
+    Sum of xmin, the id of the transaction that last wrote each row, over
+    the rows of `alias`; any insert, update or delete changes it
+    """
+    return f"COALESCE(sum({alias}.xmin::text::bigint), 0)"
+
+
+# Names accepted in one ?fields= list
+MAX_FIELDS = 50
+
+
+# Joins of the exam listings; the FKs make "<column> IS NOT NULL" equivalent to an INNER join
+EXAM_JOINS = {
+    'd': Join("JOIN disciplines d ON e.discipline_id = d.id", "e.discipline_id IS NOT NULL"),
+    'r': Join("LEFT JOIN rooms r ON e.room_id = r.id"),
+    'u1': Join("JOIN users u1 ON e.main_teacher_id = u1.id", "e.main_teacher_id IS NOT NULL"),
+    'u2': Join("JOIN users u2 ON e.second_teacher_id = u2.id", "e.second_teacher_id IS NOT NULL"),
+}
+
+
+class FieldsError(ValueError):
+    """Unknown field requested; reported to the client as a 400"""
+
+
+class Listing:
+    """Columns and joins of one listing query"""
+
+    def __init__(self, name, from_sql, joins, fields):
+        self.name = name
+        self.from_sql = from_sql
+        self.joins = joins
+        self.fields = fields
+        # from_sql is "FROM <table> <alias>"
+        self.alias = from_sql.split()[-1]
+
+    def parse_fields(self, args, required=()):
+        """
+        Field names requested by ?fields=, in declaration order, plus `required`
+        (e.g. the sort keys a paged response needs for its cursor).
+        All fields when the parameter is absent. Raises FieldsError.
+        """
+        raw = args.get('fields')
+        if raw is None or not raw.strip():
+            return tuple(self.fields)
+        requested = {name.strip() for name in raw.split(',') if name.strip()}
+        if len(requested) > MAX_FIELDS:
+            raise FieldsError(f"fields: at most {MAX_FIELDS} names")
+        unknown = sorted(requested - set(self.fields))
+        if unknown:
+            raise FieldsError(f"fields: unknown {', '.join(unknown)}; allowed: {', '.join(self.fields)}")
+        requested.update(required)
+        return tuple(name for name in self.fields if name in requested)
+
+    def shape(self, fields=None, joins=()):
+        """Shape selecting `fields` (all by default) with at least `joins` performed"""
+        return self._shape(tuple(fields or self.fields), frozenset(joins))
+
+    @functools.lru_cache(maxsize=128)
+    def _shape(self, fields, extra_joins):
+        needed = set(extra_joins)
+        for name in fields:
+            needed.update(self.fields[name].joins)
+        select = ',\n            '.join(self.fields[name].sql for name in fields)
+        param_names = [param for name in fields for param in self.fields[name].params]
+        aliases, conditions = [], []
+        for alias, join in self.joins.items():
+            if alias in needed:
+                aliases.append(alias)
+            elif join.pruned:
+                conditions.append(join.pruned)
+        sql = f"""
+        SELECT
+            {select}
+        {self.from_sql}
+        {self._join_sql(aliases)}
+        """
+        return Shape(sql, tuple(param_names), tuple(conditions), tuple(aliases))
+
+    def _join_sql(self, aliases):
+        return '\n        '.join(self.joins[alias].sql for alias in aliases)
+
+    def version_sql(self, shape, last_modified='NULL'):
+        """
+        SELECT of a validator for the rows `shape` returns: row count,
+        `last_modified` (an aggregate, e.g. max(e.updated_at)) and an xmin
+        checksum over the listed and joined rows, so renaming a joined room
+        changes it too. See conditional.py; append the listing's WHERE.
+        """
+        checksums = ' + '.join(xmin_checksum(alias) for alias in (self.alias,) + shape.joins)
+        return f"""
+        SELECT count(*), {last_modified}, {checksums}
+        {self.from_sql}
+        {self._join_sql(shape.joins)}
+        """
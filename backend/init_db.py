@@ -6,6 +6,7 @@ import re
 import requests
 from werkzeug.security import generate_password_hash
 import uuid
+import room_holds
 
 def get_db_connection():
     dotenv_path = Path(__file__).resolve().parent / '.env'
@@ -166,13 +167,13 @@ def main():
             """),
             ('disciplines', """
                 id SERIAL PRIMARY KEY,
-                name VARCHAR(255) NOT NULL,
+                name VARCHAR(255) NOT NULL UNIQUE,
                 year_of_study INTEGER,
                 specialization VARCHAR(255)
             """),
             ('discipline_teachers', """
                 discipline_id INTEGER REFERENCES disciplines(id) ON DELETE CASCADE,
-                teacher_id VARCHAR(255) REFERENCES users(id) ON DELETE CASCADE,
+                teacher_id VARCHAR(255) REFERENCES users(id) ON DELETE CASCADE ON UPDATE CASCADE,
                 PRIMARY KEY (discipline_id, teacher_id)
             """),
             ('exams', """
@@ -180,16 +181,17 @@ def main():
                 discipline_id INTEGER REFERENCES disciplines(id),
                 exam_type VARCHAR(50) CHECK (exam_type IN ('EXAM', 'PROJECT')),
                 student_group VARCHAR(50),
-                main_teacher_id VARCHAR(255) REFERENCES users(id),
-                second_teacher_id VARCHAR(255) REFERENCES users(id),
+                main_teacher_id VARCHAR(255) REFERENCES users(id) ON UPDATE CASCADE,
+                second_teacher_id VARCHAR(255) REFERENCES users(id) ON UPDATE CASCADE,
                 status VARCHAR(50) DEFAULT 'DRAFT' CHECK (status IN ('DRAFT', 'PROPOSED', 'ACCEPTED', 'REJECTED', 'CANCELLED', 'RESCHEDULED', 'CONFIRMED')),
                 exam_date TIMESTAMP,
                 start_hour INTEGER CHECK (start_hour >= 8 AND start_hour <= 18),
                 duration INTEGER DEFAULT 120,
                 room_id INTEGER REFERENCES rooms(id),
-                created_by VARCHAR(255) REFERENCES users(id),
+                created_by VARCHAR(255) REFERENCES users(id) ON UPDATE CASCADE,
                 created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+                updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+                UNIQUE (discipline_id, student_group)
             """),
             ('exam_periods', """
                 id SERIAL PRIMARY KEY,
@@ -197,14 +199,38 @@ def main():
                 start_date DATE NOT NULL,
                 end_date DATE NOT NULL,
                 is_active BOOLEAN DEFAULT FALSE
+            """),
+            # Deleted exams, kept for the change feed (change_feed.py)
+            ('exam_tombstones', """
+                exam_id INTEGER NOT NULL,
+                student_group VARCHAR(50),
+                main_teacher_id VARCHAR(255) REFERENCES users(id) ON UPDATE CASCADE ON DELETE SET NULL,
+                second_teacher_id VARCHAR(255) REFERENCES users(id) ON UPDATE CASCADE ON DELETE SET NULL,
+                deleted_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT CURRENT_TIMESTAMP
             """)
         ]
+        # Keyset pagination sort keys, see pagination.py; disciplines.name is already UNIQUE
+        indexes = [
+            ('exams_listing_idx', "exams (status, COALESCE(exam_date, 'infinity'::timestamp), COALESCE(start_hour, 2147483647), id)"),
+            ('exams_date_idx', "exams (COALESCE(exam_date, 'infinity'::timestamp), id)"),
+            ('users_full_name_idx', "users (full_name, id)"),
+            # Case-insensitive account lookup for uploads, see bulk_import.py
+            ('users_email_lower_idx', "users (lower(email))"),
+            # Change feed positions, see change_feed.py
+            ('exams_updated_at_idx', "exams (updated_at, id)"),
+            ('exam_tombstones_deleted_at_idx', "exam_tombstones (deleted_at, exam_id)"),
+        ]
         print("Dropping existing tables...")
         for table_name, _ in reversed(tables):
             cursor.execute(f"DROP TABLE IF EXISTS {table_name} CASCADE;")
         print("Creating tables...")
         for table_name, schema in tables:
             cursor.execute(f"CREATE TABLE {table_name} ({schema});")
+        for index_name, definition in indexes:
+            cursor.execute(f"CREATE INDEX {index_name} ON {definition};")
+        # Short-lived room-slot holds are UNLOGGED, see room_holds.py
+        cursor.execute("DROP TABLE IF EXISTS room_holds;")
+        room_holds.create_table(cursor)
         conn.commit()
         print("All tables created successfully.")
         populate_initial_data(conn)
@@ -0,0 +1,199 @@
+"""
+Keyset (cursor) pagination for listing endpoints.
+A listing declares a Keyset: the ORDER BY expressions it already used plus a
+unique tie-breaker. A page is fetched with a row comparison on those
+expressions (`(a, b, id) > (%s, %s, %s)`), which an index on the same
+expressions answers directly, so page N costs the same as page 1.
+Pagination is opt-in: without ?limit= or ?cursor= a listing returns every
+row as before. Paged responses keep the JSON array body and send the
+continuation token in the X-Next-Cursor and Link headers.
+"""
+
+import base64
+import binascii
+from collections import namedtuple
+from urllib.parse import urlencode
+
+import orjson
+from flask import request
+
+from serialization import rows_response, query_rows_response
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+
+NEXT_CURSOR_HEADER = 'X-Next-Cursor'
+
+# expression: SQL sort expression; column: result column holding its value;
+# cast: SQL type the token value is cast to; null_value: what NULL sorts as
+# (the expression must COALESCE to the same value)
+KeyColumn = namedtuple('KeyColumn', ['expression', 'column', 'cast', 'null_value'], defaults=(None,))
+
+# All columns sort in the same direction so one row comparison covers them
+Keyset = namedtuple('Keyset', ['name', 'columns', 'descending'], defaults=(False,))
+
+# Sort keys of the listing endpoints; indexes on the same expressions are in init_db.py
+EXAM_DATE_SENTINEL = 'infinity'
+START_HOUR_SENTINEL = 2147483647
+
+EXAM_LISTING_KEYSET = Keyset('exams', (
+    KeyColumn('e.status', 'status', 'text'),
+    KeyColumn(f"COALESCE(e.exam_date, '{EXAM_DATE_SENTINEL}'::timestamp)", 'exam_date', 'timestamp', EXAM_DATE_SENTINEL),
+    KeyColumn(f"COALESCE(e.start_hour, {START_HOUR_SENTINEL})", 'start_hour', 'int', START_HOUR_SENTINEL),
+    KeyColumn('e.id', 'id', 'int'),
+))
+ADMIN_EXAMS_KEYSET = Keyset('admin_exams', (
+    KeyColumn(f"COALESCE(e.exam_date, '{EXAM_DATE_SENTINEL}'::timestamp)", 'exam_date', 'timestamp', EXAM_DATE_SENTINEL),
+    KeyColumn('e.id', 'exam_id', 'int'),
+), descending=True)
+USERS_KEYSET = Keyset('users', (
+    KeyColumn('u.full_name', 'full_name', 'text'),
+    KeyColumn('u.id', 'id', 'text'),
+))
+DISCIPLINES_KEYSET = Keyset('disciplines', (
+    KeyColumn('d.name', 'name', 'text'),
+))
+
+
+class PaginationError(ValueError):
+    """Invalid limit or cursor; reported to the client as a 400"""
+
+
+Page = namedtuple('Page', ['limit', 'after'])
+
+
+def encode_cursor(keyset, values):
+    payload = orjson.dumps([keyset.name, values])
+    return base64.urlsafe_b64encode(payload).rstrip(b'=').decode('ascii')
+
+
+def decode_cursor(keyset, token):
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        name, values = orjson.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+    except (binascii.Error, ValueError, TypeError, UnicodeEncodeError):
+        raise PaginationError("Invalid cursor")
+    if name != keyset.name or not isinstance(values, list) or len(values) != len(keyset.columns):
+        raise PaginationError("Cursor does not belong to this listing")
+    return values
+
+
+def parse_page(args, keyset):
+    """
+    Page requested by the query string, or None when the client did not ask
+    for pagination. Raises PaginationError on a bad limit or cursor.
+    """
+    limit = args.get('limit')
+    token = args.get('cursor')
+    if limit is None and token is None:
+        return None
+    if limit is None:
+        limit = DEFAULT_PAGE_SIZE
+    else:
+        try:
+            limit = int(limit)
+        except ValueError:
+            raise PaginationError("limit must be an integer")
+        if not 1 <= limit <= MAX_PAGE_SIZE:
+            raise PaginationError(f"limit must be between 1 and {MAX_PAGE_SIZE}")
+    after = decode_cursor(keyset, token) if token else None
+    return Page(limit, after)
+
+
+def key_columns(keyset):
+    """Result columns a page must contain to build its next cursor"""
+    return [col.column for col in keyset.columns]
+
+
+def order_by(keyset):
+    direction = ' DESC' if keyset.descending else ''
+    return ', '.join(col.expression + direction for col in keyset.columns)
+
+
+def seek_condition(keyset, page):
+    """(sql, params) restricting rows to those after the page's cursor, or None on the first page"""
+    if not page or page.after is None:
+        return None
+    left = ', '.join(col.expression for col in keyset.columns)
+    right = ', '.join(f'%s::{col.cast}' for col in keyset.columns)
+    operator = '<' if keyset.descending else '>'
+    return f"({left}) {operator} ({right})", list(page.after)
+
+
+def keyset_query(select_sql, keyset, page, conditions=(), params=()):
+    """
+    Append WHERE, ORDER BY and (when paging) LIMIT to `select_sql`.
+    `conditions` are extra SQL predicates whose placeholders are filled by `params`.
+    One row past the page is fetched to tell whether another page follows.
+    """
+    conditions, params = list(conditions), list(params)
+    seek = seek_condition(keyset, page)
+    if seek:
+        conditions.append(seek[0])
+        params += seek[1]
+    sql = select_sql
+    if conditions:
+        sql += " WHERE " + " AND ".join(conditions)
+    sql += " ORDER BY " + order_by(keyset)
+    if page:
+        sql += " LIMIT %s"
+        params.append(page.limit + 1)
+    return sql, params
+
+
+def next_cursor(keyset, item):
+    """Continuation token for the page ending with `item` (a mapping of result columns)"""
+    values = []
+    for col in keyset.columns:
+        value = item[col.column]
+        if value is None:
+            value = col.null_value
+        elif hasattr(value, 'isoformat'):
+            value = value.isoformat()
+        values.append(value)
+    return encode_cursor(keyset, values)
+
+
+def set_next_cursor(response, token):
+    """Attach a continuation token to a paged response"""
+    response.headers[NEXT_CURSOR_HEADER] = token
+    args = request.args.to_dict()
+    args['cursor'] = token
+    response.headers['Link'] = f'<{request.base_url}?{urlencode(args)}>; rel="next"'
+    return response
+
+
+def trim_page(items, page):
+    """Drop the look-ahead item; returns (items, has_more)"""
+    if len(items) > page.limit:
+        return items[:page.limit], True
+    return items, False
+
+
+def page_response(cursor, rows, keyset, page):
+    """JSON array response for one page of `rows`, with the next cursor when more rows follow"""
+    rows, has_more = trim_page(rows, page)
+    response = rows_response(cursor, rows)
+    if has_more:
+        columns = [desc[0] for desc in cursor.description]
+        set_next_cursor(response, next_cursor(keyset, dict(zip(columns, rows[-1]))))
+    return response
+
+
+def listing_response(conn, select_sql, keyset, page, conditions=(), params=(), name='listing_cursor'):
+    """
+    Response for a listing endpoint: one page when `page` is set, otherwise
+    every row (streamed when large). Takes ownership of `conn`.
+    """
+    query, params = keyset_query(select_sql, keyset, page, conditions, params)
+    if not page:
+        return query_rows_response(conn, query, params, name=name)
+    try:
+        cursor = conn.cursor()
+        cursor.execute(query, params)
+        rows = cursor.fetchall()
+        response = page_response(cursor, rows, keyset, page)
+        cursor.close()
+        return response
+    finally:
+        conn.close()
@@ -0,0 +1,183 @@
+"""
+Columnar (Parquet) snapshot of the exam schedule for offline analytics.
+Exams are joined with disciplines, rooms, teachers and the exam period they
+fall in, streamed from a server-side cursor and written as Arrow record
+batches, so the snapshot loads straight into pandas (pd.read_parquet).
+
+Usage from the command line:
+    python parquet_export.py exams.parquet
+    python parquet_export.py exams_dataset/ --partition-by-period
+"""
+
+import argparse
+import datetime
+import tempfile
+
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+from flask import jsonify, send_file
+from database import get_db_connection, iter_server_cursor
+
+# Flag to indicate if the database is available
+DB_AVAILABLE = False
+
+COMPRESSION = 'zstd'
+BATCH_SIZE = 5000
+# Spill the in-flight Parquet file to disk above this size when serving it over HTTP
+SPOOL_MAX_SIZE = 8 * 1024 * 1024
+
+SNAPSHOT_QUERY = """
+    SELECT
+        e.id as exam_id,
+        e.status,
+        e.exam_type,
+        e.student_group,
+        e.exam_date,
+        e.start_hour,
+        e.duration,
+        d.id as discipline_id,
+        d.name as discipline_name,
+        d.year_of_study,
+        d.specialization,
+        r.id as room_id,
+        r.name as room_name,
+        r.building_name,
+        r.capacity as room_capacity,
+        u1.id as main_teacher_id,
+        u1.full_name as main_teacher,
+        u2.id as second_teacher_id,
+        u2.full_name as second_teacher,
+        p.name as exam_period,
+        e.created_at,
+        e.updated_at
+    FROM exams e
+    JOIN disciplines d ON e.discipline_id = d.id
+    LEFT JOIN rooms r ON e.room_id = r.id
+    LEFT JOIN users u1 ON e.main_teacher_id = u1.id
+    LEFT JOIN users u2 ON e.second_teacher_id = u2.id
+    LEFT JOIN LATERAL (
+        SELECT ep.name FROM exam_periods ep
+        WHERE e.exam_date::date BETWEEN ep.start_date AND ep.end_date
+        ORDER BY ep.start_date
+        LIMIT 1
+    ) p ON true
+    ORDER BY e.exam_date NULLS LAST, e.start_hour, e.id
+"""
+
+# Column order must match SNAPSHOT_QUERY
+SNAPSHOT_SCHEMA = pa.schema([
+    ('exam_id', pa.int32()),
+    ('status', pa.string()),
+    ('exam_type', pa.string()),
+    ('student_group', pa.string()),
+    ('exam_date', pa.timestamp('s')),
+    ('start_hour', pa.int16()),
+    ('duration', pa.int16()),
+    ('discipline_id', pa.int32()),
+    ('discipline_name', pa.string()),
+    ('year_of_study', pa.int16()),
+    ('specialization', pa.string()),
+    ('room_id', pa.int32()),
+    ('room_name', pa.string()),
+    ('building_name', pa.string()),
+    ('room_capacity', pa.int32()),
+    ('main_teacher_id', pa.string()),
+    ('main_teacher', pa.string()),
+    ('second_teacher_id', pa.string()),
+    ('second_teacher', pa.string()),
+    ('exam_period', pa.string()),
+    ('created_at', pa.timestamp('us', tz='UTC')),
+    ('updated_at', pa.timestamp('us', tz='UTC')),
+])
+
+
+def iter_snapshot_batches(conn, batch_size=BATCH_SIZE):
+    """Yield typed Arrow record batches straight from a server-side cursor"""
+    for _, rows in iter_server_cursor(conn, SNAPSHOT_QUERY, fetch_size=batch_size, name='parquet_snapshot'):
+        columns = list(zip(*rows))
+        yield pa.RecordBatch.from_arrays(
+            [pa.array(values, type=field.type) for values, field in zip(columns, SNAPSHOT_SCHEMA)],
+            schema=SNAPSHOT_SCHEMA
+        )
+
+
+def write_snapshot(conn, sink, batch_size=BATCH_SIZE):
+    """Write the snapshot as one Parquet file to a path or binary file object. Returns the row count."""
+    total = 0
+    with pq.ParquetWriter(sink, SNAPSHOT_SCHEMA, compression=COMPRESSION) as writer:
+        for batch in iter_snapshot_batches(conn, batch_size):
+            writer.write_batch(batch)
+            total += batch.num_rows
+    return total
+
+
+def write_partitioned_snapshot(conn, base_dir, batch_size=BATCH_SIZE):
+    """Write the snapshot as a hive-partitioned dataset: base_dir/exam_period=<name>/*.parquet"""
+    reader = pa.RecordBatchReader.from_batches(SNAPSHOT_SCHEMA, iter_snapshot_batches(conn, batch_size))
+    ds.write_dataset(
+        reader,
+        base_dir,
+        format='parquet',
+        partitioning=['exam_period'],
+        partitioning_flavor='hive',
+        file_options=ds.ParquetFileFormat().make_write_options(compression=COMPRESSION),
+        existing_data_behavior='delete_matching'
+    )
+
+
+def export_exams_parquet():
+    """
+    Export the exam snapshot as a single compressed Parquet file
+    """
+    if not DB_AVAILABLE:
+        return jsonify({"error": "Database not available"}), 500
+
+    conn = None
+    try:
+        conn = get_db_connection()
+        output = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE)
+        write_snapshot(conn, output)
+        output.seek(0)
+
+        filename = f"exams_snapshot_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}.parquet"
+        return send_file(
+            output,
+            download_name=filename,
+            as_attachment=True,
+            mimetype='application/vnd.apache.parquet'
+        )
+    except Exception as e:
+        print(f"Error exporting exams to Parquet: {e}")
+        return jsonify({"error": "An internal error occurred"}), 500
+    finally:
+        if conn:
+            conn.close()
+
+
+def main():
+    from dotenv import load_dotenv
+    load_dotenv()
+
+    parser = argparse.ArgumentParser(description="Export the exam schedule as a Parquet snapshot.")
+    parser.add_argument('output', help="Parquet file, or a directory with --partition-by-period")
+    parser.add_argument('--partition-by-period', action='store_true',
+                        help="Write a dataset partitioned by exam period instead of a single file")
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE,
+                        help=f"Rows per record batch (default {BATCH_SIZE})")
+    args = parser.parse_args()
+
+    conn = get_db_connection()
+    try:
+        if args.partition_by_period:
+            write_partitioned_snapshot(conn, args.output, args.batch_size)
+            print(f"Snapshot written to {args.output}/")
+        else:
+            total = write_snapshot(conn, args.output, args.batch_size)
+            print(f"Wrote {total} exams to {args.output}")
+    finally:
+        conn.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -7,42 +7,36 @@ from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.units import inch
 from flask import send_file, jsonify, g
 from datetime import datetime
-# Import ReportLab's built-in font support
+from functools import lru_cache
 from reportlab.pdfbase import pdfmetrics
-from reportlab.pdfbase.cidfonts import UnicodeCIDFont
 from reportlab.pdfbase.ttfonts import TTFont
+from reportlab.lib.fonts import addMapping
 
 # Flag to indicate if the database is available
 DB_AVAILABLE = False
 
-# Register fonts that support Romanian characters
-# Use ReportLab's built-in Unicode support
-try:
-    # Register a CID font with Unicode support
-    pdfmetrics.registerFont(UnicodeCIDFont('STSong-Light'))
-    
-    # If we have access to the system fonts directory, try to register Arial which usually has good Unicode support
-    system_font_paths = [
-        # Windows font paths
-        'C:/Windows/Fonts/arial.ttf',
-        'C:/Windows/Fonts/arialbd.ttf',
-        # Linux font paths
-        '/usr/share/fonts/truetype/msttcorefonts/Arial.ttf',
-        '/usr/share/fonts/truetype/msttcorefonts/Arial_Bold.ttf',
-    ]
-    
-    for font_path in system_font_paths:
-        if os.path.exists(font_path):
-            if 'arialbd' in font_path.lower() or 'bold' in font_path.lower():
-                pdfmetrics.registerFont(TTFont('Arial-Bold', font_path))
-            else:
-                pdfmetrics.registerFont(TTFont('Arial', font_path))
-    
-    UNICODE_FONT_AVAILABLE = True
-except Exception as e:
-    print(f"Warning: Could not register Unicode fonts: {e}")
-    # Fallback to default fonts
-    UNICODE_FONT_AVAILABLE = False
+# Bundled DejaVu Sans, subset to Latin / Latin Extended so it carries the
+# Romanian diacritics (ă, â, î, ș, ț and the cedilla variants) on every OS.
+FONTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fonts')
+BODY_FONT = 'DejaVuSans'
+BOLD_FONT = 'DejaVuSans-Bold'
+
+@lru_cache(maxsize=None)
+def get_pdf_fonts():
+    """
+    Register the bundled fonts on first use and return (body_font, bold_font).
+    ReportLab embeds only the glyphs a document uses, and the registered font
+    objects are reused by every later render.
+    """
+    try:
+        pdfmetrics.registerFont(TTFont(BODY_FONT, os.path.join(FONTS_DIR, 'DejaVuSans.ttf')))
+        pdfmetrics.registerFont(TTFont(BOLD_FONT, os.path.join(FONTS_DIR, 'DejaVuSans-Bold.ttf')))
+        addMapping(BODY_FONT, 0, 0, BODY_FONT)
+        addMapping(BODY_FONT, 1, 0, BOLD_FONT)
+        return BODY_FONT, BOLD_FONT
+    except Exception as e:
+        print(f"Warning: Could not register bundled fonts, falling back to Helvetica: {e}")
+        return 'Helvetica', 'Helvetica-Bold'
 
 def get_db_connection():
     # This function should be imported from your main app.py
@@ -112,18 +106,12 @@ def export_exams_pdf():
         title_style = styles['Heading1']
         title_style.alignment = 1  # Center alignment
         
-        # Use Unicode-compatible font if available
-        if UNICODE_FONT_AVAILABLE:
-            # Try to use Arial if available (good Unicode support on Windows)
-            if os.path.exists('C:/Windows/Fonts/arialbd.ttf'):
-                title_style.fontName = 'Arial-Bold'
-                for style_name in styles.byName:
-                    styles[style_name].fontName = 'Arial'
-            else:
-                # Use STSong-Light as fallback (built-in CID font with Unicode support)
-                title_style.fontName = 'STSong-Light'
-                for style_name in styles.byName:
-                    styles[style_name].fontName = 'STSong-Light'
+        # Use the bundled font so Romanian diacritics render correctly
+        body_font, header_font = get_pdf_fonts()
+        title_style.fontName = header_font
+        for style_name in styles.byName:
+            if style_name != 'Heading1':
+                styles[style_name].fontName = body_font
         
         # Create title
         title = Paragraph("Examene", title_style)
@@ -173,20 +161,6 @@ def export_exams_pdf():
         table = Table(data, repeatRows=1)
         
         # Style the table
-        # Use Unicode-compatible fonts if available
-        header_font = 'Helvetica-Bold'
-        body_font = 'Helvetica'
-        
-        if UNICODE_FONT_AVAILABLE:
-            # Try to use Arial if available (good Unicode support on Windows)
-            if os.path.exists('C:/Windows/Fonts/arialbd.ttf'):
-                header_font = 'Arial-Bold'
-                body_font = 'Arial'
-            else:
-                # Use STSong-Light as fallback (built-in CID font with Unicode support)
-                header_font = 'STSong-Light'
-                body_font = 'STSong-Light'
-        
         table_style = TableStyle([
             ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
             ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
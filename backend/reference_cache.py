@@ -0,0 +1,158 @@
+"""
+In-process cache of reference data responses: rooms, teachers, disciplines,
+student groups and roles. These lists change a few times a term but every
+dashboard load fetches them, so the encoded body is kept per URL and caller
+role and served without touching the database. Each entry is compressed at
+most once per encoding (compression.Precompressed) and carries an ETag, so a
+revalidating client gets 304 from memory too.
+
+Entries belong to topics (the tables they are read from). Write handlers
+call invalidate() with the topics they change once their transaction has
+committed. Writes made by another process (a second worker, init_db.py)
+are only picked up when the entry expires, after TTL_SECONDS.
+Only buffered 200 responses are cached; streamed listings are not held in
+memory. Hit and miss counts per endpoint are served by get_cache_stats.
+These endpoints will be imported into the main app.py file.
+"""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from functools import wraps
+
+from flask import current_app, jsonify, request, g
+
+import conditional
+from compression import Precompressed
+from pagination import NEXT_CURSOR_HEADER
+
+# Bounds how stale an entry can get when a write happens in another process
+TTL_SECONDS = 60
+# Least recently used entries are evicted past this; every distinct
+# ?limit=/?cursor= combination is its own entry
+MAX_ENTRIES = 256
+
+# Response headers kept with the body; the rest are rebuilt on every hit
+CACHED_HEADERS = (NEXT_CURSOR_HEADER, 'Link')
+
+# body: Precompressed; etag: weak ETag value; generations: topic generations
+# the body was read under; expires_at: time.monotonic() deadline
+Entry = namedtuple('Entry', ['body', 'mimetype', 'headers', 'etag', 'topics', 'generations', 'expires_at'])
+
+_lock = threading.Lock()
+_entries = OrderedDict()
+# Bumped by every invalidate(); a response read before a bump is not stored
+_generations = {}
+_stats = {}
+
+
+def _key():
+    # The role is part of the key: views check it themselves and answer
+    # other roles with a 403, which is never cached
+    return request.url, g.current_user.get('role')
+
+
+def _count(outcome):
+    with _lock:
+        counts = _stats.setdefault(request.endpoint, {'hits': 0, 'misses': 0})
+        counts[outcome] += 1
+
+
+def _lookup(key):
+    with _lock:
+        entry = _entries.get(key)
+        if entry is None:
+            return None
+        if entry.expires_at <= time.monotonic():
+            del _entries[key]
+            return None
+        _entries.move_to_end(key)
+        return entry
+
+
+def _store(key, response, topics, generations):
+    """Entry for a buffered 200 `response`, kept unless a topic was invalidated meanwhile"""
+    data = response.get_data()
+    etag, _ = response.get_etag()
+    entry = Entry(
+        Precompressed(data),
+        response.mimetype,
+        {name: response.headers[name] for name in CACHED_HEADERS if name in response.headers},
+        etag or hashlib.blake2b(data, digest_size=16).hexdigest(),
+        topics,
+        generations,
+        time.monotonic() + TTL_SECONDS,
+    )
+    with _lock:
+        if all(_generations.get(topic, 0) == generations[topic] for topic in topics):
+            _entries[key] = entry
+            _entries.move_to_end(key)
+            while len(_entries) > MAX_ENTRIES:
+                _entries.popitem(last=False)
+    return entry
+
+
+def _serve(entry):
+    validator = conditional.Validator(entry.etag, None)
+    unchanged = conditional.not_modified(validator)
+    if unchanged:
+        return unchanged
+    return conditional.add_validators(entry.body.response(entry.mimetype, entry.headers), validator)
+
+
+def cached(*topics):
+    """
+    Cache the decorated GET view's 200 responses until one of `topics` is
+    invalidated. Goes below the auth decorators, which set g.current_user.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            key = _key()
+            entry = _lookup(key)
+            if entry is not None:
+                _count('hits')
+                return _serve(entry)
+            _count('misses')
+
+            with _lock:
+                generations = {topic: _generations.get(topic, 0) for topic in topics}
+            response = current_app.make_response(view(*args, **kwargs))
+            if response.status_code != 200 or response.is_streamed or 'Content-Encoding' in response.headers:
+                return response
+            return _serve(_store(key, response, topics, generations))
+        return wrapper
+    return decorator
+
+
+def invalidate(*topics):
+    """Drop every entry read from `topics`; call after the write has committed"""
+    with _lock:
+        for topic in topics:
+            _generations[topic] = _generations.get(topic, 0) + 1
+        for key in [key for key, entry in _entries.items() if set(entry.topics) & set(topics)]:
+            del _entries[key]
+
+
+def _ratio(hits, misses):
+    total = hits + misses
+    return round(hits / total, 4) if total else None
+
+
+def get_cache_stats():
+    """Hit ratio of the reference cache, overall and per endpoint, since the process started"""
+    with _lock:
+        endpoints = {endpoint: dict(counts) for endpoint, counts in _stats.items()}
+        entries = len(_entries)
+    hits = sum(counts['hits'] for counts in endpoints.values())
+    misses = sum(counts['misses'] for counts in endpoints.values())
+    for counts in endpoints.values():
+        counts['hit_ratio'] = _ratio(counts['hits'], counts['misses'])
+    return jsonify({
+        "hits": hits,
+        "misses": misses,
+        "hit_ratio": _ratio(hits, misses),
+        "entries": entries,
+        "endpoints": endpoints
+    }), 200
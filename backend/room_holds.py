@@ -0,0 +1,266 @@
+"""
+Short-lived room-slot holds for group leaders.
+While composing a proposal a group leader can hold a (room, date, hour) slot
+for a few minutes; other group leaders see the slot as busy until the hold
+expires or is released, so they pick another room instead of losing the race
+with a 409 after submitting. Holds live in an UNLOGGED table: they are cheap
+to write and it does not matter if a crash wipes them.
+These endpoints will be imported into the main app.py file.
+"""
+
+import threading
+from datetime import datetime
+
+from flask import jsonify, request, g
+from database import get_db_connection, advisory_xact_lock, room_day_lock_key
+from serialization import rows_to_dicts
+
+# Import DB_AVAILABLE from app.py when this module is imported
+DB_AVAILABLE = None
+
+HOLD_TTL_SECONDS = 300
+# Slots one group leader may hold at the same time
+MAX_HOLDS_PER_USER = 5
+
+ROOM_HOLDS_SCHEMA = """
+    room_id INTEGER NOT NULL,
+    slot_date DATE NOT NULL,
+    start_hour INTEGER NOT NULL,
+    held_by VARCHAR(255) NOT NULL,
+    expires_at TIMESTAMP WITH TIME ZONE NOT NULL,
+    PRIMARY KEY (room_id, slot_date, start_hour)
+"""
+
+# SQL predicate: the slot (room_id, date, hour) is not held by anyone but %s
+SLOT_NOT_HELD_CONDITION = """
+    NOT EXISTS (
+        SELECT 1 FROM room_holds h
+        WHERE h.room_id = %s
+          AND h.slot_date = %s::date
+          AND h.start_hour = %s
+          AND h.expires_at > CURRENT_TIMESTAMP
+          AND h.held_by <> %s
+    )
+"""
+
+_table_ready = False
+_table_lock = threading.Lock()
+
+
+def create_table(cursor):
+    cursor.execute(f"CREATE UNLOGGED TABLE IF NOT EXISTS room_holds ({ROOM_HOLDS_SCHEMA})")
+
+
+def ensure_table():
+    """Create room_holds on first use in this process, for databases initialized before holds existed"""
+    global _table_ready
+    if _table_ready:
+        return
+    with _table_lock:
+        if _table_ready:
+            return
+        # Own connection, so the caller's transaction is not committed early
+        conn = get_db_connection()
+        try:
+            cursor = conn.cursor()
+            create_table(cursor)
+            conn.commit()
+            cursor.close()
+        finally:
+            conn.close()
+        _table_ready = True
+
+
+def held_rooms(cursor, slot_date, start_hour, user_id):
+    """Ids of rooms held by other users at the given slot"""
+    ensure_table()
+    cursor.execute(
+        """
+        SELECT room_id FROM room_holds
+        WHERE slot_date = %s::date AND start_hour = %s
+          AND expires_at > CURRENT_TIMESTAMP AND held_by <> %s
+        """,
+        (slot_date, start_hour, user_id)
+    )
+    return {row[0] for row in cursor.fetchall()}
+
+
+def held_slots(cursor, room_ids, days, user_id):
+    """(room_id, date, hour) slots held by other users for the given rooms and days"""
+    ensure_table()
+    cursor.execute(
+        """
+        SELECT room_id, slot_date, start_hour FROM room_holds
+        WHERE room_id = ANY(%s::int[]) AND slot_date = ANY(%s::date[])
+          AND expires_at > CURRENT_TIMESTAMP AND held_by <> %s
+        """,
+        (list(room_ids), list(days), user_id)
+    )
+    return {tuple(row) for row in cursor.fetchall()}
+
+
+def release_user_holds(cursor, user_id, slots):
+    """Drop the user's holds on slots they have just proposed; `slots` is a list of (room_id, date, hour)"""
+    if not slots:
+        return
+    room_ids, days, hours = (list(col) for col in zip(*slots))
+    cursor.execute(
+        """
+        DELETE FROM room_holds h
+        USING unnest(%s::int[], %s::date[], %s::int[]) AS s(room_id, slot_date, start_hour)
+        WHERE h.held_by = %s
+          AND h.room_id = s.room_id AND h.slot_date = s.slot_date AND h.start_hour = s.start_hour
+        """,
+        (room_ids, days, hours, user_id)
+    )
+
+
+def _parse_hold(data):
+    try:
+        room_id = int(data.get('room_id'))
+        start_hour = int(data.get('start_hour'))
+        slot_date = datetime.strptime(data.get('exam_date'), '%Y-%m-%d').date()
+    except (TypeError, ValueError):
+        return None, "room_id, exam_date (YYYY-MM-DD) and start_hour are required"
+    if not (8 <= start_hour <= 20):
+        return None, "Start hour must be between 8 and 20"
+    if slot_date.weekday() >= 5:
+        return None, "Exams can only be scheduled on weekdays (Monday to Friday)"
+    return (room_id, slot_date, start_hour), None
+
+
+def place_hold():
+    """Hold a room slot for HOLD_TTL_SECONDS, or extend the caller's own hold"""
+    if not DB_AVAILABLE:
+        return jsonify({"error": "Database not available"}), 500
+
+    if g.current_user.get('role') != 'SEF_GRUPA':
+        return jsonify({"error": "Only group leaders can hold rooms"}), 403
+
+    slot, error = _parse_hold(request.get_json(silent=True) or {})
+    if error:
+        return jsonify({"error": error}), 400
+    room_id, slot_date, start_hour = slot
+    user_id = g.current_user.get('id')
+
+    conn = None
+    try:
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        ensure_table()
+
+        cursor.execute("DELETE FROM room_holds WHERE expires_at <= CURRENT_TIMESTAMP")
+        cursor.execute(
+            "SELECT COUNT(*) FROM room_holds WHERE held_by = %s AND NOT (room_id = %s AND slot_date = %s AND start_hour = %s)",
+            (user_id, room_id, slot_date, start_hour)
+        )
+        if cursor.fetchone()[0] >= MAX_HOLDS_PER_USER:
+            conn.commit()
+            return jsonify({"error": f"You can hold at most {MAX_HOLDS_PER_USER} room slots at a time"}), 429
+
+        # Same lock as proposals, so a hold and a proposal cannot both claim the slot
+        advisory_xact_lock(cursor, [room_day_lock_key(room_id, slot_date)])
+        # Take the slot if it is free, or refresh it if the caller already holds it
+        cursor.execute(
+            """
+            INSERT INTO room_holds (room_id, slot_date, start_hour, held_by, expires_at)
+            SELECT r.id, %s, %s, %s, CURRENT_TIMESTAMP + make_interval(secs => %s)
+            FROM rooms r
+            WHERE r.id = %s
+              AND NOT EXISTS (
+                  SELECT 1 FROM exams e
+                  WHERE e.room_id = r.id AND e.exam_date::date = %s AND e.start_hour = %s
+                    AND e.status IN ('PROPOSED', 'ACCEPTED', 'CONFIRMED')
+              )
+            ON CONFLICT (room_id, slot_date, start_hour) DO UPDATE
+                SET held_by = EXCLUDED.held_by, expires_at = EXCLUDED.expires_at
+                WHERE room_holds.held_by = EXCLUDED.held_by
+                   OR room_holds.expires_at <= CURRENT_TIMESTAMP
+            RETURNING expires_at
+            """,
+            (slot_date, start_hour, user_id, HOLD_TTL_SECONDS, room_id, slot_date, start_hour)
+        )
+        row = cursor.fetchone()
+        conn.commit()
+        if row:
+            return jsonify({
+                "room_id": room_id,
+                "exam_date": slot_date,
+                "start_hour": start_hour,
+                "expires_at": row[0]
+            }), 201
+
+        cursor.execute("SELECT 1 FROM rooms WHERE id = %s", (room_id,))
+        if not cursor.fetchone():
+            return jsonify({"error": "Room not found"}), 404
+        return jsonify({"error": "Room is already booked or held for the selected date and time"}), 409
+    except Exception as e:
+        if conn:
+            conn.rollback()
+        print(f"Error placing room hold: {e}")
+        return jsonify({"error": "An internal error occurred"}), 500
+    finally:
+        if conn:
+            cursor.close()
+            conn.close()
+
+
+def release_hold():
+    """Release one of the caller's holds before it expires"""
+    if not DB_AVAILABLE:
+        return jsonify({"error": "Database not available"}), 500
+
+    slot, error = _parse_hold(request.get_json(silent=True) or {})
+    if error:
+        return jsonify({"error": error}), 400
+
+    conn = None
+    try:
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        ensure_table()
+        release_user_holds(cursor, g.current_user.get('id'), [slot])
+        released = cursor.rowcount > 0
+        conn.commit()
+        if not released:
+            return jsonify({"error": "Hold not found"}), 404
+        return jsonify({"message": "Hold released"}), 200
+    except Exception as e:
+        if conn:
+            conn.rollback()
+        print(f"Error releasing room hold: {e}")
+        return jsonify({"error": "An internal error occurred"}), 500
+    finally:
+        if conn:
+            cursor.close()
+            conn.close()
+
+
+def get_my_holds():
+    """The caller's active holds"""
+    if not DB_AVAILABLE:
+        return jsonify({"error": "Database not available"}), 500
+
+    conn = None
+    try:
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        ensure_table()
+        cursor.execute(
+            """
+            SELECT h.room_id, r.name as room_name, h.slot_date as exam_date, h.start_hour, h.expires_at
+            FROM room_holds h
+            JOIN rooms r ON r.id = h.room_id
+            WHERE h.held_by = %s AND h.expires_at > CURRENT_TIMESTAMP
+            ORDER BY h.expires_at
+            """,
+            (g.current_user.get('id'),)
+        )
+        return jsonify(rows_to_dicts(cursor, cursor.fetchall())), 200
+    except Exception as e:
+        print(f"Error fetching room holds: {e}")
+        return jsonify({"error": "An internal error occurred"}), 500
+    finally:
+        if conn:
+            cursor.close()
+            conn.close()
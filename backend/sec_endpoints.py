@@ -4,9 +4,16 @@ These endpoints will be imported into the main app.py file.
 """
 
 from flask import jsonify, request, g
-from database import get_db_connection
+from database import get_db_connection, iter_server_cursor
 from auth import token_required
+from exam_transitions import TRANSITIONS, notify_changes
+from serialization import rows_response
+from pagination import parse_page, listing_response, key_columns, PaginationError, EXAM_LISTING_KEYSET
+from fieldsets import Listing, Field, FieldsError, EXAM_JOINS
+import exam_filters
 import pandas as pd
+import xlsxwriter
+import re
 from io import BytesIO
 import datetime
 # Import DB_AVAILABLE from app.py when this module is imported
@@ -14,6 +21,82 @@ DB_AVAILABLE = None
 
 # --- SEC Role Endpoints ---
 
+# Validates a single exam and inserts it in one round trip. Every check is
+# evaluated (so the caller can report the first failing one) and the INSERT
+# only runs when all pass; a concurrent insert of the same (discipline, group)
+# is absorbed by the unique constraint and reported as a duplicate.
+CREATE_EXAM_QUERY = """
+    WITH input AS (
+        SELECT %s::int AS discipline_id, %s::text AS student_group, %s::text AS exam_type,
+               %s::text AS main_teacher_id, %s::text AS second_teacher_id, %s::int AS room_id,
+               %s::boolean AS require_group_leader, %s::text AS created_by
+    ),
+    checks AS (
+        SELECT
+            EXISTS (SELECT 1 FROM disciplines d WHERE d.id = i.discipline_id) AS discipline_ok,
+            EXISTS (SELECT 1 FROM users u WHERE u.id = i.main_teacher_id AND u.role = 'CADRU_DIDACTIC') AS main_teacher_ok,
+            EXISTS (SELECT 1 FROM users u WHERE u.id = i.second_teacher_id AND u.role = 'CADRU_DIDACTIC') AS second_teacher_ok,
+            (i.room_id IS NULL OR EXISTS (SELECT 1 FROM rooms r WHERE r.id = i.room_id)) AS room_ok,
+            (NOT i.require_group_leader OR EXISTS (
+                SELECT 1 FROM users u WHERE u.student_group = i.student_group AND u.role = 'SEF_GRUPA'
+            )) AS group_leader_ok,
+            (SELECT e.id FROM exams e
+             WHERE e.discipline_id = i.discipline_id AND e.student_group = i.student_group) AS existing_exam_id
+        FROM input i
+    ),
+    inserted AS (
+        INSERT INTO exams (
+            discipline_id, student_group, exam_type,
+            main_teacher_id, second_teacher_id, status,
+            created_by, created_at, room_id
+        )
+        SELECT i.discipline_id, i.student_group, i.exam_type,
+               i.main_teacher_id, i.second_teacher_id, 'DRAFT',
+               i.created_by, CURRENT_TIMESTAMP, i.room_id
+        FROM input i, checks c
+        WHERE c.discipline_ok AND c.main_teacher_ok AND c.second_teacher_ok
+          AND c.room_ok AND c.group_leader_ok AND c.existing_exam_id IS NULL
+        ON CONFLICT (discipline_id, student_group) DO NOTHING
+        RETURNING id
+    )
+    SELECT (SELECT id FROM inserted), c.discipline_ok, c.main_teacher_ok, c.second_teacher_ok,
+           c.room_ok, c.group_leader_ok, c.existing_exam_id
+    FROM checks c
+"""
+
+# Checks in CREATE_EXAM_QUERY order -> (error code, message, HTTP status)
+CREATE_EXAM_ERRORS = [
+    ('DISCIPLINE_NOT_FOUND', "Discipline not found", 404),
+    ('MAIN_TEACHER_NOT_FOUND', "Main teacher not found or is not a teacher", 404),
+    ('SECOND_TEACHER_NOT_FOUND', "Second teacher not found or is not a teacher", 404),
+    ('ROOM_NOT_FOUND', "Room not found", 404),
+    ('GROUP_LEADER_NOT_FOUND', "No group leader found for this student group", 404),
+]
+DUPLICATE_EXAM_ERROR = ('DUPLICATE_EXAM', "An exam for this discipline and student group already exists", 409)
+
+
+def insert_validated_exam(cursor, data, created_by, require_group_leader=False):
+    """
+    Create a DRAFT exam from `data` (discipline_id, student_group, exam_type,
+    main_teacher_id, second_teacher_id and optional room_id) in one statement.
+    Returns (exam_id, None) or (None, (code, message, http_status)).
+    The new exam is announced to event streams when the caller commits.
+    """
+    cursor.execute(CREATE_EXAM_QUERY, (
+        data['discipline_id'], data['student_group'], data['exam_type'],
+        data['main_teacher_id'], data['second_teacher_id'], data.get('room_id'),
+        require_group_leader, created_by
+    ))
+    exam_id, *checks, existing_exam_id = cursor.fetchone()
+    for passed, error in zip(checks, CREATE_EXAM_ERRORS):
+        if not passed:
+            return None, error
+    if exam_id is None:
+        return None, DUPLICATE_EXAM_ERROR
+    notify_changes(cursor, [exam_id])
+    return exam_id, None
+
+
 @token_required
 def create_exam():
     """SEC creates an exam and assigns it to a group leader's student group"""
@@ -40,50 +123,11 @@ def create_exam():
     try:
         conn = get_db_connection()
         cursor = conn.cursor()
-        
-        # Check if discipline exists
-        cursor.execute("SELECT id FROM disciplines WHERE id = %s", (data['discipline_id'],))
-        if not cursor.fetchone():
-            return jsonify({"error": "Discipline not found"}), 404
-            
-        # Check if teachers exist
-        for teacher_field in ['main_teacher_id', 'second_teacher_id']:
-            cursor.execute("SELECT id FROM users WHERE id = %s AND role = 'CADRU_DIDACTIC'", (data[teacher_field],))
-            if not cursor.fetchone():
-                return jsonify({"error": f"Teacher with ID {data[teacher_field]} not found or is not a teacher"}), 404
-                
-        # Check if room exists
-        cursor.execute("SELECT id FROM rooms WHERE id = %s", (data['room_id'],))
-        if not cursor.fetchone():
-            return jsonify({"error": f"Room with ID {data['room_id']} not found"}), 404
-                
-        # Check if an exam for this discipline and group already exists
-        cursor.execute(
-            """SELECT id FROM exams 
-            WHERE discipline_id = %s AND student_group = %s""",
-            (data['discipline_id'], data['student_group'])
-        )
-        if cursor.fetchone():
-            return jsonify({"error": "An exam for this discipline and student group already exists"}), 409
-            
-        # Insert the new exam
-        cursor.execute(
-            """
-            INSERT INTO exams (
-                discipline_id, student_group, exam_type, 
-                main_teacher_id, second_teacher_id, status,
-                created_by, created_at, room_id
-            )
-            VALUES (%s, %s, %s, %s, %s, 'DRAFT', %s, CURRENT_TIMESTAMP, %s)
-            RETURNING id
-            """,
-            (
-                data['discipline_id'], data['student_group'], data['exam_type'],
-                data['main_teacher_id'], data['second_teacher_id'], g.current_user.get('id'),
-                data['room_id']
-            )
-        )
-        new_exam_id = cursor.fetchone()[0]
+
+        new_exam_id, error = insert_validated_exam(cursor, data, g.current_user.get('id'))
+        if error:
+            code, message, status = error
+            return jsonify({"error": message, "code": code}), status
         conn.commit()
         
         return jsonify({
@@ -100,6 +144,224 @@ def create_exam():
             cursor.close()
             conn.close()
 
+# Candidate exams for every discipline matching the filters and every student
+# group of the same year of study; teachers come from discipline_teachers.
+# Every exam needs two teachers: disciplines with fewer are skipped by
+# BULK_CREATE_EXAMS_QUERY as NO_TEACHER_ASSIGNED / NO_SECOND_TEACHER.
+DERIVE_ASSIGNMENTS_QUERY = """
+    SELECT d.id, g.student_group, t.teachers[1], t.teachers[2]
+    FROM disciplines d
+    JOIN (
+        SELECT DISTINCT student_group, year_of_study
+        FROM users
+        WHERE role IN ('STUDENT', 'SEF_GRUPA')
+          AND student_group IS NOT NULL AND student_group <> ''
+    ) g ON g.year_of_study = d.year_of_study
+    LEFT JOIN LATERAL (
+        SELECT array_agg(dt.teacher_id ORDER BY dt.teacher_id) AS teachers
+        FROM discipline_teachers dt
+        WHERE dt.discipline_id = d.id
+    ) t ON true
+    WHERE (%s::int IS NULL OR d.year_of_study = %s::int)
+      AND (%s::text IS NULL OR d.specialization = %s::text)
+      AND (%s::text[] IS NULL OR g.student_group = ANY(%s::text[]))
+    ORDER BY d.id, g.student_group
+"""
+
+# Validates every requested (discipline, group) pair against disciplines,
+# teachers, rooms and existing exams, then inserts the valid ones in a single
+# statement. Exams that appear between the check and the insert are caught by
+# the (discipline_id, student_group) unique constraint.
+BULK_CREATE_EXAMS_QUERY = """
+    WITH requested AS (
+        SELECT *
+        FROM unnest(%s::int[], %s::int[], %s::text[], %s::text[], %s::text[], %s::text[], %s::int[])
+            AS r(idx, discipline_id, student_group, exam_type, main_teacher_id, second_teacher_id, room_id)
+    ),
+    checked AS (
+        SELECT r.*,
+            CASE
+                WHEN d.id IS NULL THEN 'DISCIPLINE_NOT_FOUND'
+                WHEN r.main_teacher_id IS NULL THEN 'NO_TEACHER_ASSIGNED'
+                WHEN mt.id IS NULL THEN 'MAIN_TEACHER_NOT_FOUND'
+                WHEN r.second_teacher_id IS NULL THEN 'NO_SECOND_TEACHER'
+                WHEN st.id IS NULL THEN 'SECOND_TEACHER_NOT_FOUND'
+                WHEN r.room_id IS NOT NULL AND rm.id IS NULL THEN 'ROOM_NOT_FOUND'
+                WHEN ex.id IS NOT NULL THEN 'DUPLICATE_EXAM'
+            END AS error,
+            ex.id AS existing_exam_id
+        FROM requested r
+        LEFT JOIN disciplines d ON d.id = r.discipline_id
+        LEFT JOIN users mt ON mt.id = r.main_teacher_id AND mt.role = 'CADRU_DIDACTIC'
+        LEFT JOIN users st ON st.id = r.second_teacher_id AND st.role = 'CADRU_DIDACTIC'
+        LEFT JOIN rooms rm ON rm.id = r.room_id
+        LEFT JOIN exams ex ON ex.discipline_id = r.discipline_id AND ex.student_group = r.student_group
+    ),
+    inserted AS (
+        INSERT INTO exams (
+            discipline_id, student_group, exam_type,
+            main_teacher_id, second_teacher_id, status,
+            created_by, created_at, room_id
+        )
+        SELECT discipline_id, student_group, exam_type,
+               main_teacher_id, second_teacher_id, 'DRAFT',
+               %s, CURRENT_TIMESTAMP, room_id
+        FROM checked
+        WHERE error IS NULL
+        ON CONFLICT DO NOTHING
+        RETURNING id, discipline_id, student_group
+    )
+    SELECT c.discipline_id, c.student_group, i.id,
+           CASE WHEN c.error IS NULL AND i.id IS NULL THEN 'DUPLICATE_EXAM' ELSE c.error END,
+           c.existing_exam_id
+    FROM checked c
+    LEFT JOIN inserted i ON i.discipline_id = c.discipline_id AND i.student_group = c.student_group
+    ORDER BY c.idx
+"""
+
+
+def _bulk_exam_rows(data, cursor):
+    """
+    Expand a bulk creation request into (discipline_id, student_group, exam_type,
+    main_teacher_id, second_teacher_id, room_id) tuples.
+    Either `assignments` x `groups` (an assignment may carry its own `groups`),
+    or `derive` with optional year_of_study / specialization filters.
+    Returns (rows, error).
+    """
+    default_type = data.get('exam_type', 'EXAM')
+    default_room = data.get('room_id')
+    groups = data.get('groups')
+    if groups is not None and (not isinstance(groups, list) or not all(isinstance(gr, str) and gr.strip() for gr in groups)):
+        return None, "'groups' must be a list of student group names"
+
+    rows = []
+    if 'derive' in data:
+        derive = data.get('derive') or {}
+        if not isinstance(derive, dict):
+            return None, "'derive' must be an object"
+        year = derive.get('year_of_study')
+        specialization = derive.get('specialization')
+        try:
+            year = int(year) if year is not None else None
+        except (TypeError, ValueError):
+            return None, "Invalid year_of_study"
+        cursor.execute(
+            DERIVE_ASSIGNMENTS_QUERY,
+            (year, year, specialization, specialization, groups, groups)
+        )
+        for discipline_id, student_group, main_teacher_id, second_teacher_id in cursor.fetchall():
+            rows.append((discipline_id, student_group, default_type,
+                         main_teacher_id, second_teacher_id, default_room))
+    else:
+        assignments = data.get('assignments')
+        if not isinstance(assignments, list) or not assignments:
+            return None, "Provide 'assignments' with 'groups', or 'derive'"
+        for position, item in enumerate(assignments):
+            if not isinstance(item, dict):
+                return None, f"Assignment {position} must be an object"
+            item_groups = item.get('groups', groups)
+            if not item_groups:
+                return None, f"Assignment {position} has no student groups"
+            try:
+                discipline_id = int(item['discipline_id'])
+                room_id = item.get('room_id', default_room)
+                room_id = int(room_id) if room_id is not None else None
+            except (KeyError, TypeError, ValueError):
+                return None, f"Assignment {position} needs a numeric discipline_id (and room_id, if given)"
+            for student_group in item_groups:
+                rows.append((discipline_id, str(student_group).strip(), item.get('exam_type', default_type),
+                             item.get('main_teacher_id'), item.get('second_teacher_id'), room_id))
+
+    for row in rows:
+        if row[2] not in ['EXAM', 'PROJECT']:
+            return None, "Exam type must be 'EXAM' or 'PROJECT'"
+    return rows, None
+
+
+def create_exams_bulk():
+    """
+    SEC creates the DRAFT exams for many (discipline, group) pairs at once.
+    All pairs are validated with one query and inserted with one multi-row
+    INSERT ... ON CONFLICT DO NOTHING; the response lists created and skipped pairs.
+    """
+    if not DB_AVAILABLE:
+        return jsonify({"error": "Database not available"}), 500
+
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({"error": "Invalid JSON body"}), 400
+
+    conn = None
+    try:
+        conn = get_db_connection()
+        cursor = conn.cursor()
+
+        rows, error = _bulk_exam_rows(data, cursor)
+        if error:
+            return jsonify({"error": error}), 400
+
+        created, skipped = [], []
+        seen = set()
+        unique_rows = []
+        for row in rows:
+            key = (row[0], row[1])
+            if key in seen:
+                skipped.append({"discipline_id": row[0], "student_group": row[1], "reason": "DUPLICATE_IN_REQUEST"})
+                continue
+            seen.add(key)
+            unique_rows.append(row)
+
+        if unique_rows:
+            columns = list(zip(*unique_rows))
+            cursor.execute(
+                BULK_CREATE_EXAMS_QUERY,
+                (list(range(len(unique_rows))), list(columns[0]), list(columns[1]), list(columns[2]),
+                 list(columns[3]), list(columns[4]), list(columns[5]), g.current_user.get('id'))
+            )
+            for discipline_id, student_group, exam_id, reason, existing_exam_id in cursor.fetchall():
+                if exam_id is not None:
+                    created.append({"discipline_id": discipline_id, "student_group": student_group, "exam_id": exam_id})
+                else:
+                    entry = {"discipline_id": discipline_id, "student_group": student_group, "reason": reason}
+                    if existing_exam_id is not None:
+                        entry["exam_id"] = existing_exam_id
+                    skipped.append(entry)
+            notify_changes(cursor, [item["exam_id"] for item in created])
+        conn.commit()
+
+        return jsonify({
+            "created_count": len(created),
+            "skipped_count": len(skipped),
+            "created": created,
+            "skipped": skipped
+        }), 201 if created else 200
+    except Exception as e:
+        if conn:
+            conn.rollback()
+        print(f"Error creating exams in bulk: {e}")
+        return jsonify({"error": "An internal error occurred"}), 500
+    finally:
+        if conn:
+            cursor.close()
+            conn.close()
+
+# Columns of GET /api/sec/exams; ?fields= selects a subset and skips unused joins
+SEC_EXAMS_LISTING = Listing('sec_exams', "FROM exams e", EXAM_JOINS, {
+    'id': Field("e.id"),
+    'discipline_name': Field("d.name as discipline_name", ('d',)),
+    'exam_type': Field("e.exam_type"),
+    'student_group': Field("e.student_group"),
+    'status': Field("e.status"),
+    'exam_date': Field("e.exam_date"),
+    'start_hour': Field("e.start_hour"),
+    'duration': Field("e.duration"),
+    'room_name': Field("r.name as room_name", ('r',)),
+    'main_teacher_name': Field("u1.full_name as main_teacher_name", ('u1',)),
+    'second_teacher_name': Field("u2.full_name as second_teacher_name", ('u2',)),
+    'created_at': Field("e.created_at"),
+    'updated_at': Field("e.updated_at"),
+})
+
 @token_required
 def get_all_exams():
     """SEC gets all exams in the system"""
@@ -109,65 +371,37 @@ def get_all_exams():
     # Check if user has SEC or ADM role
     if g.current_user.get('role') not in ['SEC', 'ADM']:
         return jsonify({"error": "Only SEC or ADM can view all exams"}), 403
-        
-    conn = None
+
+    try:
+        conditions, params = exam_filters.parse_filters(request.args)
+        keyset = exam_filters.parse_sort(request.args, 'sec_exams', EXAM_LISTING_KEYSET)
+        page = parse_page(request.args, keyset)
+        fields = SEC_EXAMS_LISTING.parse_fields(request.args, key_columns(keyset) if page else ())
+    except (exam_filters.FilterError, PaginationError, FieldsError) as e:
+        return jsonify({"error": str(e)}), 400
+
     try:
         conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        query = """
-            SELECT 
-                e.id,
-                d.name as discipline_name,
-                e.exam_type,
-                e.student_group,
-                e.status,
-                e.exam_date,
-                e.start_hour,
-                e.duration,
-                r.name as room_name,
-                u1.full_name as main_teacher_name,
-                u2.full_name as second_teacher_name,
-                e.created_at,
-                e.updated_at
-            FROM exams e
-            JOIN disciplines d ON e.discipline_id = d.id
-            LEFT JOIN rooms r ON e.room_id = r.id
-            JOIN users u1 ON e.main_teacher_id = u1.id
-            JOIN users u2 ON e.second_teacher_id = u2.id
-            ORDER BY e.status, e.exam_date, e.start_hour
-        """
-        cursor.execute(query)
-        exams = cursor.fetchall()
-        columns = [desc[0] for desc in cursor.description]
-        exams_dict = [dict(zip(columns, row)) for row in exams]
-        
-        for exam in exams_dict:
-            if exam.get('exam_date'):
-                exam['exam_date'] = exam['exam_date'].isoformat()
-            if exam.get('created_at'):
-                exam['created_at'] = exam['created_at'].isoformat()
-            if exam.get('updated_at') and exam['updated_at'] is not None:
-                exam['updated_at'] = exam['updated_at'].isoformat()
-        
-        return jsonify(exams_dict), 200
+        shape = SEC_EXAMS_LISTING.shape(fields, exam_filters.filter_joins(request.args))
+        # Ordered by status, exam_date, start_hour unless ?sort= says otherwise; closes conn itself
+        return listing_response(conn, shape.select_sql, keyset, page,
+                                list(shape.conditions) + conditions, params, name='sec_exams')
     except Exception as e:
         print(f"Error fetching all exams: {e}")
         return jsonify({"error": "An internal error occurred"}), 500
-    finally:
-        if conn:
-            cursor.close()
-            conn.close()
 
 @token_required
 def export_exams_excel():
-    """SEC exports confirmed exams to Excel"""
+    """SEC exports confirmed exams to Excel (layout=split adds per-day and per-year sheets)"""
     if not DB_AVAILABLE:
         return jsonify({"error": "Database not available"}), 500
         
     # Check if user has SEC or ADM role
     if g.current_user.get('role') not in ['SEC', 'ADM']:
         return jsonify({"error": "Only SEC or ADM can export exams"}), 403
+
+    if request.args.get('layout') == 'split':
+        return _export_split_workbook()
         
     conn = None
     try:
@@ -300,6 +534,170 @@ def export_exams_excel():
             cursor.close()
             conn.close()
 
+# --- Split workbook export ---
+
+SPLIT_EXPORT_QUERY = """
+    SELECT 
+        d.name as discipline_name,
+        e.exam_type,
+        e.student_group,
+        e.exam_date,
+        e.start_hour,
+        r.name as room_name,
+        u1.full_name as main_teacher,
+        u2.full_name as second_teacher,
+        d.year_of_study,
+        d.specialization
+    FROM exams e
+    JOIN disciplines d ON e.discipline_id = d.id
+    LEFT JOIN rooms r ON e.room_id = r.id
+    JOIN users u1 ON e.main_teacher_id = u1.id
+    JOIN users u2 ON e.second_teacher_id = u2.id
+    WHERE e.status = 'CONFIRMED'
+    ORDER BY e.exam_date, e.start_hour
+"""
+
+EXPORT_HEADERS = ['Disciplina', 'Tip', 'Grupă', 'Data', 'Oră', 'Sală', 'Profesor 1', 'Profesor 2']
+INVALID_SHEET_CHARS = re.compile(r'[\[\]:*?/\\]')
+
+
+def _year_sheet_key(year_of_study, specialization):
+    year = f"Anul {year_of_study}" if year_of_study else "An nespecificat"
+    return f"{year} - {specialization}" if specialization else year
+
+
+class _SheetStream:
+    """Appends rows to one worksheet in order and tracks column widths as it goes"""
+
+    def __init__(self, workbook, name, title, formats):
+        self.worksheet = workbook.add_worksheet(name)
+        self.worksheet.merge_range(0, 0, 0, len(EXPORT_HEADERS) - 1, title, formats['title'])
+        self.worksheet.write_row(1, 0, EXPORT_HEADERS, formats['header'])
+        self.widths = [len(h) + 2 for h in EXPORT_HEADERS]
+        self.next_row = 2
+
+    def append(self, values):
+        self.worksheet.write_row(self.next_row, 0, values)
+        self.next_row += 1
+        for i, value in enumerate(values):
+            self.widths[i] = max(self.widths[i], len(value) + 2)
+
+    def finish(self):
+        for i, width in enumerate(self.widths):
+            self.worksheet.set_column(i, i, width)
+
+
+def _export_split_workbook():
+    """
+    Confirmed exams in one workbook with an overall sheet plus one sheet per exam day and
+    per year/specialization. Rows are streamed from a server-side cursor and routed to their
+    sheets in a single pass; constant_memory mode flushes each row, so memory stays bounded.
+    """
+    conn = None
+    try:
+        conn = get_db_connection()
+        cursor = conn.cursor()
+
+        # Sheet order: days chronologically, then years/specializations
+        cursor.execute("""
+            SELECT DISTINCT e.exam_date::date FROM exams e
+            WHERE e.status = 'CONFIRMED' AND e.exam_date IS NOT NULL ORDER BY 1
+        """)
+        days = [row[0] for row in cursor.fetchall()]
+        cursor.execute("""
+            SELECT DISTINCT d.year_of_study, d.specialization FROM exams e
+            JOIN disciplines d ON e.discipline_id = d.id
+            WHERE e.status = 'CONFIRMED'
+            ORDER BY d.year_of_study NULLS LAST, d.specialization NULLS LAST
+        """)
+        year_keys = [_year_sheet_key(*row) for row in cursor.fetchall()]
+
+        output = BytesIO()
+        workbook = xlsxwriter.Workbook(output, {'constant_memory': True})
+        formats = {
+            'header': workbook.add_format({
+                'bold': True, 'font_color': 'white', 'bg_color': '#4472C4',
+                'border': 1, 'align': 'center', 'valign': 'vcenter'
+            }),
+            'title': workbook.add_format({
+                'bold': True, 'font_size': 16, 'align': 'center', 'valign': 'vcenter'
+            }),
+            'info': workbook.add_format({'align': 'left', 'valign': 'vcenter'}),
+        }
+
+        used_names = {'info'}
+        def sheet_name(label):
+            name = INVALID_SHEET_CHARS.sub('-', label)[:31]
+            suffix = 2
+            while name.lower() in used_names:
+                tag = f" ({suffix})"
+                name = INVALID_SHEET_CHARS.sub('-', label)[:31 - len(tag)] + tag
+                suffix += 1
+            used_names.add(name.lower())
+            return name
+
+        info_sheet = workbook.add_worksheet('Info')
+        all_exams = _SheetStream(workbook, sheet_name('Exams'), 'Programare examene', formats)
+        day_sheets = {
+            day: _SheetStream(workbook, sheet_name(day.strftime('%Y-%m-%d')), f"Examene {day.strftime('%d.%m.%Y')}", formats)
+            for day in days
+        }
+        year_sheets = {
+            key: _SheetStream(workbook, sheet_name(key), f"Examene {key}", formats)
+            for key in year_keys
+        }
+
+        total = 0
+        for _, rows in iter_server_cursor(conn, SPLIT_EXPORT_QUERY, name='split_export'):
+            for (discipline_name, exam_type, student_group, exam_date, start_hour,
+                 room_name, main_teacher, second_teacher, year_of_study, specialization) in rows:
+                values = [
+                    discipline_name or '', exam_type or '', student_group or '',
+                    exam_date.strftime('%Y-%m-%d') if exam_date else '',
+                    f"{start_hour}.00" if start_hour else '',
+                    room_name or '', main_teacher or '', second_teacher or ''
+                ]
+                all_exams.append(values)
+                if exam_date:
+                    day = exam_date.date()
+                    if day not in day_sheets:  # confirmed after the sheet list was read
+                        day_sheets[day] = _SheetStream(workbook, sheet_name(day.strftime('%Y-%m-%d')), f"Examene {day.strftime('%d.%m.%Y')}", formats)
+                    day_sheets[day].append(values)
+                year_key = _year_sheet_key(year_of_study, specialization)
+                if year_key not in year_sheets:
+                    year_sheets[year_key] = _SheetStream(workbook, sheet_name(year_key), f"Examene {year_key}", formats)
+                year_sheets[year_key].append(values)
+                total += 1
+
+        info_sheet.merge_range('A1:D1', 'FIESC Programare examene', formats['title'])
+        info_sheet.write('A3', 'Dată export:', formats['info'])
+        info_sheet.write('B3', datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S'), formats['info'])
+        info_sheet.write('A4', 'Total examene:', formats['info'])
+        info_sheet.write('B4', total, formats['info'])
+        info_sheet.write('A5', 'Generat de:', formats['info'])
+        info_sheet.write('B5', g.current_user.get('email', 'Unknown'), formats['info'])
+        info_sheet.write('A6', 'Zile de examen:', formats['info'])
+        info_sheet.write('B6', len(day_sheets), formats['info'])
+        info_sheet.set_column('A:A', 15)
+        info_sheet.set_column('B:B', 25)
+
+        for sheet in [all_exams, *day_sheets.values(), *year_sheets.values()]:
+            sheet.finish()
+        workbook.close()
+
+        filename = f"exams_export_split_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
+        return output.getvalue(), 200, {
+            'Content-Type': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+            'Content-Disposition': f'attachment; filename={filename}'
+        }
+    except Exception as e:
+        print(f"Error exporting split exam workbook: {e}")
+        return jsonify({"error": "An internal error occurred"}), 500
+    finally:
+        if conn:
+            cursor.close()
+            conn.close()
+
 @token_required
 def manage_exam_periods():
     """SEC creates or updates exam periods"""
@@ -456,6 +854,51 @@ def manage_exam_periods():
             cursor.close()
             conn.close()
 
+def confirm_accepted_in_period(period_id):
+    """SEC confirms every ACCEPTED exam that falls inside an exam period, in one UPDATE"""
+    if not DB_AVAILABLE:
+        return jsonify({"error": "Database not available"}), 500
+
+    transition = TRANSITIONS['CONFIRM']
+    conn = None
+    try:
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        cursor.execute(
+            """
+            UPDATE exams e
+            SET status = %s, updated_at = CURRENT_TIMESTAMP
+            FROM exam_periods p
+            WHERE p.id = %s
+              AND e.status = ANY(%s::text[])
+              AND e.exam_date::date BETWEEN p.start_date AND p.end_date
+            RETURNING e.id
+            """,
+            (transition.to_status, period_id, list(transition.from_statuses))
+        )
+        confirmed_ids = sorted(row[0] for row in cursor.fetchall())
+        notify_changes(cursor, confirmed_ids)
+        if not confirmed_ids:
+            cursor.execute("SELECT id FROM exam_periods WHERE id = %s", (period_id,))
+            if not cursor.fetchone():
+                return jsonify({"error": "Exam period not found"}), 404
+        conn.commit()
+
+        return jsonify({
+            "message": f"{len(confirmed_ids)} exams confirmed",
+            "confirmed_count": len(confirmed_ids),
+            "exam_ids": confirmed_ids
+        }), 200
+    except Exception as e:
+        if conn:
+            conn.rollback()
+        print(f"Error confirming accepted exams in period: {e}")
+        return jsonify({"error": "An internal error occurred"}), 500
+    finally:
+        if conn:
+            cursor.close()
+            conn.close()
+
 @token_required
 def get_exam_periods():
     """Get all exam periods"""
@@ -475,20 +918,7 @@ def get_exam_periods():
             """
         )
         periods = cursor.fetchall()
-        columns = [desc[0] for desc in cursor.description]
-        periods_dict = [dict(zip(columns, row)) for row in periods]
-        
-        for period in periods_dict:
-            if period.get('start_date'):
-                period['start_date'] = period['start_date'].isoformat()
-            if period.get('end_date'):
-                period['end_date'] = period['end_date'].isoformat()
-            if period.get('created_at'):
-                period['created_at'] = period['created_at'].isoformat()
-            if period.get('updated_at') and period['updated_at'] is not None:
-                period['updated_at'] = period['updated_at'].isoformat()
-        
-        return jsonify(periods_dict), 200
+        return rows_response(cursor, periods)
     except Exception as e:
         print(f"Error fetching exam periods: {e}")
         return jsonify({"error": "An internal error occurred"}), 500
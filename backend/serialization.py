@@ -0,0 +1,202 @@
+"""
+Fast JSON encoding of query results, backed by orjson.
+orjson writes date, datetime, time and UUID values natively (ISO 8601), so
+endpoints no longer loop over their rows calling isoformat(). Columns that
+need converting (NUMERIC comes back as Decimal) are found once per query
+shape from cursor.description and only those columns are touched per row.
+OrjsonProvider makes the same encoder back every jsonify() in the app.
+Large listings go through query_rows_response, which streams the JSON array
+from a server-side cursor instead of materializing the whole result.
+"""
+
+import decimal
+import threading
+
+import orjson
+from flask import current_app, stream_with_context
+from flask.json.provider import JSONProvider
+
+from database import iter_server_cursor
+
+# Postgres type OIDs, as reported in cursor.description[i][1]
+NUMERIC_OID = 1700
+BYTEA_OID = 17
+INTERVAL_OID = 1186
+
+# Per-column conversions applied before encoding; other types pass straight through
+COLUMN_CONVERTERS = {
+    NUMERIC_OID: str,
+    BYTEA_OID: bytes.hex,
+    INTERVAL_OID: str,
+}
+
+ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS
+
+# Query shapes kept in the encoder cache; the listing queries are a fixed set
+MAX_CACHED_SHAPES = 256
+
+# Listings with at least this many rows are streamed; it is also the number
+# of rows fetched per round trip, so memory per request is bounded by it
+STREAM_THRESHOLD = 1000
+
+
+def _default(obj):
+    """Fallback for values orjson does not know, mirroring Flask's default provider"""
+    if isinstance(obj, decimal.Decimal):
+        return str(obj)
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    if isinstance(obj, (bytes, memoryview)):
+        return bytes(obj).hex()
+    if hasattr(obj, '__html__'):
+        return str(obj.__html__())
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps(obj):
+    """Serialize `obj` to UTF-8 JSON bytes"""
+    return orjson.dumps(obj, default=_default, option=ORJSON_OPTIONS)
+
+
+class RowEncoder:
+    """Turns rows of one query shape into JSON-ready dicts or straight into JSON bytes"""
+
+    def __init__(self, description):
+        self.columns = tuple(desc[0] for desc in description)
+        self.converters = tuple(
+            (index, COLUMN_CONVERTERS[desc[1]])
+            for index, desc in enumerate(description)
+            if desc[1] in COLUMN_CONVERTERS
+        )
+
+    def _convert(self, row):
+        row = list(row)
+        for index, convert in self.converters:
+            if row[index] is not None:
+                row[index] = convert(row[index])
+        return row
+
+    def rows(self, rows):
+        """Rows as a list of dicts, with converted columns already JSON-safe"""
+        columns = self.columns
+        if not self.converters:
+            return [dict(zip(columns, row)) for row in rows]
+        convert = self._convert
+        return [dict(zip(columns, convert(row))) for row in rows]
+
+    def dumps(self, rows):
+        """Rows as a JSON array of objects, in bytes"""
+        return orjson.dumps(self.rows(rows), option=ORJSON_OPTIONS)
+
+    def dumps_items(self, rows):
+        """Rows as comma-separated JSON objects without the enclosing brackets"""
+        return self.dumps(rows)[1:-1]
+
+
+_encoders = {}
+_encoders_lock = threading.Lock()
+
+
+def encoder_for(description):
+    """RowEncoder for a cursor.description, built once per (column names, types) shape"""
+    shape = tuple((desc[0], desc[1]) for desc in description)
+    encoder = _encoders.get(shape)
+    if encoder is None:
+        encoder = RowEncoder(description)
+        with _encoders_lock:
+            if len(_encoders) >= MAX_CACHED_SHAPES:
+                _encoders.clear()
+            _encoders[shape] = encoder
+    return encoder
+
+
+def rows_to_dicts(cursor, rows):
+    """dict(zip(columns, row)) for every row, with non-JSON column types converted"""
+    return encoder_for(cursor.description).rows(rows)
+
+
+def rows_response(cursor, rows, status=200):
+    """JSON array response for rows fetched from `cursor`"""
+    body = encoder_for(cursor.description).dumps(rows)
+    return current_app.response_class(body, status=status, mimetype='application/json')
+
+
+def _releaser(conn, chunks):
+    """Close `chunks` and `conn` on the first call; later calls do nothing"""
+    released = []
+
+    def release():
+        if not released:
+            released.append(True)
+            chunks.close()
+            conn.close()
+    return release
+
+
+def _stream_array(description, first_rows, chunks, release):
+    """Yield a JSON array chunk by chunk; calls `release` when done"""
+    try:
+        encoder = encoder_for(description)
+        yield b'[' + encoder.dumps_items(first_rows)
+        for _, rows in chunks:
+            yield b',' + encoder.dumps_items(rows)
+        yield b']'
+    except Exception as e:
+        # Headers are already sent; leave the array unterminated so the
+        # client sees a broken body instead of a silently truncated list
+        print(f"Error while streaming rows: {e}")
+    finally:
+        release()
+
+
+def query_rows_response(conn, query, params=(), name='listing_cursor', threshold=STREAM_THRESHOLD):
+    """
+    JSON array response for `query`, read through a server-side cursor.
+    Results shorter than `threshold` rows are sent as one body; longer ones
+    are streamed `threshold` rows at a time, so the first bytes leave after
+    the first FETCH and memory stays bounded by one chunk.
+    Takes ownership of `conn`: it is closed once the response is complete.
+    Errors raised before the first chunk propagate to the caller.
+    """
+    chunks = iter_server_cursor(conn, query, params, fetch_size=threshold, name=name)
+    try:
+        first = next(chunks, None)
+    except Exception:
+        chunks.close()
+        conn.close()
+        raise
+    if first is None or len(first[1]) < threshold:
+        chunks.close()
+        conn.close()
+        if first is None:
+            return current_app.response_class(b'[]', mimetype='application/json')
+        description, rows = first
+        body = encoder_for(description).dumps(rows)
+        return current_app.response_class(body, mimetype='application/json')
+
+    description, rows = first
+    release = _releaser(conn, chunks)
+    response = current_app.response_class(
+        stream_with_context(_stream_array(description, rows, chunks, release)),
+        mimetype='application/json'
+    )
+    # The body may be discarded before it is iterated (HEAD, an error in an
+    # after_request hook); the generator's cleanup would then never run
+    response.call_on_close(release)
+    return response
+
+
+class OrjsonProvider(JSONProvider):
+    """Flask JSON provider that encodes with orjson; set as app.json_provider_class"""
+
+    mimetype = 'application/json'
+
+    def dumps(self, obj, **kwargs):
+        return dumps(obj).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(dumps(obj), mimetype=self.mimetype)
@@ -5,14 +5,40 @@ These endpoints will be imported into the main app.py file.
 
 from flask import jsonify, request, g
 import logging
-from database import get_db_connection
+from database import get_db_connection, advisory_xact_lock, room_day_lock_key, run_in_transaction
 from auth import token_required
+from exam_transitions import apply_transition, notify_changes, ROOM_FREE_CONDITION
+import room_holds
+from serialization import rows_response
+from fieldsets import Listing, Field, EXAM_JOINS
+import conditional
 from datetime import datetime
 # Import DB_AVAILABLE from app.py when this module is imported
 DB_AVAILABLE = None
 
 # --- SG Role Endpoints ---
 
+SG_EXAMS_LISTING = Listing('sg_exams', "FROM exams e", EXAM_JOINS, {
+    'id': Field("e.id"),
+    'discipline_name': Field("d.name as discipline_name", ('d',)),
+    'exam_type': Field("e.exam_type"),
+    'status': Field("e.status"),
+    'exam_date': Field("e.exam_date"),
+    'start_hour': Field("e.start_hour"),
+    'duration': Field("e.duration"),
+    'room_name': Field("r.name as room_name", ('r',)),
+    'room_id': Field("r.id as room_id", ('r',)),
+    'main_teacher': Field("u1.full_name as main_teacher", ('u1',)),
+    'second_teacher': Field("u2.full_name as second_teacher", ('u2',)),
+})
+SG_EXAMS_QUERY = SG_EXAMS_LISTING.shape().select_sql + """
+    WHERE e.student_group = %s
+    ORDER BY e.status, e.exam_date, e.start_hour
+"""
+SG_EXAMS_VERSION_QUERY = SG_EXAMS_LISTING.version_sql(
+    SG_EXAMS_LISTING.shape(), f"GREATEST(max(e.updated_at), {conditional.GROUP_LAST_DELETE_SQL})"
+) + "WHERE e.student_group = %s"
+
 @token_required
 def get_sg_exams():
     """Get exams assigned to the group leader's group"""
@@ -38,37 +64,15 @@ def get_sg_exams():
         conn = get_db_connection()
         cursor = conn.cursor()
         
-        query = """
-            SELECT 
-                e.id,
-                d.name as discipline_name,
-                e.exam_type,
-                e.status,
-                e.exam_date,
-                e.start_hour,
-                e.duration,
-                r.name as room_name,
-                r.id as room_id,
-                u1.full_name as main_teacher,
-                u2.full_name as second_teacher
-            FROM exams e
-            JOIN disciplines d ON e.discipline_id = d.id
-            LEFT JOIN rooms r ON e.room_id = r.id
-            JOIN users u1 ON e.main_teacher_id = u1.id
-            JOIN users u2 ON e.second_teacher_id = u2.id
-            WHERE e.student_group = %s
-            ORDER BY e.status, e.exam_date, e.start_hour
-        """
-        cursor.execute(query, (student_group,))
+        # Answer an unchanged reload with 304 before running the join
+        validator = conditional.read_validator(cursor, SG_EXAMS_VERSION_QUERY, (student_group, student_group), (student_group,))
+        unchanged = conditional.not_modified(validator)
+        if unchanged:
+            return unchanged
+
+        cursor.execute(SG_EXAMS_QUERY, (student_group,))
         exams = cursor.fetchall()
-        columns = [desc[0] for desc in cursor.description]
-        exams_dict = [dict(zip(columns, row)) for row in exams]
-        
-        for exam in exams_dict:
-            if exam.get('exam_date'):
-                exam['exam_date'] = exam['exam_date'].isoformat()
-        
-        return jsonify(exams_dict), 200
+        return conditional.add_validators(rows_response(cursor, exams), validator)
     except Exception as e:
         logging.error(f"Error fetching exams for group leader {g.current_user.get('id')}, group {student_group}: {e}", exc_info=True)
         return jsonify({"error": "An internal error occurred while fetching exams"}), 500
@@ -128,6 +132,8 @@ def get_available_rooms():
             (date, hour_int)
         )
         booked_room_ids = [row[0] for row in cursor.fetchall()]
+        # Slots other group leaders are holding count as booked
+        booked_room_ids += room_holds.held_rooms(cursor, date, hour_int, g.current_user.get('id'))
         
         # Filter out booked rooms
         available_rooms = [room for room in all_rooms_dict if room['id'] not in booked_room_ids]
@@ -140,6 +146,38 @@ def get_available_rooms():
         if conn:
             conn.close()
 
+# Statuses that occupy a room slot
+BOOKED_STATUSES = ['PROPOSED', 'ACCEPTED', 'CONFIRMED']
+
+ROOM_UNAVAILABLE_ERROR = ('ROOM_BOOKED', "Room is already booked or held for the selected date and time", 409)
+GROUP_BUSY_ERROR = ('GROUP_BUSY', "The group already has an exam at the selected date and time", 409)
+
+# A group sits one exam at a time; the batch path applies the same rule to
+# the booked slots it loads for the group
+GROUP_BUSY_QUERY = """
+    SELECT 1 FROM exams
+    WHERE student_group = %s AND exam_date::date = %s::date AND start_hour = %s
+      AND status = ANY(%s::text[]) AND id <> %s
+    LIMIT 1
+"""
+
+
+def _validate_slot(exam_date, start_hour):
+    """Check a proposed date and hour. Returns (start_hour as int, None) or (None, error message)."""
+    try:
+        # Validate hour range (8-20)
+        start_hour_int = int(start_hour)
+        if not (8 <= start_hour_int <= 20):
+            return None, "Start hour must be between 8 and 20"
+
+        # Validate that exam_date is a weekday (Monday to Friday)
+        exam_date_obj = datetime.strptime(exam_date, '%Y-%m-%d')
+        if exam_date_obj.weekday() >= 5:  # 5=Saturday, 6=Sunday
+            return None, "Exams can only be scheduled on weekdays (Monday to Friday)"
+    except (TypeError, ValueError):
+        return None, "Invalid date or hour format"
+    return start_hour_int, None
+
 @token_required
 def propose_exam_schedule(exam_id):
     """Group leader proposes a date, time, and room for an exam"""
@@ -162,71 +200,50 @@ def propose_exam_schedule(exam_id):
     if not all([exam_date, start_hour, room_id]):
         return jsonify({"error": "Exam date, start hour, and room ID are required"}), 400
         
+    start_hour_int, error = _validate_slot(exam_date, start_hour)
+    if error:
+        return jsonify({"error": error}), 400
+    exam_date_obj = datetime.strptime(exam_date, '%Y-%m-%d')
     try:
-        # Validate hour range (8-20)
-        start_hour_int = int(start_hour)
-        if not (8 <= start_hour_int <= 20):
-            return jsonify({"error": "Start hour must be between 8 and 20"}), 400
-            
-        # Validate that exam_date is a weekday (Monday to Friday)
-        exam_date_obj = datetime.strptime(exam_date, '%Y-%m-%d')
-        if exam_date_obj.weekday() >= 5:  # 5=Saturday, 6=Sunday
-            return jsonify({"error": "Exams can only be scheduled on weekdays (Monday to Friday)"}), 400
-    except ValueError:
-        return jsonify({"error": "Invalid date or hour format"}), 400
+        room_id = int(room_id)
+    except (TypeError, ValueError):
+        return jsonify({"error": "Invalid room ID"}), 400
         
     conn = None
     try:
         conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        # Check if exam exists and belongs to the group leader's group
-        cursor.execute(
-            "SELECT status FROM exams WHERE id = %s AND student_group = %s",
-            (exam_id, student_group)
-        )
-        exam = cursor.fetchone()
-        if not exam:
-            return jsonify({"error": "Exam not found or does not belong to your group"}), 404
-            
-        # Check if exam is in a state that can be proposed (DRAFT, REJECTED, or CANCELLED)
-        status = exam[0]
-        if status not in ['DRAFT', 'REJECTED', 'CANCELLED']:
-            return jsonify({"error": f"Cannot propose schedule for exam in {status} status"}), 400
-            
+
         # Exam period validation was removed as per user request
         # No longer checking if date is within an active exam period
-            
-        # Check if room is available at the given date and time
-        cursor.execute(
-            """
-            SELECT 1 FROM exams 
-            WHERE exam_date::date = %s::date 
-            AND start_hour = %s 
-            AND room_id = %s
-            AND status IN ('PROPOSED', 'ACCEPTED', 'CONFIRMED')
-            AND id != %s
-            """,
-            (exam_date, start_hour_int, room_id, exam_id)
-        )
-        if cursor.fetchone():
-            return jsonify({"error": "Room is already booked for the selected date and time"}), 409
-            
-        # Update the exam with the proposed schedule
-        cursor.execute(
-            """
-            UPDATE exams 
-            SET exam_date = %s, start_hour = %s, room_id = %s, status = 'PROPOSED', updated_at = CURRENT_TIMESTAMP 
-            WHERE id = %s
-            RETURNING id, discipline_id, exam_date, start_hour, room_id, status
-            """,
-            (exam_date, start_hour_int, room_id, exam_id)
-        )
-        updated_exam = cursor.fetchone()
-        conn.commit()
-        
-        columns = [desc[0] for desc in cursor.description]
-        updated_exam_dict = dict(zip(columns, updated_exam))
+
+        room_holds.ensure_table()
+        user_id = g.current_user.get('id')
+
+        def propose(cursor):
+            # Only proposals competing for this room on this day wait for each other
+            advisory_xact_lock(cursor, [room_day_lock_key(room_id, exam_date)])
+            cursor.execute(GROUP_BUSY_QUERY, (student_group, exam_date, start_hour_int, BOOKED_STATUSES, exam_id))
+            if cursor.fetchone():
+                return None, GROUP_BUSY_ERROR
+            # Group, status and room availability are checked by the UPDATE itself
+            exam, error = apply_transition(
+                cursor, exam_id, 'PROPOSE', g.current_user,
+                fields={'exam_date': exam_date, 'start_hour': start_hour_int, 'room_id': room_id},
+                condition=(
+                    f"{ROOM_FREE_CONDITION} AND {room_holds.SLOT_NOT_HELD_CONDITION}",
+                    (exam_date, start_hour_int, room_id, room_id, exam_date, start_hour_int, user_id),
+                    ROOM_UNAVAILABLE_ERROR
+                )
+            )
+            if not error:
+                room_holds.release_user_holds(cursor, user_id, [(room_id, exam_date_obj.date(), start_hour_int)])
+            return exam, error
+
+        updated_exam_dict, error = run_in_transaction(conn, propose)
+        if error:
+            code, message, status = error
+            return jsonify({"error": message, "code": code}), status
+
         updated_exam_dict['exam_date'] = updated_exam_dict['exam_date'].isoformat()
         
         return jsonify({
@@ -242,6 +259,213 @@ def propose_exam_schedule(exam_id):
         if conn:
             conn.close()
 
+class _BatchRejected(Exception):
+    """Rolls back an all-or-nothing batch after a proposal failed at write time"""
+
+
+@token_required
+def propose_exam_schedule_batch():
+    """
+    Group leader proposes schedules for several of the group's exams at once.
+    Body: {"proposals": [{"exam_id", "exam_date", "start_hour", "room_id"}, ...],
+    "all_or_nothing": false}. Proposals are checked in memory against the
+    current schedule and against each other, then written in one transaction.
+    """
+    if not DB_AVAILABLE:
+        return jsonify({"error": "Database not available"}), 500
+
+    if g.current_user.get('role') != 'SEF_GRUPA':
+        return jsonify({"error": "Only group leaders can propose exam schedules"}), 403
+
+    student_group = g.current_user.get('student_group')
+    if not student_group:
+        return jsonify({"error": "Group leader is not assigned to a student group"}), 400
+
+    data = request.get_json(silent=True) or {}
+    proposals = data.get('proposals')
+    all_or_nothing = bool(data.get('all_or_nothing', False))
+    if not isinstance(proposals, list) or not proposals:
+        return jsonify({"error": "'proposals' must be a non-empty list"}), 400
+
+    # One outcome per proposal, by position in the request
+    outcomes = [None] * len(proposals)
+    candidates = []
+    seen = set()
+    for position, item in enumerate(proposals):
+        if not isinstance(item, dict):
+            return jsonify({"error": f"Proposal {position} must be an object"}), 400
+        try:
+            exam_id = int(item.get('exam_id'))
+            room_id = int(item.get('room_id'))
+        except (TypeError, ValueError):
+            return jsonify({"error": f"Proposal {position} needs numeric exam_id and room_id"}), 400
+        if exam_id in seen:
+            outcomes[position] = (exam_id, 'DUPLICATE_IN_REQUEST', "Exam appears more than once in the request")
+            continue
+        seen.add(exam_id)
+        start_hour_int, error = _validate_slot(item.get('exam_date'), item.get('start_hour'))
+        if error:
+            outcomes[position] = (exam_id, 'INVALID_SLOT', error)
+            continue
+        candidates.append({
+            'position': position,
+            'exam_id': exam_id,
+            'day': datetime.strptime(item['exam_date'], '%Y-%m-%d').date(),
+            'start_hour': start_hour_int,
+            'room_id': room_id,
+        })
+
+    def fail(candidate, code, message):
+        outcomes[candidate['position']] = (candidate['exam_id'], code, message)
+
+    conn = None
+    try:
+        conn = get_db_connection()
+
+        room_holds.ensure_table()
+        user_id = g.current_user.get('id')
+        validated = list(outcomes)
+        accepted = []
+
+        def write_batch(cursor):
+            outcomes[:] = validated
+            accepted.clear()
+            if not candidates:
+                return
+            exam_ids = [c['exam_id'] for c in candidates]
+            room_ids = sorted({c['room_id'] for c in candidates})
+            days = sorted({c['day'] for c in candidates})
+
+            # Serialize only against proposals for the same rooms on the same days
+            advisory_xact_lock(cursor, [room_day_lock_key(c['room_id'], c['day']) for c in candidates])
+
+            # The group's exams, locked so a concurrent batch from the same group waits
+            cursor.execute(
+                "SELECT id, status FROM exams WHERE id = ANY(%s::int[]) AND student_group = %s FOR UPDATE",
+                (exam_ids, student_group)
+            )
+            statuses = dict(cursor.fetchall())
+            cursor.execute("SELECT id FROM rooms WHERE id = ANY(%s::int[])", (room_ids,))
+            known_rooms = {row[0] for row in cursor.fetchall()}
+
+            # Every booked slot that could clash: in the rooms involved, or for the group itself
+            cursor.execute(
+                """
+                SELECT room_id, exam_date::date, start_hour, student_group = %s
+                FROM exams
+                WHERE exam_date::date = ANY(%s::date[])
+                  AND status = ANY(%s::text[])
+                  AND (room_id = ANY(%s::int[]) OR student_group = %s)
+                """,
+                (student_group, days, BOOKED_STATUSES, room_ids, student_group)
+            )
+            booked_rooms, busy_group_slots = set(), set()
+            for room_id, day, hour, same_group in cursor.fetchall():
+                booked_rooms.add((room_id, day, hour))
+                if same_group:
+                    busy_group_slots.add((day, hour))
+            booked_rooms |= room_holds.held_slots(cursor, room_ids, days, user_id)
+
+            for c in candidates:
+                room_slot = (c['room_id'], c['day'], c['start_hour'])
+                group_slot = (c['day'], c['start_hour'])
+                status = statuses.get(c['exam_id'])
+                if status is None:
+                    fail(c, 'NOT_FOUND', "Exam not found or does not belong to your group")
+                elif status not in ['DRAFT', 'REJECTED', 'CANCELLED']:
+                    fail(c, 'INVALID_STATUS', f"Cannot propose schedule for exam in {status} status")
+                elif c['room_id'] not in known_rooms:
+                    fail(c, 'ROOM_NOT_FOUND', "Room not found")
+                elif room_slot in booked_rooms:
+                    fail(c, *ROOM_UNAVAILABLE_ERROR[:2])
+                elif group_slot in busy_group_slots:
+                    fail(c, *GROUP_BUSY_ERROR[:2])
+                else:
+                    # Later proposals in the batch see this one as booked
+                    booked_rooms.add(room_slot)
+                    busy_group_slots.add(group_slot)
+                    accepted.append(c)
+
+            if not accepted or (all_or_nothing and any(outcomes)):
+                return
+            # Same guards as the single proposal, re-checked by the UPDATE itself
+            cursor.execute(
+                """
+                UPDATE exams e
+                SET exam_date = p.exam_date, start_hour = p.start_hour, room_id = p.room_id,
+                    status = 'PROPOSED', updated_at = CURRENT_TIMESTAMP
+                FROM unnest(%s::int[], %s::date[], %s::int[], %s::int[]) AS p(exam_id, exam_date, start_hour, room_id)
+                WHERE e.id = p.exam_id
+                  AND e.student_group = %s
+                  AND e.status IN ('DRAFT', 'REJECTED', 'CANCELLED')
+                  AND NOT EXISTS (
+                      SELECT 1 FROM exams other
+                      WHERE other.exam_date::date = p.exam_date
+                        AND other.start_hour = p.start_hour
+                        AND other.room_id = p.room_id
+                        AND other.status = ANY(%s::text[])
+                        AND other.id <> e.id
+                  )
+                RETURNING e.id
+                """,
+                (
+                    [c['exam_id'] for c in accepted], [c['day'] for c in accepted],
+                    [c['start_hour'] for c in accepted], [c['room_id'] for c in accepted],
+                    student_group, BOOKED_STATUSES
+                )
+            )
+            written = {row[0] for row in cursor.fetchall()}
+            notify_changes(cursor, sorted(written))
+            for c in accepted:
+                if c['exam_id'] not in written:
+                    fail(c, 'CONFLICT', "Room was booked concurrently, please retry")
+            if all_or_nothing and any(outcomes):
+                raise _BatchRejected()
+            room_holds.release_user_holds(
+                cursor, user_id,
+                [(c['room_id'], c['day'], c['start_hour']) for c in accepted if c['exam_id'] in written]
+            )
+
+        try:
+            run_in_transaction(conn, write_batch)
+        except _BatchRejected:
+            pass
+        rolled_back = all_or_nothing and any(outcomes)
+
+        for c in accepted:
+            if outcomes[c['position']]:
+                continue
+            if rolled_back:
+                fail(c, 'NOT_APPLIED', "Not saved because another proposal in the batch failed")
+            else:
+                outcomes[c['position']] = (c['exam_id'], None, None)
+
+        results = []
+        for position, (exam_id, code, message) in enumerate(outcomes):
+            if code:
+                results.append({"exam_id": exam_id, "code": code, "error": message})
+            else:
+                item = proposals[position]
+                results.append({
+                    "exam_id": exam_id, "status": "PROPOSED", "exam_date": item['exam_date'],
+                    "start_hour": int(item['start_hour']), "room_id": int(item['room_id'])
+                })
+
+        proposed = sum(1 for r in results if 'status' in r)
+        return jsonify({
+            "proposed": proposed,
+            "failed": len(results) - proposed,
+            "results": results
+        }), 200
+    except Exception as e:
+        if conn:
+            conn.rollback()
+        print(f"Error proposing exam schedules in batch: {e}")
+        return jsonify({"error": "An internal error occurred"}), 500
+    finally:
+        if conn:
+            conn.close()
+
 @token_required
 def reschedule_exam(exam_id):
     """Group leader reschedules an exam that was rejected or cancelled"""
@@ -0,0 +1,229 @@
+"""
+Concurrency harness for exam proposals.
+Creates throw-away group leaders (one DRAFT exam each) and a few rooms, then
+fires all their proposals at once against a small pool of (room, day, hour)
+slots so that most of them compete. Afterwards it checks that:
+  - no room slot ended up booked twice,
+  - every requested slot was won by exactly one proposal,
+  - no request failed with a server error,
+  - the 95th percentile latency stayed under --max-p95 seconds.
+Exits with status 1 if any check fails. Fixture rows are removed at the end.
+
+Usage:
+    python stress_proposals.py                      # in-process Flask test client
+    python stress_proposals.py --url http://localhost:5000 --proposals 500
+"""
+
+import argparse
+import datetime
+import os
+import random
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import jwt
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from database import get_db_connection  # noqa: E402
+
+PREFIX = 'stress'
+
+
+def next_weekdays(count):
+    day = datetime.date.today() + datetime.timedelta(days=7)
+    days = []
+    while len(days) < count:
+        if day.weekday() < 5:
+            days.append(day)
+        day += datetime.timedelta(days=1)
+    return days
+
+
+def create_fixture(cursor, proposals, rooms):
+    cursor.execute(
+        "INSERT INTO users (id, full_name, email, role) VALUES (%s, %s, %s, 'CADRU_DIDACTIC')",
+        (f'{PREFIX}-teacher', 'Stress Teacher', f'{PREFIX}-teacher@example.invalid')
+    )
+    cursor.execute(
+        "INSERT INTO disciplines (name) VALUES (%s) RETURNING id", (f'{PREFIX} discipline',)
+    )
+    discipline_id = cursor.fetchone()[0]
+    room_ids = []
+    for i in range(rooms):
+        cursor.execute(
+            "INSERT INTO rooms (name, short_name, capacity) VALUES (%s, %s, 30) RETURNING id",
+            (f'{PREFIX.upper()}-R{i}', f'SR{i}')
+        )
+        room_ids.append(cursor.fetchone()[0])
+
+    leaders = []
+    for i in range(proposals):
+        user_id, group = f'{PREFIX}-sg-{i}', f'{PREFIX.upper()}-{i}'
+        cursor.execute(
+            "INSERT INTO users (id, full_name, email, role, student_group) VALUES (%s, %s, %s, 'SEF_GRUPA', %s)",
+            (user_id, f'Stress Leader {i}', f'{user_id}@example.invalid', group)
+        )
+        cursor.execute(
+            """
+            INSERT INTO exams (discipline_id, exam_type, student_group, main_teacher_id, status, created_by)
+            VALUES (%s, 'EXAM', %s, %s, 'DRAFT', %s) RETURNING id
+            """,
+            (discipline_id, group, f'{PREFIX}-teacher', f'{PREFIX}-teacher')
+        )
+        leaders.append((user_id, cursor.fetchone()[0]))
+    return room_ids, leaders
+
+
+def drop_fixture(cursor):
+    cursor.execute("DELETE FROM exams WHERE created_by = %s", (f'{PREFIX}-teacher',))
+    cursor.execute("DELETE FROM users WHERE id LIKE %s", (f'{PREFIX}-%',))
+    cursor.execute("DELETE FROM disciplines WHERE name = %s", (f'{PREFIX} discipline',))
+    cursor.execute("DELETE FROM rooms WHERE name LIKE %s", (f'{PREFIX.upper()}-R%',))
+
+
+def make_sender(url, secret_key):
+    """Return send(user_id, exam_id, body) -> status code, over HTTP or the in-process app"""
+    def token(user_id):
+        return jwt.encode(
+            {'user_id': user_id, 'exp': datetime.datetime.utcnow() + datetime.timedelta(hours=1)},
+            secret_key, algorithm='HS256'
+        )
+
+    if url:
+        import requests
+        session_local = threading.local()
+
+        def send(user_id, exam_id, body):
+            if not hasattr(session_local, 'session'):
+                session_local.session = requests.Session()
+            response = session_local.session.put(
+                f"{url.rstrip('/')}/api/sg/exams/{exam_id}/propose",
+                json=body, headers={'Authorization': f'Bearer {token(user_id)}'}
+            )
+            return response.status_code
+        return send
+
+    import app as app_module
+    flask_app = app_module.app
+
+    def send(user_id, exam_id, body):
+        response = flask_app.test_client().put(
+            f'/api/sg/exams/{exam_id}/propose',
+            json=body, headers={'Authorization': f'Bearer {token(user_id)}'}
+        )
+        return response.status_code
+    return send
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fire concurrent exam proposals and check for double bookings.")
+    parser.add_argument('--url', help="Base URL of a running server (default: in-process test client)")
+    parser.add_argument('--proposals', type=int, default=300, help="Concurrent proposals (default 300)")
+    parser.add_argument('--concurrency', type=int, default=30,
+                        help="Requests in flight at once; each holds up to two DB connections, "
+                             "so keep it under half of max_connections (default 30)")
+    parser.add_argument('--rooms', type=int, default=4, help="Rooms competed for (default 4)")
+    parser.add_argument('--days', type=int, default=3, help="Days competed for (default 3)")
+    parser.add_argument('--hours', type=int, default=3, help="Start hours competed for (default 3)")
+    parser.add_argument('--max-p95', type=float, default=2.0, help="Latency budget in seconds (default 2.0)")
+    parser.add_argument('--secret-key', help="JWT secret of the server (default: SECRET_KEY from the environment)")
+    parser.add_argument('--seed', type=int, help="Random seed for slot selection")
+    args = parser.parse_args()
+
+    secret_key = args.secret_key or os.environ.get('SECRET_KEY', 'your_default_secret_key')
+    rng = random.Random(args.seed)
+
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    drop_fixture(cursor)
+    room_ids, leaders = create_fixture(cursor, args.proposals, args.rooms)
+    conn.commit()
+
+    days = next_weekdays(args.days)
+    hours = list(range(8, 8 + 2 * args.hours, 2))
+    requests_to_send = []
+    for user_id, exam_id in leaders:
+        slot = (rng.choice(room_ids), rng.choice(days), rng.choice(hours))
+        body = {'room_id': slot[0], 'exam_date': slot[1].isoformat(), 'start_hour': slot[2]}
+        requests_to_send.append((user_id, exam_id, body, slot))
+
+    send = make_sender(args.url, secret_key)
+    start_gate = threading.Event()
+    latencies, statuses = [], []
+    lock = threading.Lock()
+
+    def fire(item):
+        user_id, exam_id, body, _ = item
+        start_gate.wait()
+        started = time.perf_counter()
+        status = send(user_id, exam_id, body)
+        elapsed = time.perf_counter() - started
+        with lock:
+            latencies.append(elapsed)
+            statuses.append(status)
+
+    try:
+        with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+            futures = [pool.submit(fire, item) for item in requests_to_send]
+            wall_start = time.perf_counter()
+            start_gate.set()
+            for future in futures:
+                future.result()
+            wall = time.perf_counter() - wall_start
+
+        cursor.execute(
+            """
+            SELECT room_id, exam_date::date, start_hour, COUNT(*)
+            FROM exams
+            WHERE created_by = %s AND status IN ('PROPOSED', 'ACCEPTED', 'CONFIRMED')
+            GROUP BY room_id, exam_date::date, start_hour
+            HAVING COUNT(*) > 1
+            """,
+            (f'{PREFIX}-teacher',)
+        )
+        double_bookings = cursor.fetchall()
+        cursor.execute(
+            "SELECT COUNT(*) FROM exams WHERE created_by = %s AND status = 'PROPOSED'",
+            (f'{PREFIX}-teacher',)
+        )
+        proposed = cursor.fetchone()[0]
+        conn.commit()
+    finally:
+        drop_fixture(cursor)
+        conn.commit()
+        conn.close()
+
+    distinct_slots = len({item[3] for item in requests_to_send})
+    by_status = {code: statuses.count(code) for code in sorted(set(statuses))}
+    ordered = sorted(latencies)
+    p95 = ordered[max(0, int(len(ordered) * 0.95) - 1)]
+
+    print(f"Proposals:        {len(requests_to_send)} over {distinct_slots} distinct slots")
+    print(f"Responses:        {by_status}")
+    print(f"Wall time:        {wall:.2f}s ({len(latencies) / wall:.0f} req/s)")
+    print(f"Latency p50/p95/max: {statistics.median(ordered):.3f}s / {p95:.3f}s / {ordered[-1]:.3f}s")
+
+    failures = []
+    if double_bookings:
+        failures.append(f"{len(double_bookings)} room slots booked more than once: {double_bookings[:5]}")
+    if proposed != distinct_slots:
+        failures.append(f"{proposed} proposals succeeded, expected exactly {distinct_slots}")
+    if any(code >= 500 for code in statuses):
+        failures.append("server errors returned")
+    if p95 > args.max_p95:
+        failures.append(f"p95 latency {p95:.3f}s exceeds {args.max_p95:.3f}s")
+
+    if failures:
+        for failure in failures:
+            print(f"FAIL: {failure}")
+        sys.exit(1)
+    print("OK: no double bookings")
+
+
+if __name__ == '__main__':
+    main()
@@ -4,6 +4,10 @@ from flask import jsonify, g, request
 import logging
 from database import get_db_connection
 from auth import token_required
+from serialization import rows_to_dicts
+from fieldsets import Listing, Field, Join, FieldsError, EXAM_JOINS
+import conditional
+import reference_cache
 
 # Set up logging
 logging.basicConfig(level=logging.DEBUG)
@@ -12,6 +16,32 @@ logger = logging.getLogger(__name__)
 # Import DB_AVAILABLE from app.py when this module is imported
 DB_AVAILABLE = None
 
+# Query to get all exams for a student group - based on working SG query.
+# Shared with the iCalendar feeds so both views always agree.
+STUDENT_EXAMS_LISTING = Listing(
+    'student_exams', "FROM exams e",
+    dict(EXAM_JOINS, u2=Join("LEFT JOIN users u2 ON e.second_teacher_id = u2.id")),
+    {
+        'id': Field("e.id"),
+        'discipline_name': Field("d.name as discipline_name", ('d',)),
+        'exam_type': Field("e.exam_type"),
+        'status': Field("e.status"),
+        'exam_date': Field("e.exam_date"),
+        'start_hour': Field("e.start_hour"),
+        'duration': Field("COALESCE(e.duration, 120) as duration"),
+        # rooms.id is the FK target, so this equals r.id without the join
+        'room_id': Field("e.room_id"),
+        'room_name': Field("r.name as room_name", ('r',)),
+        'main_teacher': Field("u1.full_name as main_teacher", ('u1',)),
+        'second_teacher': Field("u2.full_name as second_teacher", ('u2',)),
+    }
+)
+STUDENT_EXAMS_ORDER = "ORDER BY e.status, e.exam_date, e.start_hour"
+STUDENT_EXAMS_QUERY = STUDENT_EXAMS_LISTING.shape().select_sql + f"""
+    WHERE e.student_group = %s
+    {STUDENT_EXAMS_ORDER}
+"""
+
 @token_required
 def get_student_info():
     """
@@ -115,6 +145,7 @@ def update_student_info():
         cursor.execute(query, tuple(params))
         result = cursor.fetchone()
         conn.commit()
+        reference_cache.invalidate('users')
         cursor.close()
         
         if result:
@@ -155,34 +186,28 @@ def get_student_exams():
     
     if not student_group:
         return jsonify({'error': 'Student group not set for this user.'}), 400
+
+    try:
+        fields = STUDENT_EXAMS_LISTING.parse_fields(request.args)
+    except FieldsError as e:
+        return jsonify({'error': str(e)}), 400
+    shape = STUDENT_EXAMS_LISTING.shape(fields)
+    where = " WHERE " + " AND ".join(("e.student_group = %s",) + shape.conditions)
+    query = shape.select_sql + where + " " + STUDENT_EXAMS_ORDER
+    version_query = STUDENT_EXAMS_LISTING.version_sql(
+        shape, f"GREATEST(max(e.updated_at), {conditional.GROUP_LAST_DELETE_SQL})"
+    ) + where
     
     conn = None
     try:
         conn = get_db_connection()
         cursor = conn.cursor()
-        
-        # Query to get all exams for the student's group - based on working SG query
-        query = """
-            SELECT 
-                e.id,
-                d.name as discipline_name,
-                e.exam_type,
-                e.status,
-                e.exam_date,
-                e.start_hour,
-                COALESCE(e.duration, 120) as duration,
-                r.id as room_id,
-                r.name as room_name,
-                u1.full_name as main_teacher,
-                u2.full_name as second_teacher
-            FROM exams e
-            JOIN disciplines d ON e.discipline_id = d.id
-            LEFT JOIN rooms r ON e.room_id = r.id
-            JOIN users u1 ON e.main_teacher_id = u1.id
-            LEFT JOIN users u2 ON e.second_teacher_id = u2.id
-            WHERE e.student_group = %s
-            ORDER BY e.status, e.exam_date, e.start_hour
-        """
+
+        # Answer an unchanged reload with 304 before running the join
+        validator = conditional.read_validator(cursor, version_query, (student_group, student_group), (student_group,))
+        unchanged = conditional.not_modified(validator)
+        if unchanged:
+            return unchanged
         
         print(f"[DEBUG STUDENT] Executing query with student_group={student_group}")
         cursor.execute(query, (student_group,))
@@ -190,20 +215,11 @@ def get_student_exams():
         print(f"[DEBUG STUDENT] Query executed successfully, fetched {len(exams)} rows")
         
         # Convert to list of dictionaries
-        columns = [desc[0] for desc in cursor.description]
-        print(f"[DEBUG STUDENT] Columns: {columns}")
-        result = []
-        for row in exams:
-            row_dict = {}
-            for i, col in enumerate(columns):
-                row_dict[col] = row[i]
-            result.append(row_dict)
-        
-        # Format dates for JSON and prepare teachers array
-        for exam in result:
-            if exam.get('exam_date'):
-                exam['exam_date'] = exam['exam_date'].isoformat()
-            
+        result = rows_to_dicts(cursor, exams)
+        
+        # Prepare teachers array, unless ?fields= left both teachers out
+        with_teachers = 'main_teacher' in fields or 'second_teacher' in fields
+        for exam in result if with_teachers else ():
             # Create teachers array from main_teacher and second_teacher
             teachers = []
             if exam.get('main_teacher'):
@@ -214,12 +230,12 @@ def get_student_exams():
         
         print(f"[DEBUG STUDENT] Found {len(result)} exams for student group {student_group}")
         print(f"[DEBUG STUDENT] First exam (if any): {result[0] if result else 'None'}")
-        print(f"[DEBUG STUDENT] Teachers format: {result[0]['teachers'] if result else 'None'}")
+        print(f"[DEBUG STUDENT] Teachers format: {result[0].get('teachers') if result else 'None'}")
         
         
         cursor.close()
         
-        return jsonify(result), 200
+        return conditional.add_validators(jsonify(result), validator)
     
     except Exception as error:
         print(f"Error fetching exams for student: {error}")